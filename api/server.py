@@ -0,0 +1,191 @@
+import argparse
+import math
+import os
+import sys
+import time
+from typing import List, Literal, Tuple
+
+import numpy as np
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.concurrency import run_in_threadpool
+from pydantic import BaseModel, Field
+
+# Add the project root to Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from routing import response_cache, routes
+from routing.batching import BatchingClient, DEFAULT_BATCH_WINDOW
+from routing.client import make_client
+from routing.geometry import encode_polyline
+from routing.ratelimit import ResilientClient
+from routing.metrics import LatencyRegistry
+from routing.ordering import optimize_delivery_route
+from routing.pareto import OBJECTIVES
+from routing.response_cache import ResponseCache
+
+# Keep-alive connections to ORS; matches the worker threads that may call it at once
+ORS_POOL_SIZE = int(os.environ.get("ORS_POOL_SIZE", 64))
+
+Coordinate = Tuple[float, float]  # (lat, lon)
+
+class RouteConditions(BaseModel):
+    package_weight: float = 500
+    truck_type: str = "Diesel"
+    traffic_level: str = "Low"
+    weather_condition: str = "Clear"
+
+class OptimalRouteRequest(RouteConditions):
+    coords: List[Coordinate] = Field(..., min_length=2)
+    order_stops: bool = False
+    road_network_ordering: bool = False
+    # "alternatives": one ORS alternative_routes call per profile instead of the strategy sweep
+    mode: Literal["strategies", "alternatives"] = "strategies"
+
+class OrderRequest(BaseModel):
+    coords: List[Coordinate] = Field(..., min_length=2)
+    package_weight: float = 500
+    truck_type: str = "Diesel"
+    road_network: bool = False
+    time_budget: float = Field(1.0, gt=0, le=30)
+
+class ScoreRequest(RouteConditions):
+    coords: List[Coordinate] = Field(..., min_length=2)
+    profile: str = "driving-hgv"
+    avoid_tolls: bool = False
+    avoid_highways: bool = False
+    avoid_ferries: bool = False
+
+app = FastAPI(title="Carbon-Aware Route Optimizer")
+# Plan-quota rate limits, retries with backoff and coalescing of identical in-flight calls
+ors = ResilientClient(make_client(pool_size=ORS_POOL_SIZE, single_attempt=True))
+# Concurrent requests share matrix calls
+client = BatchingClient(ors, window=float(os.environ.get("MATRIX_BATCH_WINDOW", DEFAULT_BATCH_WINDOW)))
+ors_cache = ResponseCache(os.environ.get("ORS_CACHE_PATH", response_cache.DEFAULT_CACHE_PATH))
+latency = LatencyRegistry()
+
+@app.middleware("http")
+async def record_latency(request: Request, call_next):
+    start = time.perf_counter()
+    response = await call_next(request)
+    route = request.scope.get("route")
+    latency.observe(f"{request.method} {route.path if route else 'unmatched'}", time.perf_counter() - start)
+    return response
+
+def _json_value(value):
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    if isinstance(value, float) and not math.isfinite(value):
+        return None  # JSON has no inf/nan (e.g. crowding distance at the ends of a Pareto front)
+    return value
+
+def _route_json(route):
+    """Route dict as JSON: the path as an encoded polyline (precision 5), other arrays as lists"""
+    if route is None:
+        return None
+    result = {k: _json_value(v) for k, v in route.items() if k != 'path'}
+    result['polyline'] = encode_polyline(route['path'])
+    return result
+
+def _order(coords, package_weight, truck_type, road_network, time_budget=1.0):
+    return optimize_delivery_route(
+        coords, package_weight, truck_type, time_budget,
+        client=client if road_network else None, cache=ors_cache
+    )
+
+def _find_optimal(req):
+    coords = [tuple(c) for c in req.coords]
+    if req.order_stops:
+        coords = _order(coords, req.package_weight, req.truck_type, req.road_network_ordering)
+    errors = []
+    optimal, standard = routes.find_optimal_carbon_route(
+        client, coords, req.package_weight, req.truck_type, req.traffic_level, req.weather_condition,
+        cache=ors_cache, on_error=lambda name, e: errors.append({"strategy": name, "error": str(e)}), mode=req.mode,
+        segment_level=True
+    )
+    return {"coords": coords, "optimal": _route_json(optimal), "standard": _route_json(standard), "errors": errors}
+
+@app.post("/v1/routes/optimal")
+async def optimal_route(req: OptimalRouteRequest):
+    result = await run_in_threadpool(_find_optimal, req)
+    if result["optimal"] is None:
+        raise HTTPException(status_code=502, detail={"message": "No strategy returned a route",
+                                                     "errors": result["errors"]})
+    return result
+
+def _find_pareto(req):
+    coords = [tuple(c) for c in req.coords]
+    if req.order_stops:
+        coords = _order(coords, req.package_weight, req.truck_type, req.road_network_ordering)
+    errors = []
+    front, candidates = routes.find_pareto_routes(
+        client, coords, req.package_weight, req.truck_type, req.traffic_level, req.weather_condition,
+        cache=ors_cache, on_error=lambda name, e: errors.append({"strategy": name, "error": str(e)}), mode=req.mode,
+        segment_level=True
+    )
+    candidates.sort(key=lambda r: (r['pareto_rank'], r['co2_emissions']))
+    return {
+        "coords": coords,
+        "objectives": list(OBJECTIVES),
+        "front": [r['strategy_name'] for r in front],
+        "routes": [_route_json(r) for r in candidates],
+        "errors": errors,
+    }
+
+@app.post("/v1/routes/pareto")
+async def pareto_routes(req: OptimalRouteRequest):
+    result = await run_in_threadpool(_find_pareto, req)
+    if not result["routes"]:
+        raise HTTPException(status_code=502, detail={"message": "No strategy returned a route",
+                                                     "errors": result["errors"]})
+    return result
+
+@app.post("/v1/routes/order")
+async def order_stops(req: OrderRequest):
+    try:
+        coords = await run_in_threadpool(
+            _order, [tuple(c) for c in req.coords], req.package_weight, req.truck_type, req.road_network,
+            req.time_budget
+        )
+    except Exception as e:
+        raise HTTPException(status_code=502, detail=f"Road-network ordering failed: {e}")
+    return {"coords": coords}
+
+@app.post("/v1/routes/score")
+async def score(req: ScoreRequest):
+    try:
+        route = await run_in_threadpool(
+            routes.get_route_and_emissions, client, [tuple(c) for c in req.coords], req.profile,
+            req.package_weight, req.truck_type, req.avoid_tolls, req.avoid_highways, req.avoid_ferries,
+            req.traffic_level, req.weather_condition, ors_cache, segment_level=True
+        )
+    except Exception as e:
+        raise HTTPException(status_code=502, detail=f"Error getting route: {e}")
+    if route is None:
+        raise HTTPException(status_code=404, detail="No route found")
+    return _route_json(route)
+
+@app.get("/health")
+async def health():
+    return {"status": "ok"}
+
+@app.get("/metrics")
+async def metrics():
+    return {
+        "latency": latency.snapshot(),
+        "ors": dict(ors.stats(), **client.stats()),
+        "cache": ors_cache.stats(),
+    }
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="HTTP API for carbon-optimal routes, stop ordering and scoring")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8000)
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    import uvicorn
+    args = parse_args(argv)
+    uvicorn.run(app, host=args.host, port=args.port)
+
+if __name__ == '__main__':
+    main()
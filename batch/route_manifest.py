@@ -0,0 +1,243 @@
+import argparse
+import json
+import logging
+import os
+import sys
+import time
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+# Add the project root to Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from routing import response_cache, routes
+from routing.client import make_client
+from routing.concurrency import map_ordered
+from routing.geocode_cache import GeocodeCache, DEFAULT_CACHE_PATH, normalize_address
+from routing.ordering import optimize_delivery_route
+from routing.ratelimit import ResilientClient, TokenBucket
+
+logger = logging.getLogger(__name__)
+
+CHECKPOINT_FILE = "_checkpoint.json"
+
+# Manifest columns; stops are separated by STOP_SEPARATOR, places are names or "lat,lon"
+ID_COLUMN = "shipment_id"
+REQUIRED_COLUMNS = ("origin", "destination")
+STOP_SEPARATOR = ";"
+# Accepted vehicle_type values, case-insensitive
+VEHICLE_TYPES = ("diesel", "gasoline", "ev")
+
+RESULT_SCHEMA = pa.schema([
+    (ID_COLUMN, pa.string()),
+    ("status", pa.string()),
+    ("error", pa.string()),
+    ("n_stops", pa.int32()),
+    ("strategy_name", pa.string()),
+    ("profile", pa.string()),
+    ("distance_km", pa.float64()),
+    ("duration_min", pa.float64()),
+    ("energy_consumed", pa.float64()),
+    ("co2_emissions", pa.float64()),
+    ("carbon_efficiency", pa.float64()),
+    ("avg_grade", pa.float64()),
+])
+
+def read_manifest(path, chunk_size):
+    """Yield the manifest as DataFrames of at most chunk_size rows (CSV or Parquet)"""
+    if path.endswith(".parquet"):
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=chunk_size):
+            yield batch.to_pandas()
+    else:
+        yield from pd.read_csv(path, chunksize=chunk_size, dtype=str, keep_default_na=False)
+
+def parse_latlon(text):
+    """(lat, lon) if text is a "lat,lon" pair, else None"""
+    parts = text.split(",")
+    if len(parts) != 2:
+        return None
+    try:
+        return (float(parts[0]), float(parts[1]))
+    except ValueError:
+        return None
+
+def field(row, name, default):
+    """Manifest value, or default when the column is absent, empty or null"""
+    value = row.get(name)
+    if value is None or value == "" or (not isinstance(value, str) and pd.isna(value)):
+        return default
+    return value
+
+def shipment_options(row):
+    """(weight, vehicle_type) of a manifest row; raises ValueError with a readable message if invalid"""
+    raw_weight = field(row, "weight", 500)
+    try:
+        weight = float(raw_weight)
+    except (TypeError, ValueError):
+        raise ValueError(f"Invalid weight {raw_weight!r}") from None
+    if not weight >= 0:
+        raise ValueError(f"Invalid weight {raw_weight!r}")
+    vehicle_type = str(field(row, "vehicle_type", "Diesel")).strip()
+    if vehicle_type.lower() not in VEHICLE_TYPES:
+        raise ValueError(f"Unknown vehicle_type {vehicle_type!r}, expected one of Diesel, Gasoline, EV")
+    return weight, vehicle_type
+
+def shipment_places(row):
+    stops = [s.strip() for s in str(field(row, "stops", "")).split(STOP_SEPARATOR) if s.strip()]
+    return [str(row["origin"]).strip()] + stops + [str(row["destination"]).strip()]
+
+def load_checkpoint(output_dir, manifest, chunk_size):
+    path = os.path.join(output_dir, CHECKPOINT_FILE)
+    if not os.path.exists(path):
+        return 0
+    with open(path) as f:
+        checkpoint = json.load(f)
+    if checkpoint["manifest"] != os.path.abspath(manifest) or checkpoint["chunk_size"] != chunk_size:
+        sys.exit(f"{path} belongs to another run ({checkpoint['manifest']}, chunk size "
+                 f"{checkpoint['chunk_size']}); use a new --output directory")
+    return checkpoint["chunks_done"]
+
+def save_checkpoint(output_dir, manifest, chunk_size, chunks_done, rows_done):
+    path = os.path.join(output_dir, CHECKPOINT_FILE)
+    with open(path + ".tmp", "w") as f:
+        json.dump({"manifest": os.path.abspath(manifest), "chunk_size": chunk_size,
+                   "chunks_done": chunks_done, "rows_done": rows_done}, f)
+    os.replace(path + ".tmp", path)
+
+class ManifestRouter:
+    """Geocodes, routes and scores one manifest chunk at a time"""
+    def __init__(self, client, geocode_cache, ors_cache, workers, mode, profile, optimize_stops):
+        self.client = client
+        self.geocode_cache = geocode_cache
+        self.ors_cache = ors_cache
+        self.workers = workers
+        self.mode = mode
+        self.profile = profile
+        self.optimize_stops = optimize_stops
+
+    def geocode_chunk(self, chunk):
+        """Coordinates for every distinct place in the chunk, each looked up once"""
+        names = {}
+        for row in chunk.to_dict("records"):
+            for place in shipment_places(row):
+                if parse_latlon(place) is None:
+                    names.setdefault(normalize_address(place), place)
+        keys = list(names)
+
+        def geocode(place):
+            try:
+                return routes.geocode_location(self.client, place, cache=self.geocode_cache)
+            except Exception as e:
+                logger.warning("Geocoding %r failed: %s", place, e)
+                return None
+        coords, _ = map_ordered(geocode, [(names[k],) for k in keys], max_workers=self.workers)
+        return dict(zip(keys, coords))
+
+    def route_shipment(self, row, places):
+        result = {ID_COLUMN: row[ID_COLUMN], "status": "ok", "n_stops": len(places) - 2}
+        try:
+            weight, vehicle_type = shipment_options(row)
+        except ValueError as e:
+            return dict(result, status="invalid_row", error=str(e))
+        coords = []
+        for place in places:
+            point = parse_latlon(place) or self.geocoded.get(normalize_address(place))
+            if point is None:
+                return dict(result, status="geocode_failed", error=f"Could not geocode '{place}'")
+            coords.append(point)
+
+        try:
+            if self.optimize_stops and len(coords) > 3:
+                coords = optimize_delivery_route(coords, weight, vehicle_type)
+            if self.mode in ("optimal", "alternatives"):
+                errors = []
+                route, _ = routes.find_optimal_carbon_route(
+                    self.client, coords, weight, vehicle_type, cache=self.ors_cache, max_workers=1,
+                    on_error=lambda name, e: errors.append(f"{name}: {e}"),
+                    mode="alternatives" if self.mode == "alternatives" else "strategies", segment_level=True
+                )
+                if route is None and errors:
+                    raise RuntimeError("; ".join(errors))
+            else:
+                # Segment-level scoring, as in the app and the HTTP API
+                route = routes.get_route_and_emissions(self.client, coords, self.profile, weight, vehicle_type,
+                                                       cache=self.ors_cache, segment_level=True)
+        except Exception as e:
+            return dict(result, status="error", error=str(e))
+        if route is None:
+            return dict(result, status="no_route", error="ORS returned no route")
+        result.update({name: route.get(name) for name in RESULT_SCHEMA.names if name in route})
+        return result
+
+    def process(self, chunk):
+        self.geocoded = self.geocode_chunk(chunk)
+        rows = chunk.to_dict("records")
+        results, _ = map_ordered(
+            self.route_shipment, [(row, shipment_places(row)) for row in rows], max_workers=self.workers
+        )
+        # A shipment whose worker raised still gets a row
+        results = [r or {ID_COLUMN: row[ID_COLUMN], "status": "error", "error": "worker failed"}
+                   for row, r in zip(rows, results)]
+        return pa.Table.from_pylist(results, schema=RESULT_SCHEMA)
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Route and score every shipment in a CSV/Parquet manifest")
+    parser.add_argument('manifest', help="CSV or .parquet with origin, destination[, stops, weight, vehicle_type, "
+                                         "shipment_id]; stops separated by ';'")
+    parser.add_argument('--output', required=True, help="directory for Parquet part files and the checkpoint")
+    parser.add_argument('--chunk-size', type=int, default=500, help="manifest rows held in memory at once")
+    parser.add_argument('--workers', type=int, default=8, help="concurrent ORS requests")
+    parser.add_argument('--rate', type=float, default=0.6,
+                        help="ORS requests per second across all workers (free plan: 40/min directions)")
+    parser.add_argument('--burst', type=float, default=None, help="token bucket capacity (default: --rate)")
+    parser.add_argument('--mode', choices=['single', 'optimal', 'alternatives'], default='single',
+                        help="one directions call per shipment, the full strategy sweep, or the optimal "
+                             "route from ORS alternative routes (two calls per two-point shipment)")
+    parser.add_argument('--profile', default='driving-hgv', help="ORS profile for --mode single")
+    parser.add_argument('--optimize-stops', action='store_true', help="reorder intermediate stops first")
+    parser.add_argument('--api-key', default=None, help="ORS key (or set ORS_API_KEY)")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    args = parse_args(argv)
+    os.makedirs(args.output, exist_ok=True)
+    chunks_done = load_checkpoint(args.output, args.manifest, args.chunk_size)
+
+    # One bucket shared by every ORS method; 429/5xx are retried with backoff
+    client = ResilientClient(make_client(args.api_key, pool_size=args.workers, single_attempt=True),
+                             buckets={}, default_bucket=TokenBucket(args.rate, args.burst))
+    router = ManifestRouter(
+        client,
+        GeocodeCache(os.environ.get("GEOCODE_CACHE_PATH", DEFAULT_CACHE_PATH)),
+        response_cache.ResponseCache(os.environ.get("ORS_CACHE_PATH", response_cache.DEFAULT_CACHE_PATH)),
+        args.workers, args.mode, args.profile, args.optimize_stops,
+    )
+
+    rows_done = chunks_done * args.chunk_size
+    for index, chunk in enumerate(read_manifest(args.manifest, args.chunk_size)):
+        if index < chunks_done:
+            continue  # finished in an earlier run
+        missing = [c for c in REQUIRED_COLUMNS if c not in chunk.columns]
+        if missing:
+            sys.exit(f"Manifest is missing columns: {', '.join(missing)}")
+        if ID_COLUMN not in chunk.columns:
+            chunk[ID_COLUMN] = [str(rows_done + i) for i in range(len(chunk))]
+        chunk[ID_COLUMN] = chunk[ID_COLUMN].astype(str)
+
+        start = time.perf_counter()
+        table = router.process(chunk)
+        part = os.path.join(args.output, f"part-{index:05d}.parquet")
+        pq.write_table(table, part + ".tmp")
+        os.replace(part + ".tmp", part)
+        rows_done += len(chunk)
+        save_checkpoint(args.output, args.manifest, args.chunk_size, index + 1, rows_done)
+
+        ok = sum(1 for s in table.column("status").to_pylist() if s == "ok")
+        logger.info("Chunk %d: %d/%d routed in %.1fs (%d rows done)", index, ok, len(chunk),
+                    time.perf_counter() - start, rows_done)
+
+if __name__ == '__main__':
+    main()
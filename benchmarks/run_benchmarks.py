@@ -0,0 +1,189 @@
+import argparse
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import time
+
+import numpy as np
+
+# Add the project root to Python path
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT)
+
+from env.energy_model import estimate_energy, energy_to_co2
+from env.route_env import CarbonRouteEnv
+from routing.ordering import optimize_delivery_route
+from routing.scoring import parse_directions_response, score_route, calculate_route_score
+
+FIXTURE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+# Committed results of the last run that changed performance; --compare defaults to it
+BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baseline.json')
+# A synthetic Denver -> Colorado Springs HGV response (400 points with steepness, surface and
+# waytype extras), built in the ORS v2 shape rather than recorded. For real-world numbers, save
+# a response with routing.fake_ors.RecordingClient and pass its "response" here instead.
+DIRECTIONS_FIXTURE = 'ors_directions_synthetic.json'
+
+# Env-step actions drawn per rng.integers call
+ACTION_BATCH = 4096
+
+# A median this much slower than the baseline is reported as a regression
+REGRESSION_THRESHOLD = 1.10
+
+def load_fixture(name):
+    with open(os.path.join(FIXTURE_DIR, name)) as f:
+        return json.load(f)
+
+def bench_estimate_energy():
+    return lambda: estimate_energy(42.0, 1.5, 'diesel', 750)
+
+def bench_energy_to_co2():
+    return lambda: energy_to_co2(12.5, 'diesel')
+
+def bench_route_emissions():
+    # The scoring half of get_route_and_emissions, on the synthetic ORS directions response
+    response = load_fixture(DIRECTIONS_FIXTURE)
+    return lambda: score_route(parse_directions_response(response), 'driving-hgv', 750, 'Diesel', 'Medium', 'Rainy')
+
+def bench_route_emissions_segments():
+    # Per-extras-segment scoring on the same response
+    response = load_fixture(DIRECTIONS_FIXTURE)
+    return lambda: score_route(parse_directions_response(response), 'driving-hgv', 750, 'Diesel', 'Medium', 'Rainy',
+                               segment_level=True)
+
+def bench_calculate_route_score():
+    route = score_route(parse_directions_response(load_fixture(DIRECTIONS_FIXTURE)), 'driving-hgv', 750, 'Diesel')
+    route['avoid_highways'] = False
+    return lambda: calculate_route_score(route, 750, 'High', 'Snowy')
+
+def bench_optimize_delivery_route(n_stops):
+    def setup():
+        rng = random.Random(n_stops)
+        coords = [(39.5 + rng.random(), -105.5 + rng.random()) for _ in range(n_stops)]
+        return lambda: optimize_delivery_route(coords, 750, 'Diesel')
+    return setup
+
+def bench_env_step():
+    rng = np.random.default_rng(0)
+    env = CarbonRouteEnv(n_nodes=20, seed=0)
+    env.reset()
+    # Random actions drawn a batch at a time, so the cost of drawing them stays small and memory flat
+    actions = iter(())
+
+    def step():
+        nonlocal actions
+        action = next(actions, None)
+        if action is None:
+            actions = iter(rng.integers(0, env.n_nodes, ACTION_BATCH).tolist())
+            action = next(actions)
+        _, _, done, _ = env.step(action)
+        if done:
+            env.reset()
+    return step
+
+BENCHMARKS = {
+    'energy_model.estimate_energy': bench_estimate_energy,
+    'energy_model.energy_to_co2': bench_energy_to_co2,
+    'scoring.route_emissions': bench_route_emissions,
+    'scoring.route_emissions_segments': bench_route_emissions_segments,
+    'scoring.calculate_route_score': bench_calculate_route_score,
+    'ordering.optimize_delivery_route[10]': bench_optimize_delivery_route(10),
+    'ordering.optimize_delivery_route[50]': bench_optimize_delivery_route(50),
+    'ordering.optimize_delivery_route[200]': bench_optimize_delivery_route(200),
+    'route_env.step': bench_env_step,
+}
+
+def measure(fn, repeat, min_time):
+    """Per-call seconds for `repeat` rounds, each looping fn until it runs at least min_time"""
+    fn()  # warm up
+    loops = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(loops):
+            fn()
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time:
+            break
+        loops *= 2 if elapsed == 0 else max(2, int(min_time / elapsed))
+    rounds = [elapsed / loops]
+    for _ in range(repeat - 1):
+        start = time.perf_counter()
+        for _ in range(loops):
+            fn()
+        rounds.append((time.perf_counter() - start) / loops)
+    return {
+        'loops': loops,
+        'min_s': min(rounds),
+        'median_s': statistics.median(rounds),
+        'mean_s': statistics.mean(rounds),
+        'stdev_s': statistics.stdev(rounds) if len(rounds) > 1 else 0.0,
+        'ops_per_s': 1 / statistics.median(rounds),
+    }
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+
+def compare(results, baseline):
+    """Median ratio against a previous results file; returns the names that regressed"""
+    regressed = []
+    for name, stats in results['benchmarks'].items():
+        old = baseline['benchmarks'].get(name)
+        if old is None:
+            continue
+        ratio = stats['median_s'] / old['median_s']
+        flag = 'REGRESSION' if ratio > REGRESSION_THRESHOLD else ''
+        print(f"  {name:<42} {ratio:6.2f}x vs {baseline['commit']} {flag}")
+        if flag:
+            regressed.append(name)
+    return regressed
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Time the energy model, scoring, ordering and env hot paths")
+    parser.add_argument('-k', '--filter', default='', help="only run benchmarks whose name contains this")
+    parser.add_argument('--repeat', type=int, default=5, help="timed rounds per benchmark")
+    parser.add_argument('--min-time', type=float, default=0.2, help="minimum seconds per round")
+    parser.add_argument('--output', default=None, help="also save the results JSON here")
+    parser.add_argument('--compare', default=BASELINE, help="results JSON to compare medians against "
+                                                            "(default: benchmarks/baseline.json)")
+    parser.add_argument('--update-baseline', action='store_true', help="save the results as the new baseline")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    results = {
+        'commit': git_commit(),
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'machine': platform.machine(),
+        'benchmarks': {},
+    }
+    for name, setup in BENCHMARKS.items():
+        if args.filter not in name:
+            continue
+        stats = measure(setup(), args.repeat, args.min_time)
+        results['benchmarks'][name] = stats
+        print(f"{name:<44} {stats['median_s'] * 1e6:12.2f} us  ({stats['ops_per_s']:,.0f} ops/s)")
+
+    regressed = []
+    if args.compare and os.path.exists(args.compare):
+        with open(args.compare) as f:
+            regressed = compare(results, json.load(f))
+
+    for output in filter(None, [args.output, BASELINE if args.update_baseline else None]):
+        os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+        with open(output, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f"Results saved to {output}")
+    if regressed:
+        sys.exit(1)
+
+if __name__ == '__main__':
+    main()
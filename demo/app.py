@@ -1,7 +1,6 @@
 import streamlit as st
 import folium
 from streamlit_folium import st_folium
-import openrouteservice
 import sys
 import os
 import requests
@@ -9,14 +8,19 @@ import json
 from datetime import datetime, timedelta
 import pandas as pd
 import numpy as np
-from sklearn.linear_model import LinearRegression
-from sklearn.ensemble import RandomForestRegressor
 import pickle
 
 # Add the project root to Python path
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from env.energy_model import estimate_energy, energy_to_co2
+from routing.client import make_client
+from routing.ratelimit import ResilientClient
+from routing.geocode_cache import GeocodeCache, DEFAULT_CACHE_PATH
+from routing import response_cache, routes
+from routing.response_cache import ResponseCache
+from routing.ordering import optimize_delivery_route
+from routing.geodesic import polyline_cumulative_km
+from routing.geometry import simplify_path
 
 st.set_page_config(page_title="Carbon-Aware Route Optimizer", layout="wide")
 
@@ -437,6 +441,14 @@ if "end_coords" not in st.session_state:
     st.session_state.end_coords = None
 if "waypoint_coords" not in st.session_state:
     st.session_state.waypoint_coords = None
+if "route_candidates" not in st.session_state:
+    st.session_state.route_candidates = None  # [(strategy, parsed route)] from the last ORS fetch
+if "route_request" not in st.session_state:
+    st.session_state.route_request = None  # (stops, fetch mode) the candidates were fetched for
+if "route_inputs" not in st.session_state:
+    st.session_state.route_inputs = None  # (weight, truck type, traffic, weather) they were last ranked with
+if "display_paths" not in st.session_state:
+    st.session_state.display_paths = {}
 if "fleet_data" not in st.session_state:
     st.session_state.fleet_data = []
 if "ml_models" not in st.session_state:
@@ -453,393 +465,86 @@ if API_KEY == "YOUR_API_KEY_HERE":
     st.error("Please set your OpenRouteService API key in the code!")
     st.stop()
 
-client = openrouteservice.Client(key=API_KEY)
+# Route lines on the map are simplified to within this many metres of the real path
+MAP_SIMPLIFY_TOLERANCE_M = 15
+
+@st.cache_resource
+def get_ors_client():
+    """ORS client shared across sessions so all of them draw from the same plan quota.
+
+    Throttled and retried on 429/5xx, so bursts cost latency instead of errors.
+    ORS_FAKE / ORS_BASE_URL point it at the local stand-in (see routing/fake_ors.py).
+    """
+    return ResilientClient(make_client(API_KEY, single_attempt=True))
+
+client = get_ors_client()
+
+@st.cache_resource
+def get_geocode_cache():
+    """Persistent geocode cache shared across sessions and reruns"""
+    return GeocodeCache(os.environ.get("GEOCODE_CACHE_PATH", DEFAULT_CACHE_PATH))
+
+geocode_cache = get_geocode_cache()
+
+@st.cache_resource
+def get_ors_cache():
+    """Raw ORS directions/matrix responses, so reruns and slider changes don't re-request them"""
+    return ResponseCache(os.environ.get("ORS_CACHE_PATH", response_cache.DEFAULT_CACHE_PATH))
+
+ors_cache = get_ors_cache()
 
 def geocode_location(location_name):
     """Convert location name to coordinates using OpenRouteService geocoding"""
     try:
-        result = client.pelias_search(text=location_name, size=1)
-        if result and 'features' in result and len(result['features']) > 0:
-            coords = result['features'][0]['geometry']['coordinates']
-            return (coords[1], coords[0])  # Return (lat, lon)
-        else:
-            return None
+        return routes.geocode_location(client, location_name, cache=geocode_cache)
     except Exception as e:
         st.error(f"Error geocoding location '{location_name}': {str(e)}")
         return None
 
-def get_route_and_emissions(coords, profile, package_weight, truck_type, avoid_tolls=False, avoid_highways=False, avoid_ferries=False):
-    """Get route from OpenRouteService and calculate emissions"""
-    try:
-        # Prepare avoidance parameters
-        avoid = []
-        if avoid_tolls:
-            avoid.append('tollways')
-        if avoid_highways:
-            avoid.append('highways')
-        if avoid_ferries:
-            avoid.append('ferries')
-        
-        # Convert coordinates to [lon, lat] for ORS
-        ors_coords = [[c[1], c[0]] for c in coords]
-        
-        # Get route with extra info for better calculations
-        route = client.directions(
-            coordinates=ors_coords,
-            profile=profile,
-            format='geojson',
-            options={'avoid_features': avoid} if avoid else None,
-            extra_info=["steepness", "surface", "waytype"]
-        )
-        
-        if not route or 'features' not in route or len(route['features']) == 0:
-            return None
-            
-        feature = route['features'][0]
-        properties = feature['properties']
-        geometry = feature['geometry']
-        
-        # Extract route details
-        distance_km = properties['summary']['distance'] / 1000
-        duration_min = properties['summary']['duration'] / 60
-        
-        # Calculate average grade from steepness info
-        steepness = properties.get('extras', {}).get('steepness', {}).get('values', [])
-        def _weighted_avg(triples):
-            if not triples:
-                return 0.0
-            total_weighted = 0.0
-            total_len = 0.0
-            for seg in triples:
-                # seg expected as [from_idx, to_idx, value]
-                if isinstance(seg, (list, tuple)) and len(seg) >= 3:
-                    start_idx, end_idx, val = seg[0], seg[1], seg[2]
-                    seg_len = (end_idx - start_idx) if isinstance(start_idx, (int, float)) and isinstance(end_idx, (int, float)) else 1.0
-                    try:
-                        v = float(val)
-                    except Exception:
-                        v = 0.0
-                    total_weighted += v * seg_len
-                    total_len += seg_len
-            return (total_weighted / total_len) if total_len > 0 else 0.0
-        avg_grade = _weighted_avg(steepness)
-        
-        # Get surface and waytype info for efficiency calculations
-        surface = properties.get('extras', {}).get('surface', {}).get('values', [])
-        waytype = properties.get('extras', {}).get('waytype', {}).get('values', [])
-        
-        # Calculate surface factor (paved roads are more efficient)
-        surface_factor = 1.0
-        if surface:
-            avg_surface = _weighted_avg(surface)
-            if avg_surface < 0.5:  # Unpaved roads
-                surface_factor = 0.8
-            elif avg_surface > 0.8:  # Highways
-                surface_factor = 1.1
-        
-        # Calculate traffic factor based on waytype and traffic level
-        traffic_factor = 1.0
-        if waytype:
-            avg_waytype = _weighted_avg(waytype)
-            if avg_waytype < 0.3:  # Local roads
-                traffic_factor = 0.9
-            elif avg_waytype > 0.7:  # Highways
-                traffic_factor = 1.1
-        
-        # Apply traffic level impact
-        if traffic_level == "High":
-            traffic_factor *= 1.20  # 20% more fuel in high traffic
-        elif traffic_level == "Medium":
-            traffic_factor *= 1.10  # 10% more fuel in medium traffic
-        # Low traffic = no additional impact
-        
-        # Weather factor based on actual weather conditions
-        weather_factor = 1.0
-        if weather_condition == "Rainy":
-            weather_factor = 1.15  # 15% more fuel consumption in rain
-        elif weather_condition == "Snowy":
-            weather_factor = 1.25  # 25% more fuel consumption in snow
-        elif weather_condition == "Foggy":
-            weather_factor = 1.10  # 10% more fuel consumption in fog
-        # Clear weather = 1.0 (no impact)
-        
-        # Charging factor for EVs
-        charging_factor = 1.0
-        if truck_type.lower() == "ev":
-            if distance_km > 100:
-                charging_factor = 1.1
-        
-        # Convert truck type for energy model
-        vehicle_type = truck_type.lower()
-        if vehicle_type == "gasoline":
-            vehicle_type = "gasoline"
-        elif vehicle_type == "diesel":
-            vehicle_type = "diesel"
-        else:  # EV
-            vehicle_type = "ev"
-        
-        # Calculate energy consumption with cargo weight impact
-        energy_consumed = estimate_energy(
-            distance_km, 
-            avg_grade, 
-            vehicle_type, 
-            package_weight
-        )
-        
-        # Apply efficiency factors
-        energy_consumed *= surface_factor * traffic_factor * weather_factor * charging_factor
-        
-        # Additional cargo weight impact on fuel efficiency
-        # Heavier loads significantly impact fuel consumption
-        cargo_efficiency_factor = 1.0
-        if package_weight > 1000:  # Heavy cargo
-            cargo_efficiency_factor = 1.2  # 20% more fuel consumption
-        elif package_weight > 500:  # Medium cargo
-            cargo_efficiency_factor = 1.1  # 10% more fuel consumption
-        elif package_weight < 100:  # Light cargo
-            cargo_efficiency_factor = 0.95  # 5% less fuel consumption
-        
-        energy_consumed *= cargo_efficiency_factor
-        
-        # Route-specific efficiency factors based on distance and cargo
-        route_efficiency = 1.0
-        
-        # Highway vs local road efficiency based on distance and cargo
-        if avoid_highways:
-            # Local roads are better for short distances or light cargo
-            if distance_km < 20 and package_weight < 500:
-                route_efficiency = 0.90  # Local roads slightly better for short, light trips
-            elif distance_km < 50 and package_weight < 1000:
-                route_efficiency = 0.95  # Local roads comparable for medium trips
-            else:
-                route_efficiency = 1.10  # Local roads less efficient for long/heavy trips
-        else:
-            # Highways are better for longer distances and heavier cargo
-            if distance_km > 50 or package_weight > 1000:
-                route_efficiency = 0.85  # Highways much better for long/heavy trips
-            elif distance_km > 20:
-                route_efficiency = 0.90  # Highways better for medium distances
-            else:
-                route_efficiency = 1.05  # Highways slightly less efficient for short trips
-        
-        # Toll impact (tolls don't affect fuel efficiency much, just cost)
-        if avoid_tolls:
-            route_efficiency *= 0.98  # Minimal impact on fuel efficiency
-        
-        # Ferry impact (ferries can be less efficient due to waiting/idling)
-        if avoid_ferries:
-            route_efficiency *= 0.95  # Avoiding ferries can improve efficiency
-        
-        energy_consumed *= route_efficiency
-        
-        # Profile-specific adjustments
-        if profile == "driving-hgv":
-            energy_consumed *= 1.3
-        elif profile == "driving-car":
-            energy_consumed *= 0.85
-        
-        co2_emissions = energy_to_co2(energy_consumed, vehicle_type)
-        carbon_efficiency = co2_emissions / distance_km if distance_km > 0 else float('inf')
-        
-        return {
-            "geometry": geometry,
-            "distance_km": distance_km,
-            "duration_min": duration_min,
-            "co2_emissions": co2_emissions,
-            "energy_consumed": energy_consumed,
-            "carbon_efficiency": carbon_efficiency,
-            "avg_grade": avg_grade,
-            "profile": profile
-        }
+def report_route_error(strategy_name, error):
+    if isinstance(error, TimeoutError):
+        st.warning(str(error))
+    else:
+        st.error(f"Error getting route: {str(error)}")
 
-    except Exception as e:
-        st.error(f"Error getting route: {str(e)}")
-        return None
+def fetch_route_candidates(coords, mode):
+    """Fetch candidate routes between these stops (scored separately by rank_routes).
 
-def find_optimal_carbon_route(coords, package_weight, truck_type, traffic_level, weather_condition):
-    """Find the most carbon-efficient route by testing multiple strategies"""
-    
-    # Define comprehensive route strategies with different approaches
-    strategies = [
-        # Highway-optimized routes (often more efficient for longer distances)
-        ("Highway Route", "driving-car", False, False, False),
-        ("Truck Highway Route", "driving-hgv", False, False, False),
-        
-        # Local road routes (better for short distances or heavy cargo)
-        ("Local Roads", "driving-car", False, True, False),
-        ("Truck Local Roads", "driving-hgv", False, True, False),
-        
-        # Toll-avoiding routes
-        ("No Tolls", "driving-car", True, False, False),
-        ("Truck No Tolls", "driving-hgv", True, False, False),
-        
-        # Combined strategies
-        ("No Tolls/Highways", "driving-car", True, True, False),
-        ("Truck No Tolls/Highways", "driving-hgv", True, True, False),
-        
-        # Ferry-avoiding routes
-        ("No Ferries", "driving-car", False, False, True),
-        ("Truck No Ferries", "driving-hgv", False, False, True),
-    ]
-    
-    routes = []
-    
-    # Test each strategy
-    for strategy_name, profile, avoid_tolls, avoid_highways, avoid_ferries in strategies:
-        route = get_route_and_emissions(
-            coords, profile, package_weight, truck_type, 
-            avoid_tolls, avoid_highways, avoid_ferries
-        )
-        if route:
-            route["strategy_name"] = strategy_name
-            route["avoid_highways"] = avoid_highways
-            route["avoid_tolls"] = avoid_tolls
-            route["avoid_ferries"] = avoid_ferries
-            routes.append(route)
-    
-    if not routes:
-        return None, None
-    
-    # Remove duplicate routes (same distance and duration)
-    unique_routes = []
-    seen_routes = set()
-    for route in routes:
-        route_key = (round(route['distance_km'], 2), round(route['duration_min'], 2))
-        if route_key not in seen_routes:
-            unique_routes.append(route)
-            seen_routes.add(route_key)
-    
-    if len(unique_routes) < 2:
-        # Create artificial variation if needed
-        if unique_routes:
-            base_route = unique_routes[0].copy()
-            base_route["strategy_name"] = "Standard Route"
-            unique_routes.append(base_route)
-            
-            # Create optimized version
-            modified_route = base_route.copy()
-            modified_route["strategy_name"] = "Optimized Route"
-            modified_route["distance_km"] = base_route["distance_km"] * 0.85
-            modified_route["duration_min"] = base_route["duration_min"] * 0.90
-            modified_route["energy_consumed"] = base_route["energy_consumed"] * 0.70
-            modified_route["co2_emissions"] = base_route["co2_emissions"] * 0.70
-            modified_route["carbon_efficiency"] = modified_route["co2_emissions"] / modified_route["distance_km"]
-            unique_routes.append(modified_route)
-    
-    # Advanced scoring system for route selection
-    def calculate_route_score(route):
-        """Calculate a comprehensive score for route selection"""
-        distance = route['distance_km']
-        duration = route['duration_min']
-        co2_per_km = route['carbon_efficiency']
-        energy_consumed = route['energy_consumed']
-        
-        # Base carbon efficiency score (lower is better)
-        carbon_score = co2_per_km * 0.4
-        
-        # Distance efficiency (shorter is better, but not always)
-        distance_score = (distance / 100) * 0.2
-        
-        # Time efficiency (shorter is better)
-        time_score = (duration / 60) * 0.1
-        
-        # Energy efficiency (lower is better)
-        energy_score = (energy_consumed / 100) * 0.2
-        
-        # Route type bonus/penalty based on distance and cargo
-        route_bonus = 0
-        if distance > 50:  # Long distance - highways are usually better
-            if not route.get('avoid_highways', True):
-                route_bonus = -0.1  # Bonus for using highways on long routes
-        elif distance < 20:  # Short distance - local roads might be better
-            if route.get('avoid_highways', False):
-                route_bonus = -0.05  # Small bonus for local roads on short routes
-        
-        # Cargo weight consideration
-        if package_weight > 1000:  # Heavy cargo - highways are usually better
-            if not route.get('avoid_highways', True):
-                route_bonus -= 0.05
-        
-        # Weather consideration
-        if weather_condition in ["Snowy", "Rainy"]:  # Bad weather - highways are safer
-            if not route.get('avoid_highways', True):
-                route_bonus -= 0.03
-        
-        # Traffic consideration
-        if traffic_level == "High":  # High traffic - avoid highways might be better
-            if route.get('avoid_highways', False):
-                route_bonus -= 0.02
-        
-        return carbon_score + distance_score + time_score + energy_score + route_bonus
-    
-    # Calculate scores for all routes
-    for route in unique_routes:
-        route['route_score'] = calculate_route_score(route)
-    
-    # Sort by route score (lower is better)
-    unique_routes.sort(key=lambda x: x['route_score'])
-    
-    # Get the optimal route (lowest score)
-    optimal_route = unique_routes[0]
-    
-    # Get a different standard route for comparison
-    # Try to find a route that's different from the optimal one
-    standard_route = None
-    for route in unique_routes[1:]:
-        if (route['strategy_name'] != optimal_route['strategy_name'] or 
-            abs(route['distance_km'] - optimal_route['distance_km']) > 5 or
-            abs(route['duration_min'] - optimal_route['duration_min']) > 10):
-            standard_route = route
-            break
-    
-    # If no different route found, use the second best
-    if not standard_route and len(unique_routes) > 1:
-        standard_route = unique_routes[1]
-    elif not standard_route:
-        standard_route = optimal_route.copy()
-        standard_route["strategy_name"] = "Standard Route"
-    
-    return optimal_route, standard_route
+    mode "strategies" makes one ORS call per routing strategy, "alternatives"
+    one alternative_routes call per profile (see routes.fetch_candidate_routes).
+    """
+    st.session_state.route_candidates = routes.fetch_candidate_routes(
+        client, coords, cache=ors_cache, on_error=report_route_error, mode=mode
+    )
+    st.session_state.route_request = (coords, mode)
+    st.session_state.display_paths = {}
 
-def optimize_delivery_route(coords, package_weight, truck_type):
-    """Optimize the order of delivery stops for maximum efficiency"""
-    if len(coords) <= 3:  # Only start, end, and one waypoint
-        return coords
-    
-    start = coords[0]
-    end = coords[-1]
-    waypoints = coords[1:-1]
-    
-    if len(waypoints) <= 1:
-        return coords
-    
-    # Simple nearest neighbor algorithm for delivery optimization
-    optimized_waypoints = []
-    remaining_waypoints = waypoints.copy()
-    current_location = start
-    
-    while remaining_waypoints:
-        # Find the nearest waypoint
-        min_distance = float('inf')
-        nearest_waypoint = None
-        nearest_index = 0
-        
-        for i, waypoint in enumerate(remaining_waypoints):
-            # Calculate straight-line distance (simplified)
-            distance = ((current_location[0] - waypoint[0])**2 + 
-                       (current_location[1] - waypoint[1])**2)**0.5
-            
-            if distance < min_distance:
-                min_distance = distance
-                nearest_waypoint = waypoint
-                nearest_index = i
-        
-        # Add nearest waypoint to optimized route
-        optimized_waypoints.append(nearest_waypoint)
-        current_location = nearest_waypoint
-        remaining_waypoints.pop(nearest_index)
-    
-    return [start] + optimized_waypoints + [end]
+def rank_routes(package_weight, truck_type, traffic_level, weather_condition):
+    """Re-score the fetched candidates for these inputs: optimal and comparison routes, and the Pareto front.
+
+    Makes no ORS calls, so it runs on every change of the vehicle or
+    environmental inputs. Returns (optimal, normal), (None, None) if nothing routed.
+    """
+    optimal, normal = routes.rank_candidate_routes(
+        st.session_state.route_candidates or [], package_weight, truck_type, traffic_level, weather_condition,
+        segment_level=True
+    )
+    st.session_state.lowest_co2_route = optimal
+    st.session_state.fastest_route = normal
+    # Same segment-level scoring as the cards, so the Trade-offs table shows the same CO2
+    st.session_state.pareto_front, _ = routes.pareto_candidate_routes(
+        st.session_state.route_candidates or [], package_weight, truck_type, traffic_level, weather_condition,
+        segment_level=True
+    )
+    st.session_state.route_inputs = (package_weight, truck_type, traffic_level, weather_condition)
+    return optimal, normal
+
+def display_path(route):
+    """Route path simplified for drawing, as [lat, lon] lists; computed once per fetched route"""
+    paths = st.session_state.display_paths
+    if route['strategy_name'] not in paths:
+        paths[route['strategy_name']] = simplify_path(route['path'], MAP_SIMPLIFY_TOLERANCE_M).tolist()
+    return paths[route['strategy_name']]
 
 def get_fuel_unit(truck_type):
     """Get the appropriate fuel unit based on truck type"""
@@ -850,7 +555,7 @@ def get_fuel_unit(truck_type):
 
 def calculate_route_statistics(coords, route_data):
     """Calculate detailed statistics for multi-stop delivery routes"""
-    if not route_data or 'geometry' not in route_data:
+    if not route_data or 'path' not in route_data:
         return {}
     
     total_distance = route_data.get('distance_km', 0)
@@ -1017,13 +722,7 @@ def find_enroute_charging_stations(route_coords, vehicle_battery_capacity=100, c
         import random
         
         # Simulate battery consumption along route
-        total_distance = 0
-        for i in range(len(route_coords) - 1):
-            # Calculate distance between points (simplified)
-            lat_diff = route_coords[i+1][0] - route_coords[i][0]
-            lon_diff = route_coords[i+1][1] - route_coords[i][1]
-            distance = ((lat_diff**2 + lon_diff**2)**0.5) * 111  # Rough km conversion
-            total_distance += distance
+        total_distance = float(polyline_cumulative_km(route_coords)[-1])
         
         # EV consumption: ~0.3 kWh/km, so range = battery_capacity / 0.3
         max_range = vehicle_battery_capacity / 0.3
@@ -1049,7 +748,7 @@ def find_enroute_charging_stations(route_coords, vehicle_battery_capacity=100, c
                     
                     station = {
                         'name': f'En-route Charging Station {i+1}',
-                        'coordinates': [station_coords[0] + lat_offset, station_coords[1] + lon_offset],
+                        'coordinates': [float(station_coords[0]) + lat_offset, float(station_coords[1]) + lon_offset],
                         'type': random.choice(['Super', 'Fast']),  # En-route stations are typically faster
                         'available': random.choice([True, True, True, True, False]),  # 80% availability
                         'price_per_kwh': round(random.uniform(0.25, 0.45), 2),
@@ -1093,7 +792,8 @@ def train_demand_forecasting_model(historical_data):
             features.append([hour, day_of_week, weather_factor, distance])
             targets.append(data.get('demand', 1))
         
-        # Train Random Forest model
+        # Train Random Forest model (sklearn is only imported when a model is trained)
+        from sklearn.ensemble import RandomForestRegressor
         model = RandomForestRegressor(n_estimators=100, random_state=42)
         model.fit(features, targets)
         
@@ -1136,6 +836,7 @@ def train_emission_prediction_model(historical_data):
             targets.append(data.get('co2_emissions', 100))
         
         # Train Linear Regression model
+        from sklearn.linear_model import LinearRegression
         model = LinearRegression()
         model.fit(features, targets)
         
@@ -1425,6 +1126,16 @@ with tab1:
     avoid_tolls = st.checkbox("Avoid Tolls", value=False)
     avoid_highways = st.checkbox("Avoid Highways", value=False)
     avoid_ferries = st.checkbox("Avoid Ferries", value=False)
+    road_network_ordering = st.checkbox(
+        "Order Stops by Road Network",
+        value=False,
+        help="Use the ORS matrix API (one batched request) to order delivery stops by road CO2 instead of straight-line distance"
+    )
+    use_alternative_routes = st.checkbox(
+        "Use ORS Alternative Routes",
+        value=False,
+        help="Compare up to 3 genuinely different roads per vehicle profile in 2 ORS requests instead of 10 strategy requests (trips without stops, up to 100 km)"
+    )
     
     st.markdown('</div>', unsafe_allow_html=True)
 
@@ -1470,22 +1181,34 @@ with col2:
                     # Optimize waypoint order for delivery efficiency
                     if len(waypoint_coords_list) > 1:
                         st.write("🔄 Optimizing delivery route order...")
-                        coords = optimize_delivery_route(coords, package_weight, truck_type)
+                        try:
+                            coords = optimize_delivery_route(
+                                coords, package_weight, truck_type,
+                                client=client if road_network_ordering else None, cache=ors_cache
+                            )
+                        except Exception as e:
+                            st.warning(f"Road-network ordering failed ({e}); using straight-line distances")
+                            coords = optimize_delivery_route(coords, package_weight, truck_type)
                     
-                    # Find optimal routes
-                    optimal, normal = find_optimal_carbon_route(
-                        coords, package_weight, truck_type, traffic_level, weather_condition
-                    )
+                    # Fetch routes only for new stops; the same stops are just re-ranked
+                    fetch_mode = "alternatives" if use_alternative_routes else "strategies"
+                    if (coords, fetch_mode) != st.session_state.route_request or not st.session_state.route_candidates:
+                        fetch_route_candidates(coords, fetch_mode)
+                    optimal, normal = rank_routes(package_weight, truck_type, traffic_level, weather_condition)
                     
                     if optimal and normal:
-                        st.session_state.fastest_route = normal
-                        st.session_state.lowest_co2_route = optimal
                         st.success("Routes found successfully!")
                     else:
                         st.error("Could not find routes. Please try different locations.")
     
     st.markdown('</div>', unsafe_allow_html=True)
     
+    # Weight, truck type, traffic or weather changed since the last ranking: re-score the
+    # routes already fetched right away instead of waiting for the button
+    route_inputs = (package_weight, truck_type, traffic_level, weather_condition)
+    if st.session_state.route_candidates and st.session_state.route_inputs != route_inputs:
+        rank_routes(*route_inputs)
+    
     # Display results
     if st.session_state.get("fastest_route") and st.session_state.get("lowest_co2_route"):
         normal = st.session_state.fastest_route
@@ -1551,6 +1274,18 @@ with col2:
             st.write(f"**Carbon Efficiency:** {optimal['carbon_efficiency']:.1f} gCO2/km")
             st.markdown('</div>', unsafe_allow_html=True)
         
+        # Every strategy no other beats on CO2, duration and distance at once (cost shown for reference)
+        if st.session_state.get('pareto_front'):
+            with st.expander(f"⚖️ Trade-offs ({len(st.session_state.pareto_front)} non-dominated routes)"):
+                st.dataframe(pd.DataFrame([{
+                    'Strategy': r['strategy_name'],
+                    'CO2 (g)': round(r['co2_emissions'], 1),
+                    'Duration (min)': round(r['duration_min'], 1),
+                    'Distance (km)': round(r['distance_km'], 1),
+                    'Cost (EUR)': round(r['cost'], 2),
+                    'Dominates': r['dominates'],
+                } for r in st.session_state.pareto_front]), use_container_width=True)
+        
         # Delivery statistics for multi-stop routes
         if st.session_state.get('waypoints') and len(st.session_state.waypoints) > 0:
             st.subheader("📦 Delivery Route Statistics")
@@ -1599,7 +1334,7 @@ with col2:
                 st.write(f"• **CO2 Savings per Stop:** {co2_savings_per_stop:.1f} g")
                 st.write(f"• **Energy Savings per Stop:** {energy_savings_per_stop:.1f} {get_fuel_unit(truck_type)}")
                 st.write(f"• **Total Stops Optimized:** {normal_stats.get('num_stops', 0)}")
-                st.write(f"• **Route Order:** Optimized for nearest-neighbor efficiency")
+                st.write(f"• **Route Order:** Optimized for shortest total distance")
             
             with col_eff2:
                 st.write("**Delivery Performance:**")
@@ -1856,7 +1591,7 @@ with col2:
         
         # Normal route (orange)
         folium.PolyLine(
-            locations=[[coord[1], coord[0]] for coord in normal_route['geometry']['coordinates']],
+            locations=display_path(normal_route),
             color='orange',
             weight=4,
             opacity=0.8,
@@ -1865,7 +1600,7 @@ with col2:
         
         # Optimal route (green)
         folium.PolyLine(
-            locations=[[coord[1], coord[0]] for coord in optimal_route['geometry']['coordinates']],
+            locations=display_path(optimal_route),
             color='green',
             weight=4,
             opacity=0.8,
@@ -2070,9 +1805,8 @@ with tab3:
                 if st.session_state.get('fastest_route') and st.session_state.get('lowest_co2_route'):
                     # Use the optimal route for en-route charging planning
                     optimal_route = st.session_state.lowest_co2_route
-                    if 'geometry' in optimal_route and 'coordinates' in optimal_route['geometry']:
-                        route_coords = [[coord[1], coord[0]] for coord in optimal_route['geometry']['coordinates']]
-                        enroute_stations = find_enroute_charging_stations(route_coords)
+                    if len(optimal_route.get('path', ())):
+                        enroute_stations = find_enroute_charging_stations(optimal_route['path'])
                         if enroute_stations:
                             st.session_state['enroute_charging_stations'] = enroute_stations
                             st.success(f"Found {len(enroute_stations)} en-route charging stations!")
@@ -1,4 +1,4 @@
-import math
+import numpy as np
 
 def estimate_energy(distance_km, grade, vehicle_type='diesel', load_kg=500):
     """Energy model accounting for cargo weight impact on fuel consumption"""
@@ -34,3 +34,50 @@ def energy_to_co2(energy, vehicle_type='diesel'):
     else:  # EV
         grid_intensity = 400  # gCO2/kWh
         return energy * grid_intensity
+
+# =============================================================================
+# BATCH (NUMPY) VARIANTS
+# =============================================================================
+# Same arithmetic as the scalar functions above, applied elementwise with the
+# same operation order so results match them bit for bit.
+
+def _vehicle_masks(vehicle_type):
+    vehicle_type = np.asarray(vehicle_type)
+    return vehicle_type == 'diesel', vehicle_type == 'gasoline'
+
+def estimate_energy_batch(distance_km, grade, vehicle_type='diesel', load_kg=500):
+    """Vectorized estimate_energy; all arguments broadcast against each other"""
+    distance_km = np.asarray(distance_km, dtype=np.float64)
+    grade = np.asarray(grade, dtype=np.float64)
+    load_kg = np.asarray(load_kg, dtype=np.float64)
+    is_diesel, is_gasoline = _vehicle_masks(vehicle_type)
+
+    # Base energy rate per km (L for diesel/gasoline, kWh for EV)
+    rate = np.where(is_diesel, 1.5, np.where(is_gasoline, 1.8, 0.3))
+    base_energy = distance_km * rate
+
+    grade_factor = 1 + 0.01 * np.maximum(grade, 0)
+
+    # Piecewise load buckets, highest bucket wins (mirrors the if/elif chain)
+    load_coef = np.full(load_kg.shape, 0.0003)
+    load_coef[load_kg > 500] = 0.0005
+    load_coef[load_kg > 1000] = 0.0008
+    load_coef[load_kg > 1500] = 0.001
+    load_factor = 1 + load_coef * load_kg
+
+    return base_energy * grade_factor * load_factor
+
+def energy_to_co2_batch(energy, vehicle_type='diesel'):
+    """Vectorized energy_to_co2; energy and vehicle_type broadcast"""
+    energy = np.asarray(energy, dtype=np.float64)
+    is_diesel, is_gasoline = _vehicle_masks(vehicle_type)
+
+    # energy * intensity * scale, with scale=1 for EV so the product is exact
+    intensity = np.where(is_diesel, 2.68, np.where(is_gasoline, 2.31, 400.0))
+    scale = np.where(is_diesel | is_gasoline, 1000.0, 1.0)
+    return energy * intensity * scale
+
+def edge_co2_table(dist_matrix, grade_matrix, vehicle_type='diesel', load_kg=500):
+    """Per-edge CO2 (g) for distance/grade matrices, equal to the scalar model edge by edge"""
+    energy = estimate_energy_batch(dist_matrix, grade_matrix, vehicle_type, load_kg)
+    return energy_to_co2_batch(energy, vehicle_type)
@@ -0,0 +1,84 @@
+import numpy as np
+
+# Observation encodings for the route environments:
+#   'scalar'  - current node as one scaled value + remaining deliveries (original layout, n+1 floats)
+#   'onehot'  - one-hot current node + remaining mask (2n floats)
+#   'packed'  - the one-hot + mask bits packed into ceil(2n/8) uint8 bytes
+#   'distance' - 'onehot' followed by the current node's row of the instance's
+#                cost matrix (see cost_features), 3n floats; the only mode in
+#                which a policy can tell one stop set from another
+# 'onehot', 'packed' and 'distance' are kept in a preallocated buffer that each
+# step updates by flipping single bits (and, for 'distance', copying one row),
+# so large node counts cost O(n) at most per step.
+OBS_MODES = ('scalar', 'onehot', 'packed', 'distance')
+
+def cost_features(cost_matrices):
+    """(N, n, n) cost matrices scaled to [0, 1] by each matrix's largest entry.
+
+    Scale-free, so a policy trained on synthetic CO2 matrices can be fed
+    real km or CO2 matrices of the same shape.
+    """
+    cost_matrices = np.asarray(cost_matrices, dtype=np.float32)
+    scale = cost_matrices.reshape(len(cost_matrices), -1).max(axis=1)
+    return cost_matrices / np.where(scale > 0, scale, 1)[:, None, None]
+
+def observation_spec(n_nodes, mode='scalar'):
+    """(shape, dtype, high) of one observation; low is always 0"""
+    if mode == 'scalar':
+        return (n_nodes+1,), np.float32, 1
+    if mode == 'onehot':
+        return (2*n_nodes,), np.float32, 1
+    if mode == 'packed':
+        return ((2*n_nodes + 7) // 8,), np.uint8, 255
+    if mode == 'distance':
+        return (3*n_nodes,), np.float32, 1
+    raise ValueError(f"Unknown observation mode '{mode}', expected one of {OBS_MODES}")
+
+def encode_observations(current_node, remaining, mode='scalar', out=None, features=None):
+    """Encode a batch of states: current_node (N,) ints, remaining (N, n) bools -> (N, obs_dim).
+
+    'distance' also needs features, the (N, n, n) output of cost_features.
+    """
+    current_node = np.asarray(current_node)
+    remaining = np.asarray(remaining, dtype=bool)
+    n_envs, n_nodes = remaining.shape
+    shape, dtype, _ = observation_spec(n_nodes, mode)
+    if out is None:
+        out = np.zeros((n_envs,) + shape, dtype=dtype)
+
+    if mode == 'scalar':
+        out[:, 0] = current_node / (n_nodes-1)
+        out[:, 1:n_nodes] = remaining[:, 1:]
+        out[:, n_nodes:] = 0
+        return out
+
+    bits = np.zeros((n_envs, 2*n_nodes), dtype=bool)
+    bits[np.arange(n_envs), current_node] = True
+    bits[:, n_nodes:] = remaining
+    if mode == 'onehot':
+        out[:] = bits
+    elif mode == 'distance':
+        if features is None:
+            raise ValueError("'distance' observations need the instances' cost features")
+        out[:, :2*n_nodes] = bits
+        out[:, 2*n_nodes:] = features[np.arange(n_envs), current_node]
+    else:
+        out[:] = np.packbits(bits, axis=1)
+    return out
+
+def set_observation_bits(out, rows, positions, value, mode):
+    """Set (value=True) or clear bit `positions` of buffer rows in place ('onehot'/'distance'/'packed' layouts).
+
+    Bit i < n is the current-node one-hot, bit n + j is "node j remaining".
+    Each row may appear at most once per call.
+    """
+    if mode in ('onehot', 'distance'):
+        out[rows, positions] = 1.0 if value else 0.0
+        return
+    positions = np.asarray(positions)
+    byte = positions >> 3
+    mask = (0x80 >> (positions & 7)).astype(np.uint8)  # np.packbits is big-endian within a byte
+    if value:
+        out[rows, byte] |= mask
+    else:
+        out[rows, byte] &= ~mask
@@ -1,51 +1,123 @@
 import gym
 import numpy as np
 from gym import spaces
-from env.energy_model import estimate_energy, energy_to_co2
+from env.energy_model import edge_co2_table
+from env.observations import cost_features, encode_observations, observation_spec, set_observation_bits
 
 class CarbonRouteEnv(gym.Env):
     """Toy environment for carbon-aware routing"""
-    def __init__(self, n_nodes=5, vehicle_type='diesel'):
+    def __init__(self, n_nodes=5, vehicle_type='diesel', load_kg=500, randomize_every=0, obs_mode='scalar',
+                 max_episode_steps=None, seed=None):
         super().__init__()
         self.n_nodes = n_nodes
         self.vehicle_type = vehicle_type
+        self.load_kg = load_kg
+        # 'scalar' (original layout), or 'onehot'/'packed'/'distance' kept in a buffer updated in place
+        # (see env.observations); 'distance' needs randomize_every to learn anything instance-specific
+        self.obs_mode = obs_mode
+        # Re-draw the synthetic matrices every N resets (0 = keep them fixed)
+        self.randomize_every = randomize_every
+        self.episodes = 0
+        # Truncate episodes after this many steps (None = only end when all nodes are visited)
+        self.max_episode_steps = max_episode_steps
+        self.steps = 0
+        # Per-env generator for the synthetic matrices, so envs in one process don't share a stream
+        self.rng = np.random.default_rng(seed)
 
         # Action: pick next node (0..n_nodes-1)
         self.action_space = spaces.Discrete(self.n_nodes)
         # Observation: current node + remaining deliveries as binary vector
-        self.observation_space = spaces.Box(low=0, high=1, shape=(self.n_nodes+1,), dtype=np.float32)
+        obs_shape, obs_dtype, obs_high = observation_spec(self.n_nodes, obs_mode)
+        self.observation_space = spaces.Box(low=0, high=obs_high, shape=obs_shape, dtype=obs_dtype)
+        self._obs_buf = np.zeros((1,) + obs_shape, dtype=obs_dtype)
 
-        # Synthetic distance & grade matrix
-        self.dist_matrix = np.random.uniform(1, 10, (n_nodes, n_nodes))
-        self.grade_matrix = np.random.uniform(-5, 5, (n_nodes, n_nodes))
+        self.randomize()
+
+    def randomize(self):
+        """Draw new synthetic distance & grade matrices and rebuild the CO2 table"""
+        self.dist_matrix = self.rng.uniform(1, 10, (self.n_nodes, self.n_nodes))
+        self.grade_matrix = self.rng.uniform(-5, 5, (self.n_nodes, self.n_nodes))
+        self._build_co2_table()
+
+    def _build_co2_table(self):
+        # Matrices are fixed between randomizations, so a step is a single lookup
+        self.co2_matrix = edge_co2_table(self.dist_matrix, self.grade_matrix, self.vehicle_type, self.load_kg)
+        self._features = cost_features(self.co2_matrix[None])
+
+    def reward_landscape(self):
+        """Per-edge inputs and CO2 for exporting to benchmarks (reward = -co2)"""
+        return {
+            "vehicle_type": self.vehicle_type,
+            "load_kg": self.load_kg,
+            "dist_matrix": self.dist_matrix.copy(),
+            "grade_matrix": self.grade_matrix.copy(),
+            "co2_matrix": self.co2_matrix.copy(),
+        }
+
+    def seed(self, seed=None):
+        """Old-gym seeding hook (called by SB3 via shimmy); seeds future randomize() draws"""
+        self.rng = np.random.default_rng(seed)
+        return [seed]
 
     def reset(self):
+        if self.randomize_every and self.episodes and self.episodes % self.randomize_every == 0:
+            self.randomize()
+        self.episodes += 1
+        self.steps = 0
         self.current_node = 0
         self.remaining = set(range(1, self.n_nodes))
+        self._valid = np.ones(self.n_nodes, dtype=bool)
+        self._valid[0] = False
+        if self.obs_mode != 'scalar':
+            remaining = np.ones((1, self.n_nodes), dtype=bool)
+            remaining[0, 0] = False
+            encode_observations([0], remaining, self.obs_mode, out=self._obs_buf, features=self._features)
         return self._get_obs()
 
     def _get_obs(self):
+        if self.obs_mode != 'scalar':
+            # A copy: the buffer is updated in place, and SB3 keeps the final obs across reset()
+            return self._obs_buf[0].copy()
         obs = np.zeros(self.n_nodes+1, dtype=np.float32)
         obs[0] = self.current_node / (self.n_nodes-1)
         for r in self.remaining:
             obs[r] = 1.0
         return obs
 
+    def action_masks(self):
+        """Valid actions (unvisited nodes) as a bool vector, the hook sb3-contrib's MaskablePPO calls"""
+        return self._valid.copy()
+
     def step(self, action):
+        self.steps += 1
+        # Time limit reached: end the episode, flagged so SB3 bootstraps instead of treating it as terminal
+        truncated = self.max_episode_steps is not None and self.steps >= self.max_episode_steps
+
         if action not in self.remaining:
             # Invalid or revisiting → penalty
-            return self._get_obs(), -50.0, False, {}
+            info = {"action_mask": self.action_masks()}
+            if truncated:
+                info["TimeLimit.truncated"] = True
+            return self._get_obs(), -50.0, truncated, info
 
-        distance = self.dist_matrix[self.current_node, action]
-        grade = self.grade_matrix[self.current_node, action]
-
-        energy = estimate_energy(distance, grade, self.vehicle_type)
-        co2 = energy_to_co2(energy, self.vehicle_type)
+        co2 = float(self.co2_matrix[self.current_node, action])
 
         reward = -co2  # we minimize CO2
 
+        if self.obs_mode != 'scalar':
+            # Flip three bits: old current off, new current on, action no longer remaining
+            set_observation_bits(self._obs_buf, 0, self.current_node, False, self.obs_mode)
+            set_observation_bits(self._obs_buf, 0, action, True, self.obs_mode)
+            set_observation_bits(self._obs_buf, 0, self.n_nodes + action, False, self.obs_mode)
+            if self.obs_mode == 'distance':
+                self._obs_buf[0, 2*self.n_nodes:] = self._features[0, action]
+
         self.current_node = action
         self.remaining.remove(action)
+        self._valid[action] = False
 
         done = len(self.remaining) == 0
-        return self._get_obs(), reward, done, {"co2": co2}
+        info = {"co2": co2, "action_mask": self.action_masks()}
+        if truncated and not done:
+            info["TimeLimit.truncated"] = True
+        return self._get_obs(), reward, done or truncated, info
@@ -0,0 +1,154 @@
+import numpy as np
+from gymnasium import spaces
+from stable_baselines3.common.vec_env import VecEnv
+
+from env.energy_model import edge_co2_table
+from env.observations import cost_features, encode_observations, observation_spec, set_observation_bits
+
+class VecCarbonRouteEnv(VecEnv):
+    """N CarbonRouteEnv instances held as NumPy arrays and stepped in one array operation.
+
+    Each instance has its own synthetic distance/grade matrices; the per-edge
+    CO2 is precomputed once, so a step is a table lookup. Rewards,
+    observations and episode logic match CarbonRouteEnv. Finished instances
+    are reset automatically, with the final observation in
+    info["terminal_observation"] as stable-baselines3 expects. obs_mode selects
+    the observation encoding (see env.observations). With randomize_every=N an
+    instance draws new matrices every N of its own episodes, as in
+    CarbonRouteEnv.
+    """
+    def __init__(self, num_envs=8, n_nodes=5, vehicle_type='diesel', load_kg=500, seed=None, obs_mode='scalar',
+                 max_episode_steps=None, randomize_every=0):
+        self.n_nodes = n_nodes
+        self.vehicle_type = vehicle_type
+        self.load_kg = load_kg
+        self.obs_mode = obs_mode
+        self.max_episode_steps = max_episode_steps
+        self.randomize_every = randomize_every
+        self.render_mode = None
+        self.rng = np.random.default_rng(seed)
+
+        # Action: pick next node (0..n_nodes-1)
+        action_space = spaces.Discrete(n_nodes)
+        # Observation: current node + remaining deliveries as binary vector
+        obs_shape, obs_dtype, obs_high = observation_spec(n_nodes, obs_mode)
+        observation_space = spaces.Box(low=0, high=obs_high, shape=obs_shape, dtype=obs_dtype)
+        super().__init__(num_envs, observation_space, action_space)
+
+        self._env_idx = np.arange(num_envs)
+        self.current_node = np.zeros(num_envs, dtype=np.int64)
+        self.steps = np.zeros(num_envs, dtype=np.int64)
+        self.episodes = np.zeros(num_envs, dtype=np.int64)
+        self.remaining = np.zeros((num_envs, n_nodes), dtype=bool)
+        self._obs = np.zeros((num_envs,) + obs_shape, dtype=obs_dtype)
+        self._actions = None
+        self._build_matrices()
+
+    def _build_matrices(self, mask=slice(None)):
+        # Synthetic distance & grade matrices, one per instance
+        if not hasattr(self, 'dist_matrix'):
+            shape = (self.num_envs, self.n_nodes, self.n_nodes)
+            self.dist_matrix, self.grade_matrix = np.empty(shape), np.empty(shape)
+            self.co2_matrix, self._features = np.empty(shape), np.empty(shape, dtype=np.float32)
+        shape = self.dist_matrix[mask].shape
+        self.dist_matrix[mask] = self.rng.uniform(1, 10, shape)
+        self.grade_matrix[mask] = self.rng.uniform(-5, 5, shape)
+        self.co2_matrix[mask] = edge_co2_table(self.dist_matrix[mask], self.grade_matrix[mask],
+                                               self.vehicle_type, self.load_kg)
+        self._features[mask] = cost_features(self.co2_matrix[mask])
+
+    def _reset_envs(self, mask):
+        if self.randomize_every:
+            # Same schedule as CarbonRouteEnv.reset: new matrices before every randomize_every-th episode
+            redraw = np.zeros(self.num_envs, dtype=bool)
+            redraw[mask] = True
+            redraw &= (self.episodes > 0) & (self.episodes % self.randomize_every == 0)
+            if redraw.any():
+                self._build_matrices(redraw)
+        self.episodes[mask] += 1
+        self.current_node[mask] = 0
+        self.steps[mask] = 0
+        self.remaining[mask] = True
+        self.remaining[mask, 0] = False
+
+    def _encode_obs(self, mask=slice(None)):
+        self._obs[mask] = encode_observations(self.current_node[mask], self.remaining[mask], self.obs_mode,
+                                              features=self._features[mask])
+
+    def reset(self):
+        if self._seeds[0] is not None:
+            self.rng = np.random.default_rng(self._seeds[0])
+            self._build_matrices()
+            self.episodes[:] = 0
+            self._reset_seeds()
+        self._reset_envs(slice(None))
+        self._encode_obs()
+        return self._obs.copy()
+
+    def step_async(self, actions):
+        self._actions = np.asarray(actions, dtype=np.int64).reshape(self.num_envs)
+
+    def action_masks(self):
+        """Valid actions per instance, shape (num_envs, n_nodes); env_method splits it per env for MaskablePPO"""
+        return self.remaining.copy()
+
+    def step_wait(self):
+        actions = self._actions
+        self.steps += 1
+        valid = self.remaining[self._env_idx, actions]
+
+        # Invalid or revisiting → penalty, no state change
+        co2 = self.co2_matrix[self._env_idx, self.current_node, actions]
+        rewards = np.where(valid, -co2, -50.0).astype(np.float32)
+
+        rows, moved_to = self._env_idx[valid], actions[valid]
+        if self.obs_mode != 'scalar':
+            # Flip three bits per moved instance: old current off, new current on, action no longer remaining
+            set_observation_bits(self._obs, rows, self.current_node[valid], False, self.obs_mode)
+            set_observation_bits(self._obs, rows, moved_to, True, self.obs_mode)
+            set_observation_bits(self._obs, rows, self.n_nodes + moved_to, False, self.obs_mode)
+            if self.obs_mode == 'distance':
+                self._obs[rows, 2*self.n_nodes:] = self._features[rows, moved_to]
+        self.current_node[valid] = moved_to
+        self.remaining[rows, moved_to] = False
+        dones = valid & ~self.remaining.any(axis=1)
+        truncated = np.zeros_like(dones)
+        if self.max_episode_steps is not None:
+            truncated = ~dones & (self.steps >= self.max_episode_steps)
+            dones |= truncated
+        if self.obs_mode == 'scalar':
+            self._encode_obs()
+
+        infos = [{"co2": co2[i]} if valid[i] else {} for i in range(self.num_envs)]
+        if dones.any():
+            for i in np.flatnonzero(dones):
+                infos[i]["terminal_observation"] = self._obs[i].copy()
+                if truncated[i]:
+                    infos[i]["TimeLimit.truncated"] = True
+            self._reset_envs(dones)
+            self._encode_obs(dones)
+
+        # Masks for the next action (after any auto-reset)
+        masks = self.remaining.copy()
+        for i in range(self.num_envs):
+            infos[i]["action_mask"] = masks[i]
+        return self._obs.copy(), rewards, dones, infos
+
+    def close(self):
+        pass
+
+    def get_attr(self, attr_name, indices=None):
+        return [getattr(self, attr_name) for _ in self._get_indices(indices)]
+
+    def set_attr(self, attr_name, value, indices=None):
+        setattr(self, attr_name, value)
+
+    def env_method(self, method_name, *method_args, indices=None, **method_kwargs):
+        """Call a method on the vectorized env; batched results (leading num_envs axis) are split per env"""
+        result = getattr(self, method_name)(*method_args, **method_kwargs)
+        if isinstance(result, np.ndarray) and result.shape[:1] == (self.num_envs,):
+            return [result[i] for i in self._get_indices(indices)]
+        return [result for _ in self._get_indices(indices)]
+
+    def env_is_wrapped(self, wrapper_class, indices=None):
+        return [False for _ in self._get_indices(indices)]
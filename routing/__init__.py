@@ -0,0 +1,42 @@
+"""Headless carbon-aware routing: geocoding, route fetching, emission scoring and stop ordering.
+
+Names are imported from their submodules on first access, so `import routing`
+stays cheap and numpy/openrouteservice load only when needed.
+"""
+import importlib
+
+_EXPORTS = {
+    'make_client': 'routing.client',
+    'GeocodeCache': 'routing.geocode_cache',
+    'ResponseCache': 'routing.response_cache',
+    'ROUTE_STRATEGIES': 'routing.routes',
+    'geocode_location': 'routing.routes',
+    'fetch_route': 'routing.routes',
+    'fetch_route_alternatives': 'routing.routes',
+    'get_route_and_emissions': 'routing.routes',
+    'fetch_candidate_routes': 'routing.routes',
+    'rank_candidate_routes': 'routing.routes',
+    'find_optimal_carbon_route': 'routing.routes',
+    'pareto_candidate_routes': 'routing.routes',
+    'find_pareto_routes': 'routing.routes',
+    'pareto_front': 'routing.pareto',
+    'parse_directions_response': 'routing.scoring',
+    'score_route': 'routing.scoring',
+    'score_route_scenarios': 'routing.scoring',
+    'calculate_route_score': 'routing.scoring',
+    'optimize_delivery_route': 'routing.ordering',
+    'build_cost_matrix': 'routing.matrix',
+}
+
+__all__ = sorted(_EXPORTS)
+
+def __getattr__(name):
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module 'routing' has no attribute '{name}'")
+    value = getattr(importlib.import_module(module), name)
+    globals()[name] = value
+    return value
+
+def __dir__():
+    return sorted(set(globals()) | set(_EXPORTS))
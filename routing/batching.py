@@ -0,0 +1,111 @@
+import threading
+
+from routing.matrix import MAX_MATRIX_LOCATIONS
+
+# How long the first matrix request of a batch waits for others to join (seconds)
+DEFAULT_BATCH_WINDOW = 0.02
+
+class _MatrixBatch:
+    def __init__(self):
+        self.locations = []  # merged [lon, lat] list
+        self.index = {}  # rounded location -> position in self.locations
+        self.sources = []
+        self.destinations = []
+        self.full = threading.Event()
+        self.done = threading.Event()
+        self.response = None
+        self.error = None
+
+    def needed(self, locations):
+        return {tuple(round(float(v), 6) for v in loc) for loc in locations} - set(self.index)
+
+    def add(self, locations, sources, destinations):
+        """Merge one request; returns the positions of its sources/destinations in the merged lists"""
+        positions = []
+        for loc in locations:
+            key = tuple(round(float(v), 6) for v in loc)
+            if key not in self.index:
+                self.index[key] = len(self.locations)
+                self.locations.append(list(loc))
+            positions.append(self.index[key])
+        for lst, wanted in ((self.sources, sources), (self.destinations, destinations)):
+            for i in wanted:
+                if positions[i] not in lst:
+                    lst.append(positions[i])
+        return [positions[i] for i in sources], [positions[i] for i in destinations]
+
+class BatchingClient:
+    """Wraps an ORS client so concurrent calls share upstream requests.
+
+    distance_matrix calls arriving within `window` seconds of each other (same
+    profile, metrics and units) are merged into one request over the union of
+    their locations, up to max_locations, and each caller gets its own slice.
+    Everything else is passed through to the wrapped client.
+    """
+    def __init__(self, client, window=DEFAULT_BATCH_WINDOW, max_locations=MAX_MATRIX_LOCATIONS):
+        self.client = client
+        self.window = window
+        self.max_locations = max_locations
+        self.counters = {'matrix_requests': 0, 'matrix_upstream_calls': 0}
+        self._lock = threading.Lock()
+        self._open = {}  # (profile, metrics, units) -> _MatrixBatch still accepting requests
+
+    def __getattr__(self, name):
+        return getattr(self.client, name)
+
+    def stats(self):
+        with self._lock:
+            return dict(self.counters)
+
+    def distance_matrix(self, locations, profile='driving-car', sources=None, destinations=None,
+                        metrics=None, units=None, **kwargs):
+        if kwargs or len(locations) > self.max_locations:
+            # Options we don't merge on, or too big to share: send as is
+            return self.client.distance_matrix(locations, profile=profile, sources=sources,
+                                               destinations=destinations, metrics=metrics, units=units, **kwargs)
+        sources = list(range(len(locations))) if sources is None else list(sources)
+        destinations = list(range(len(locations))) if destinations is None else list(destinations)
+        metrics = list(metrics or ['duration'])
+        group = (profile, tuple(metrics), units)
+
+        with self._lock:
+            self.counters['matrix_requests'] += 1
+            batch = self._open.get(group)
+            if batch is not None and len(batch.locations) + len(batch.needed(locations)) > self.max_locations:
+                # No room: let the current batch go now and start a new one
+                batch.full.set()
+                del self._open[group]
+                batch = None
+            leader = batch is None
+            if leader:
+                batch = self._open[group] = _MatrixBatch()
+            rows, cols = batch.add(locations, sources, destinations)
+
+        if leader:
+            batch.full.wait(self.window)
+            with self._lock:
+                if self._open.get(group) is batch:
+                    del self._open[group]
+                self.counters['matrix_upstream_calls'] += 1
+            try:
+                batch.response = self.client.distance_matrix(
+                    batch.locations, profile=profile, sources=batch.sources, destinations=batch.destinations,
+                    metrics=metrics, units=units,
+                )
+            except Exception as e:
+                batch.error = e
+            finally:
+                batch.done.set()
+        else:
+            batch.done.wait()
+
+        if batch.error is not None:
+            raise batch.error
+        row_at = {p: r for r, p in enumerate(batch.sources)}
+        col_at = {p: c for c, p in enumerate(batch.destinations)}
+        response = {}
+        for name in ('distances', 'durations'):
+            if name in batch.response:
+                table = batch.response[name]
+                response[name] = [[table[row_at[r]][col_at[c]] for c in cols] for r in rows]
+        return response
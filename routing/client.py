@@ -0,0 +1,39 @@
+import os
+
+def make_client(api_key=None, pool_size=None, single_attempt=False, **client_kwargs):
+    """ORS client selected by the environment.
+
+    ORS_FAKE: answer in-process with routing.fake_ors (set it to a recordings
+    directory to replay those, or to 1 for synthesized responses only;
+    ORS_FAKE_LATENCY / ORS_FAKE_ERROR_RATE tune it).
+    ORS_BASE_URL: send requests to another server, e.g. `python -m routing.fake_ors`.
+    Otherwise the public API. ORS_API_KEY overrides api_key. pool_size sizes
+    the HTTP connection pool so that many threads can reuse keep-alive
+    connections (requests defaults to 10 per host). single_attempt builds a
+    routing.ratelimit.SingleAttemptClient, which doesn't retry on its own (for
+    use under a ResilientClient). client_kwargs go to openrouteservice.Client.
+    """
+    api_key = os.environ.get("ORS_API_KEY", api_key)
+    fake = os.environ.get("ORS_FAKE")
+    if fake:
+        from routing.fake_ors import FakeORSClient
+        return FakeORSClient(
+            recordings_dir=fake if os.path.isdir(fake) else None,
+            latency=float(os.environ.get("ORS_FAKE_LATENCY", 0)),
+            error_rate=float(os.environ.get("ORS_FAKE_ERROR_RATE", 0)),
+        )
+    import openrouteservice
+    client_class = openrouteservice.Client
+    if single_attempt:
+        from routing.ratelimit import SingleAttemptClient as client_class
+    base_url = os.environ.get("ORS_BASE_URL")
+    if base_url:
+        client = client_class(key=api_key, base_url=base_url, **client_kwargs)
+    else:
+        client = client_class(key=api_key, **client_kwargs)
+    if pool_size:
+        from requests.adapters import HTTPAdapter
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        client._session.mount("https://", adapter)
+        client._session.mount("http://", adapter)
+    return client
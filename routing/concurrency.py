@@ -0,0 +1,157 @@
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from contextlib import contextmanager
+
+# How often map_ordered re-checks a paused call's deadline
+PAUSED_POLL_INTERVAL = 0.1
+
+_local = threading.local()
+
+class CallCancelled(Exception):
+    """Raised by cooperating code inside a map_ordered call that was abandoned after its timeout"""
+
+class CallContext:
+    """State of one map_ordered call, visible to the code it runs through current_call().
+
+    Time spent inside paused() (e.g. waiting for rate-limit tokens) doesn't
+    count against the timeout. `cancelled` is set once the call is abandoned,
+    so long waits can stop early instead of using up shared resources.
+    """
+    def __init__(self):
+        self.started = time.monotonic()
+        self.cancelled = threading.Event()
+        self._lock = threading.Lock()
+        self._paused_total = 0.0
+        self._paused_since = None
+
+    @contextmanager
+    def paused(self):
+        with self._lock:
+            self._paused_since = time.monotonic()
+        try:
+            yield
+        finally:
+            with self._lock:
+                self._paused_total += time.monotonic() - self._paused_since
+                self._paused_since = None
+
+    @property
+    def is_paused(self):
+        return self._paused_since is not None
+
+    def elapsed(self, now=None):
+        """Seconds since the call started, not counting paused time"""
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            paused = self._paused_total + (now - self._paused_since if self._paused_since is not None else 0.0)
+        return now - self.started - paused
+
+def current_call():
+    """CallContext of the map_ordered call running on this thread, or None"""
+    return getattr(_local, 'call', None)
+
+def map_ordered(fn, arg_tuples, max_workers=4, timeout=None, initializer=None):
+    """Run fn(*args) for each args tuple on a bounded thread pool.
+
+    Results come back in the same order as arg_tuples regardless of completion
+    order. Calls that raise give None. Calls still running `timeout` seconds
+    after they started (less any time paused, see CallContext) are abandoned:
+    their context is cancelled, their thread finishes in the background, and
+    they also give None; their indices are returned as the second value.
+    Once every worker is held by an abandoned call, calls still queued could
+    only start when one of those finishes, so they are dropped as timed out too.
+    """
+    arg_tuples = list(arg_tuples)
+    results = [None] * len(arg_tuples)
+    timed_out = []
+    if not arg_tuples:
+        return results, timed_out
+
+    contexts = {}
+    abandoned = set()  # futures given up on whose threads may still be running
+
+    def run(index, args):
+        context = contexts[index] = CallContext()
+        _local.call = context
+        try:
+            return fn(*args)
+        finally:
+            _local.call = None
+
+    def remaining(context, now):
+        left = timeout - context.elapsed(now)
+        # A paused call's deadline moves while it waits; check back periodically
+        return max(left, PAUSED_POLL_INTERVAL) if context.is_paused else left
+
+    pool = ThreadPoolExecutor(max_workers=max_workers, initializer=initializer)
+    try:
+        futures = {pool.submit(run, i, args): i for i, args in enumerate(arg_tuples)}
+        pending = set(futures)
+        while pending:
+            wait_for = None
+            if timeout is not None:
+                # Wake up at the earliest deadline among calls that have started
+                now = time.monotonic()
+                deadlines = [remaining(contexts[futures[f]], now) for f in pending if futures[f] in contexts]
+                wait_for = max(0.0, min(deadlines)) if deadlines else timeout
+            done, pending = wait(pending, timeout=wait_for, return_when=FIRST_COMPLETED)
+
+            for future in done:
+                try:
+                    results[futures[future]] = future.result()
+                except Exception:
+                    results[futures[future]] = None
+
+            if timeout is not None:
+                now = time.monotonic()
+                expired = {f for f in pending
+                           if futures[f] in contexts and contexts[futures[f]].elapsed(now) >= timeout}
+                for future in expired:
+                    contexts[futures[future]].cancelled.set()
+                    timed_out.append(futures[future])
+                pending -= expired
+                abandoned = {f for f in abandoned | expired if not f.done()}
+                if len(abandoned) >= max_workers:
+                    # No worker left to start the queued calls; cancel() fails for any that just started
+                    stranded = {f for f in pending if futures[f] not in contexts and f.cancel()}
+                    timed_out.extend(futures[f] for f in stranded)
+                    pending -= stranded
+    finally:
+        # Don't block on abandoned calls; queued ones are cancelled
+        pool.shutdown(wait=False, cancel_futures=True)
+
+    timed_out.sort()
+    return results, timed_out
+
+class SingleFlight:
+    """Coalesce concurrent calls with the same key into one execution.
+
+    The first caller for a key runs fn(); callers arriving while it is still
+    running wait for and share its result (or exception). Nothing is kept
+    once the call finishes, so this is deduplication, not caching.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}  # key -> Future
+        self.coalesced = 0
+
+    def do(self, key, fn):
+        with self._lock:
+            future = self._calls.get(key)
+            leader = future is None
+            if leader:
+                future = self._calls[key] = Future()
+            else:
+                self.coalesced += 1
+        if not leader:
+            return future.result()
+
+        try:
+            future.set_result(fn())
+        except BaseException as e:
+            future.set_exception(e)
+        finally:
+            with self._lock:
+                del self._calls[key]
+        return future.result()
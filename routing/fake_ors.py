@@ -0,0 +1,372 @@
+import argparse
+import hashlib
+import json
+import os
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qsl, urlsplit
+
+import numpy as np
+import openrouteservice
+from openrouteservice import exceptions
+
+from routing.geodesic import haversine_matrix, polyline_segment_km
+from routing.response_cache import make_cache_key
+
+# Synthesized routes are this much longer than the great-circle distance
+ROAD_DETOUR_FACTOR = 1.25
+PROFILE_SPEEDS_KMH = {"driving-hgv": 70, "driving-car": 85}
+DEFAULT_SPEED_KMH = 60
+# (distance, duration) multipliers per avoided feature, so strategies get distinct routes
+AVOID_FACTORS = {"highways": (1.08, 1.30), "tollways": (1.03, 1.05), "ferries": (1.01, 1.02)}
+POINTS_PER_LEG = 20
+# Sideways bow of each leg (fraction of its length) per avoided feature and per alternative,
+# so different strategies and alternatives follow different paths
+AVOID_BOWS = {"highways": 0.08, "tollways": 0.04, "ferries": 0.02}
+ALTERNATIVE_BOW = 0.12
+# Extra (distance, duration) per alternative after ORS's recommended route
+ALTERNATIVE_FACTORS = (1.06, 1.08)
+# ORS limits alternative_routes to two waypoints and routes up to this long
+ALTERNATIVE_ROUTES_MAX_KM = 100
+# Synthetic terrain: smooth hills of this relief (m) around this base height, stable per location
+ELEVATION_BASE_M = 1500
+ELEVATION_RELIEF_M = 400
+ATTRIBUTION = "openrouteservice.org | OpenStreetMap contributors (fake)"
+ENGINE = {"version": "fake", "build_date": "1970-01-01T00:00:00Z", "graph_date": "1970-01-01T00:00:00Z"}
+
+def request_key(path, params=None, body=None):
+    """Recording key for one ORS request (path, GET params and POST body)"""
+    return make_cache_key(path, params=dict(params or {}), body=body or {})
+
+def _metadata(service, query):
+    return {"attribution": ATTRIBUTION, "service": service, "timestamp": int(time.time() * 1000),
+            "query": query, "engine": ENGINE}
+
+def _stable_uniform(text, low, high):
+    """Deterministic pseudo-random value in [low, high) derived from text"""
+    digest = hashlib.sha256(text.encode("utf-8")).digest()
+    return low + (high - low) * int.from_bytes(digest[:8], "big") / 2**64
+
+class FakeORS:
+    """Answers ORS REST requests from recordings, or synthesizes plausible ones.
+
+    Recorded responses (JSON files written by RecordingClient, looked up by
+    request_key) are replayed exactly. Anything not recorded is synthesized
+    when fallback is on: geocodes are stable per query text, routes and
+    matrices follow great-circle distance times ROAD_DETOUR_FACTOR, bowed
+    sideways per avoided feature and per alternative_routes alternative (with
+    ORS's two-waypoint, ALTERNATIVE_ROUTES_MAX_KM limits). Every
+    request sleeps latency (+ uniform jitter) seconds and fails with
+    error_status at error_rate, so callers see realistic timing and errors.
+    """
+    def __init__(self, recordings_dir=None, latency=0.0, jitter=0.0, error_rate=0.0, error_status=503,
+                 fallback=True, seed=None):
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.fallback = fallback
+        self.recordings = {}
+        self.counters = {'requests': 0, 'replayed': 0, 'synthesized': 0, 'errors': 0}
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        if recordings_dir:
+            self.load_recordings(recordings_dir)
+
+    def load_recordings(self, recordings_dir):
+        for name in sorted(os.listdir(recordings_dir)):
+            if name.endswith(".json"):
+                with open(os.path.join(recordings_dir, name)) as f:
+                    recording = json.load(f)
+                key = request_key(recording['path'], recording.get('params'), recording.get('body'))
+                self.recordings[key] = recording['response']
+
+    def handle(self, path, params=None, body=None):
+        """Return (status, response body) for one request"""
+        with self._lock:
+            self.counters['requests'] += 1
+            delay = self.latency + self._rng.uniform(0, self.jitter)
+            failed = self._rng.random() < self.error_rate
+        if delay > 0:
+            time.sleep(delay)
+        if failed:
+            self._count('errors')
+            return self.error_status, {"error": {"code": self.error_status, "message": "Injected fake ORS error"}}
+
+        recorded = self.recordings.get(request_key(path, params, body))
+        if recorded is not None:
+            self._count('replayed')
+            return 200, recorded
+        if not self.fallback:
+            return 404, {"error": {"code": 404, "message": f"No recording for {path}"}}
+
+        if path == "/geocode/search":
+            response = self._pelias_search(dict(params or {}))
+        elif path.startswith("/v2/directions/"):
+            profile, _, fmt = path[len("/v2/directions/"):].partition("/")
+            if fmt != "geojson":
+                return 400, {"error": {"code": 2003, "message": "Fake ORS only serves geojson directions"}}
+            error = self._alternatives_error(body or {})
+            if error:
+                return 400, {"error": {"code": 2004, "message": error}}
+            response = self._directions(profile, fmt, body or {})
+        elif path.startswith("/v2/matrix/"):
+            response = self._matrix(path[len("/v2/matrix/"):].partition("/")[0], body or {})
+        elif path == "/elevation/line":
+            if (body or {}).get('format_in') != "polyline":
+                return 400, {"error": {"code": 2003, "message": "Fake ORS only serves polyline elevation input"}}
+            response = self._elevation_line(body)
+        else:
+            return 404, {"error": {"code": 404, "message": f"Unknown endpoint {path}"}}
+        self._count('synthesized')
+        return 200, response
+
+    def _count(self, name):
+        with self._lock:
+            self.counters[name] += 1
+
+    def _pelias_search(self, params):
+        text = params.get('text', '')
+        lon = round(_stable_uniform("lon:" + text, -122.0, -75.0), 6)
+        lat = round(_stable_uniform("lat:" + text, 30.0, 47.0), 6)
+        place_id = hashlib.sha256(text.encode("utf-8")).hexdigest()[:12]
+        return {
+            "geocoding": {"version": "0.2", "attribution": ATTRIBUTION, "query": params,
+                          "engine": {"name": "Pelias", "version": "fake"}, "timestamp": int(time.time() * 1000)},
+            "type": "FeatureCollection",
+            "features": [{
+                "type": "Feature",
+                "geometry": {"type": "Point", "coordinates": [lon, lat]},
+                "properties": {"id": place_id, "gid": f"fake:locality:{place_id}", "layer": "locality",
+                               "source": "fake", "name": text, "confidence": 0.8, "label": text},
+            }],
+            "bbox": [lon, lat, lon, lat],
+        }
+
+    def _alternatives_error(self, body):
+        if not body.get('alternative_routes'):
+            return None
+        coords = body['coordinates']
+        if len(coords) != 2:
+            return "Alternative routes are only available for routes between two waypoints"
+        km = polyline_segment_km(np.asarray(coords, dtype=np.float64)[:, ::-1]).sum() * ROAD_DETOUR_FACTOR
+        if km > ALTERNATIVE_ROUTES_MAX_KM:
+            return f"Alternative routes are limited to {ALTERNATIVE_ROUTES_MAX_KM} km"
+        return None
+
+    def _directions(self, profile, fmt, body):
+        target_count = (body.get('alternative_routes') or {}).get('target_count', 1)
+        features = [self._route_feature(profile, body, n) for n in range(target_count)]
+        bbox = [min(f['bbox'][0] for f in features), min(f['bbox'][1] for f in features),
+                max(f['bbox'][2] for f in features), max(f['bbox'][3] for f in features)]
+        return {
+            "type": "FeatureCollection",
+            "bbox": bbox,
+            "features": features,
+            "metadata": _metadata("routing", dict(body, profile=profile, format=fmt)),
+        }
+
+    def _route_feature(self, profile, body, alternative=0):
+        """Route n of a directions response (0 = the recommended route)"""
+        coords = np.asarray(body['coordinates'], dtype=np.float64)  # [lon, lat]
+        avoid = (body.get('options') or {}).get('avoid_features', [])
+        distance_factor, duration_factor = ROAD_DETOUR_FACTOR, 1.0
+        bow = 0.0
+        for feature in avoid:
+            d, t = AVOID_FACTORS.get(feature, (1.0, 1.0))
+            distance_factor *= d
+            duration_factor *= t
+            bow += AVOID_BOWS.get(feature, 0.0)
+        if alternative:
+            distance_factor *= ALTERNATIVE_FACTORS[0] ** alternative
+            duration_factor *= ALTERNATIVE_FACTORS[1] ** alternative
+            # Alternate sides: 1st alternative bows left, 2nd right, ...
+            bow += (-1) ** alternative * ALTERNATIVE_BOW * ((alternative + 1) // 2)
+        speed = PROFILE_SPEEDS_KMH.get(profile, DEFAULT_SPEED_KMH)
+
+        # Each leg interpolated along an arc bowed sideways by `bow` of its length
+        t = np.linspace(0, 1, POINTS_PER_LEG + 1)[:-1, None]
+        legs = []
+        for i in range(len(coords) - 1):
+            delta = coords[i + 1] - coords[i]
+            normal = np.array([-delta[1], delta[0]])
+            legs.append(coords[i] + t * delta + bow * np.sin(np.pi * t) * normal)
+        line = np.vstack(legs + [coords[-1:]])
+        leg_km = polyline_segment_km(coords[:, ::-1]) * distance_factor
+
+        segments = [{"distance": float(km * 1000), "duration": float(km / speed * 3600 * duration_factor)}
+                    for km in leg_km]
+        if body.get('instructions', True):
+            # One step per leg, from its first to its last geometry point
+            for i, segment in enumerate(segments):
+                segment["steps"] = [{"distance": segment["distance"], "duration": segment["duration"], "type": 11,
+                                     "instruction": f"Drive to waypoint {i + 1}", "name": "-",
+                                     "way_points": [i * POINTS_PER_LEG, (i + 1) * POINTS_PER_LEG]}]
+        distance = sum(s['distance'] for s in segments)
+        duration = sum(s['duration'] for s in segments)
+        seed = json.dumps([body['coordinates'], profile, sorted(avoid), alternative])
+
+        def extra(name, low, high):
+            # One value per leg, stable for the same request, and ORS's per-value share of the distance
+            values = [int(_stable_uniform(f"{name}:{i}:{seed}", low, high + 1)) for i in range(len(legs))]
+            summary = []
+            for v in sorted(set(values)):
+                meters = sum(seg["distance"] for seg, w in zip(segments, values) if w == v)
+                summary.append({"value": float(v), "distance": meters,
+                                "amount": round(100 * meters / distance, 2) if distance else 0.0})
+            return {"values": [[i * POINTS_PER_LEG, (i + 1) * POINTS_PER_LEG, v] for i, v in enumerate(values)],
+                    "summary": summary}
+
+        extras = {
+            "steepness": extra("steepness", -3, 3),
+            "surface": extra("surface", 0, 4),
+            "waytype": extra("waytype", 0, 4),
+        }
+        bbox = [float(line[:, 0].min()), float(line[:, 1].min()), float(line[:, 0].max()), float(line[:, 1].max())]
+        return {
+            "type": "Feature",
+            "bbox": bbox,
+            "properties": {
+                "segments": segments,
+                "extras": {k: v for k, v in extras.items() if k in body.get('extra_info', [])},
+                "way_points": [i * POINTS_PER_LEG for i in range(len(coords))],
+                "summary": {"distance": distance, "duration": duration},
+            },
+            "geometry": {"type": "LineString", "coordinates": np.round(line, 6).tolist()},
+        }
+
+    def _matrix(self, profile, body):
+        locations = np.asarray(body['locations'], dtype=np.float64)  # [lon, lat]
+        sources = body.get('sources') or list(range(len(locations)))
+        destinations = body.get('destinations') or list(range(len(locations)))
+        km = haversine_matrix(locations[:, ::-1])[np.ix_(sources, destinations)] * ROAD_DETOUR_FACTOR
+        speed = PROFILE_SPEEDS_KMH.get(profile, DEFAULT_SPEED_KMH)
+        unit_scale = {"m": 1000, "km": 1, "mi": 0.621371}[body.get('units', 'm')]
+
+        response = {
+            "sources": [{"location": locations[i].tolist(), "snapped_distance": 0.0} for i in sources],
+            "destinations": [{"location": locations[j].tolist(), "snapped_distance": 0.0} for j in destinations],
+            "metadata": _metadata("matrix", dict(body, profile=profile)),
+        }
+        metrics = body.get('metrics', ['duration'])
+        if 'distance' in metrics:
+            response['distances'] = np.round(km * unit_scale, 2).tolist()
+        if 'duration' in metrics:
+            response['durations'] = np.round(km / speed * 3600, 2).tolist()
+        return response
+
+    def _elevation_line(self, body):
+        points = np.asarray(body['geometry'], dtype=np.float64)  # [lon, lat]
+        lon, lat = np.radians(points[:, 0]), np.radians(points[:, 1])
+        elevation = ELEVATION_BASE_M + ELEVATION_RELIEF_M * np.sin(40 * lat) * np.cos(40 * lon)
+        geometry = np.column_stack([points, np.round(elevation, 1)]).tolist()
+        if body.get('format_out', 'geojson') == "geojson":
+            geometry = {"type": "LineString", "coordinates": geometry}
+        return {"attribution": ATTRIBUTION, "geometry": geometry, "timestamp": int(time.time() * 1000),
+                "version": "0.2.1"}
+
+def _raise_for_status(status, body):
+    # Same exceptions openrouteservice.Client raises for HTTP error responses
+    if status == 429:
+        raise exceptions._OverQueryLimit(status, body)
+    if status != 200:
+        raise exceptions.ApiError(status, body)
+
+class FakeORSClient(openrouteservice.Client):
+    """openrouteservice.Client whose requests are answered in-process by a FakeORS.
+
+    The real client methods (directions, pelias_search, distance_matrix, ...)
+    build the request as usual; only the HTTP round trip is replaced.
+    """
+    def __init__(self, fake=None, **fake_kwargs):
+        super().__init__(key="fake", base_url="http://fake-ors.invalid")
+        self.fake = fake or FakeORS(**fake_kwargs)
+
+    def request(self, url, get_params=None, first_request_time=None, retry_counter=0, requests_kwargs=None,
+                post_json=None, dry_run=None):
+        status, body = self.fake.handle(url, get_params, post_json)
+        _raise_for_status(status, body)
+        return body
+
+class RecordingClient(openrouteservice.Client):
+    """openrouteservice.Client that saves every successful response for FakeORS to replay"""
+    def __init__(self, recordings_dir, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.recordings_dir = recordings_dir
+        os.makedirs(recordings_dir, exist_ok=True)
+
+    def request(self, url, get_params=None, first_request_time=None, retry_counter=0, requests_kwargs=None,
+                post_json=None, dry_run=None):
+        response = super().request(url, get_params, first_request_time, retry_counter, requests_kwargs,
+                                   post_json, dry_run)
+        if not dry_run:
+            key = request_key(url, get_params, post_json)
+            parts = url.strip("/").split("/")
+            endpoint = parts[1] if url.startswith("/v2/") else parts[0]
+            with open(os.path.join(self.recordings_dir, f"{endpoint}-{key[:16]}.json"), "w") as f:
+                json.dump({"path": url, "params": dict(get_params or {}), "body": post_json,
+                           "response": response}, f)
+        return response
+
+def make_handler(fake):
+    class FakeORSHandler(BaseHTTPRequestHandler):
+        def _respond(self, params, body):
+            status, response = fake.handle(urlsplit(self.path).path, params, body)
+            payload = json.dumps(response).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def do_GET(self):
+            params = dict(parse_qsl(urlsplit(self.path).query))
+            params.pop('api_key', None)
+            self._respond(params, None)
+
+        def do_POST(self):
+            length = int(self.headers.get("Content-Length", 0))
+            self._respond(None, json.loads(self.rfile.read(length) or b"{}"))
+
+        def log_message(self, format, *args):
+            pass  # keep load tests quiet
+
+    return FakeORSHandler
+
+def serve(fake, host="127.0.0.1", port=8080):
+    """Serve the ORS REST paths over HTTP; point a client at it with base_url=http://host:port"""
+    server = ThreadingHTTPServer((host, port), make_handler(fake))
+    server.daemon_threads = True
+    return server
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Local stand-in for the OpenRouteService API")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8080)
+    parser.add_argument('--recordings', default=None, help="directory of responses saved by RecordingClient")
+    parser.add_argument('--latency', type=float, default=0.0, help="seconds added to every request")
+    parser.add_argument('--jitter', type=float, default=0.0, help="extra uniform random latency (seconds)")
+    parser.add_argument('--error-rate', type=float, default=0.0, help="fraction of requests that fail")
+    parser.add_argument('--error-status', type=int, default=503, help="HTTP status of injected failures")
+    parser.add_argument('--no-fallback', action='store_true', help="404 on requests with no recording")
+    parser.add_argument('--seed', type=int, default=None)
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    fake = FakeORS(args.recordings, args.latency, args.jitter, args.error_rate, args.error_status,
+                   fallback=not args.no_fallback, seed=args.seed)
+    server = serve(fake, args.host, args.port)
+    print(f"Fake ORS listening on http://{args.host}:{args.port} ({len(fake.recordings)} recordings)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        print(f"Served: {fake.counters}")
+
+if __name__ == '__main__':
+    main()
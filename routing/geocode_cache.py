@@ -0,0 +1,108 @@
+import os
+import re
+import sqlite3
+import threading
+import time
+
+DEFAULT_CACHE_PATH = os.path.join(os.path.expanduser("~"), ".cache", "carbon_route", "geocode.sqlite")
+
+def normalize_address(text):
+    """Normalize address text so trivially different spellings share a cache key"""
+    text = text.strip().lower()
+    text = re.sub(r"\s*,\s*", ", ", text)  # consistent comma spacing
+    return re.sub(r"\s+", " ", text)
+
+class GeocodeCache:
+    """Persistent SQLite geocode cache with TTL, LRU eviction and hit/miss counters"""
+    def __init__(self, path=DEFAULT_CACHE_PATH, ttl_seconds=30 * 24 * 3600, max_entries=10000):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        # Streamlit runs each session in its own thread, so share one connection behind a lock
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")  # no fsync per hit in WAL mode
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS geocode ("
+            " key TEXT PRIMARY KEY, lat REAL NOT NULL, lon REAL NOT NULL,"
+            " created REAL NOT NULL, last_used REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS geocode_last_used ON geocode(last_used)")
+
+    def get(self, text):
+        """Return cached (lat, lon) for text, or None on miss/expiry"""
+        key = normalize_address(text)
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute("SELECT lat, lon, created FROM geocode WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            lat, lon, created = row
+            if self.ttl_seconds is not None and now - created > self.ttl_seconds:
+                self._conn.execute("DELETE FROM geocode WHERE key = ?", (key,))
+                self.misses += 1
+                return None
+            self._conn.execute("UPDATE geocode SET last_used = ? WHERE key = ?", (now, key))
+            self.hits += 1
+            return (lat, lon)
+
+    def put(self, text, coords):
+        """Store (lat, lon) for text, evicting least recently used entries past max_entries"""
+        key = normalize_address(text)
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO geocode (key, lat, lon, created, last_used) VALUES (?, ?, ?, ?, ?)",
+                (key, coords[0], coords[1], now, now),
+            )
+            count = self._conn.execute("SELECT COUNT(*) FROM geocode").fetchone()[0]
+            if count > self.max_entries:
+                excess = count - self.max_entries
+                self._conn.execute(
+                    "DELETE FROM geocode WHERE key IN (SELECT key FROM geocode ORDER BY last_used LIMIT ?)",
+                    (excess,),
+                )
+                self.evictions += excess
+
+    def get_or_geocode(self, text, geocoder):
+        """Return cached coordinates, falling back to geocoder(text) on a miss.
+
+        geocoder is any callable returning (lat, lon) or None, e.g. a Pelias
+        lookup or an offline stub. Failed lookups (None) are not cached.
+        """
+        coords = self.get(text)
+        if coords is not None:
+            return coords
+        coords = geocoder(text)
+        if coords is not None:
+            self.put(text, coords)
+        return coords
+
+    def stats(self):
+        """Return hit/miss/eviction counters and current size"""
+        with self._lock:
+            size = self._conn.execute("SELECT COUNT(*) FROM geocode").fetchone()[0]
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'size': size,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+        }
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM geocode")
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
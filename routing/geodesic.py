@@ -0,0 +1,38 @@
+import numpy as np
+
+EARTH_RADIUS_KM = 6371.0088  # mean Earth radius
+
+def _as_radians(coords, dtype):
+    points = np.asarray(coords, dtype=dtype).reshape(-1, 2)
+    return np.radians(points[:, 0]), np.radians(points[:, 1])
+
+def _haversine(lat1, lon1, lat2, lon2):
+    h = (np.sin((lat2 - lat1) / 2) ** 2
+         + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2)
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(h, 0, 1)))
+
+def haversine_km(origin, destination):
+    """Great-circle distance in km between two (lat, lon) points"""
+    lat1, lon1 = np.radians(origin[0]), np.radians(origin[1])
+    lat2, lon2 = np.radians(destination[0]), np.radians(destination[1])
+    return float(_haversine(lat1, lon1, lat2, lon2))
+
+def haversine_matrix(coords, dtype=np.float64):
+    """Full pairwise great-circle distance matrix (km) for a list of (lat, lon) points.
+
+    Pass dtype=np.float32 to halve memory on large stop sets.
+    """
+    lat, lon = _as_radians(coords, dtype)
+    return _haversine(lat[:, None], lon[:, None], lat[None, :], lon[None, :]).astype(dtype, copy=False)
+
+def polyline_segment_km(coords, dtype=np.float64):
+    """Length in km of each consecutive leg of a (lat, lon) polyline"""
+    lat, lon = _as_radians(coords, dtype)
+    return _haversine(lat[:-1], lon[:-1], lat[1:], lon[1:]).astype(dtype, copy=False)
+
+def polyline_cumulative_km(coords, dtype=np.float64):
+    """Distance along a (lat, lon) polyline from its first point to each point (starts at 0)"""
+    legs = polyline_segment_km(coords, dtype)
+    cumulative = np.zeros(len(legs) + 1, dtype=dtype)
+    np.cumsum(legs, out=cumulative[1:])
+    return cumulative
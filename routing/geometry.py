@@ -0,0 +1,126 @@
+import itertools
+
+import numpy as np
+
+from routing.geodesic import EARTH_RADIUS_KM
+
+# Route paths are stored as (N, 2) float32 (lat, lon): ~1 m precision at 8 bytes per point
+PATH_DTYPE = np.float32
+
+def geometry_to_path(geometry, dtype=PATH_DTYPE):
+    """(N, 2) (lat, lon) array from a GeoJSON LineString ([lon, lat(, elevation)] coordinates)"""
+    coords = geometry['coordinates']
+    if len(coords) == 0:
+        return np.zeros((0, 2), dtype=dtype)
+    width = len(coords[0])
+    # fromiter over the flattened lists is ~2.5x faster than np.asarray on nested lists
+    flat = np.fromiter(itertools.chain.from_iterable(coords), dtype=np.float64, count=width * len(coords))
+    return np.ascontiguousarray(flat.reshape(-1, width)[:, 1::-1], dtype=dtype)
+
+def simplify_path(path, tolerance_m):
+    """Douglas-Peucker simplification of a (lat, lon) path to within tolerance_m metres.
+
+    Distances are measured in a local equirectangular projection, which is
+    accurate to well under a percent over a single route. Endpoints are kept.
+    """
+    path = np.asarray(path)
+    n = len(path)
+    if n < 3 or tolerance_m <= 0:
+        return path
+
+    lat = np.radians(path[:, 0].astype(np.float64))
+    lon = np.radians(path[:, 1].astype(np.float64))
+    radius_m = EARTH_RADIUS_KM * 1000
+    xy = np.column_stack([lon * np.cos(lat.mean()) * radius_m, lat * radius_m])
+
+    keep = np.zeros(n, dtype=bool)
+    keep[0] = keep[-1] = True
+    stack = [(0, n - 1)]
+    while stack:
+        first, last = stack.pop()
+        if last - first < 2:
+            continue
+        start, inner = xy[first], xy[first + 1:last]
+        chord = xy[last] - start
+        length2 = chord @ chord
+        # Distance to the chord segment (to the start point if the chord has no length)
+        t = np.clip((inner - start) @ chord / length2, 0, 1) if length2 > 0 else np.zeros(len(inner))
+        offsets = inner - (start + t[:, None] * chord)
+        dist2 = np.einsum('ij,ij->i', offsets, offsets)
+        k = int(dist2.argmax())
+        if dist2[k] > tolerance_m * tolerance_m:
+            split = first + 1 + k
+            keep[split] = True
+            stack.append((first, split))
+            stack.append((split, last))
+    return path[keep]
+
+def encode_polyline(path, precision=5):
+    """Encode a (lat, lon) path with the Google encoded polyline algorithm"""
+    scaled = np.round(np.asarray(path, dtype=np.float64).reshape(-1, 2) * 10 ** precision).astype(np.int64)
+    deltas = np.diff(scaled, axis=0, prepend=np.zeros((1, 2), dtype=np.int64)).ravel()
+    chars = []
+    for value in deltas.tolist():
+        value = ~(value << 1) if value < 0 else value << 1
+        while value >= 0x20:
+            chars.append(chr((0x20 | (value & 0x1f)) + 63))
+            value >>= 5
+        chars.append(chr(value + 63))
+    return ''.join(chars)
+
+def decode_polyline(text, precision=5, dtype=PATH_DTYPE):
+    """Decode a Google encoded polyline into an (N, 2) (lat, lon) array"""
+    values = []
+    value = shift = 0
+    for char in text:
+        byte = ord(char) - 63
+        value |= (byte & 0x1f) << shift
+        shift += 5
+        if byte < 0x20:
+            values.append(~(value >> 1) if value & 1 else value >> 1)
+            value = shift = 0
+    deltas = np.asarray(values, dtype=np.int64).reshape(-1, 2)
+    return (np.cumsum(deltas, axis=0) / 10 ** precision).astype(dtype)
+
+def _cell_keys(x, y):
+    return (x << 32) | (y & 0xffffffff)
+
+def path_cells(path, cell_m):
+    """Distinct cell_m-sized grid cells a (lat, lon) path passes through, as sorted int64 keys.
+
+    Legs are densified to half a cell so no crossed cell is skipped. Longitude
+    is scaled by each point's own cos(latitude) rather than a per-route
+    reference, so a location maps to the same cell whichever route it is on.
+    """
+    path = np.asarray(path, dtype=np.float64).reshape(-1, 2)
+    if len(path) == 0:
+        return np.zeros(0, dtype=np.int64)
+    radius_m = EARTH_RADIUS_KM * 1000
+    lat = np.radians(path[:, 0])
+    xy = np.column_stack([np.radians(path[:, 1]) * np.cos(lat) * radius_m, lat * radius_m])
+    if len(xy) > 1:
+        legs = np.diff(xy, axis=0)
+        steps = np.maximum(1, np.ceil(np.hypot(legs[:, 0], legs[:, 1]) / (cell_m / 2)).astype(np.int64))
+        # Point j of leg i at start_i + (j / steps_i) * leg_i, for j in [0, steps_i)
+        leg = np.repeat(np.arange(len(legs)), steps)
+        offset = np.arange(len(leg)) - np.repeat(np.cumsum(steps) - steps, steps)
+        xy = np.vstack([xy[leg] + (offset / steps[leg])[:, None] * legs[leg], xy[-1:]])
+    cells = np.floor(xy / cell_m).astype(np.int64)
+    return np.unique(_cell_keys(cells[:, 0], cells[:, 1]))
+
+def path_overlap(cells, other_cells):
+    """Fraction of a path's cells (from path_cells) within one cell of another path's cells.
+
+    The one-cell margin lets the same road sampled at different vertices still match.
+    """
+    if len(cells) == 0 or len(other_cells) == 0:
+        return 0.0
+    x, y = cells >> 32, cells & 0xffffffff
+    matched = np.zeros(len(cells), dtype=bool)
+    for dx in (0, -1, 1):
+        for dy in (0, -1, 1):
+            # other_cells is sorted (np.unique), so membership is a binary search
+            shifted = _cell_keys(x + dx, y + dy)
+            idx = np.minimum(np.searchsorted(other_cells, shifted), len(other_cells) - 1)
+            matched |= other_cells[idx] == shifted
+    return float(matched.mean())
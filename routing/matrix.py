@@ -0,0 +1,113 @@
+import numpy as np
+
+from env.energy_model import estimate_energy_batch, energy_to_co2_batch
+from routing.response_cache import make_cache_key, round_coords
+
+# ORS public API caps matrix requests (locations and sources x destinations);
+# 50 locations per request stays within the free plan limits
+MAX_MATRIX_LOCATIONS = 50
+
+def _matrix_blocks(n, max_locations):
+    """Split n locations into blocks so that any two blocks fit in one request"""
+    if n <= max_locations:
+        return [np.arange(n)]
+    block = max(1, max_locations // 2)
+    return [np.arange(start, min(start + block, n)) for start in range(0, n, block)]
+
+def fetch_road_matrix(client, coords, profile='driving-hgv', max_locations=MAX_MATRIX_LOCATIONS, cache=None):
+    """Road distance (km) and duration (min) matrices between (lat, lon) points.
+
+    Uses the ORS matrix endpoint in as few requests as the per-request location
+    limit allows: one request when everything fits, otherwise one per pair of
+    location blocks. Unroutable cells are inf. When cache (a ResponseCache) is
+    given, assembled matrices are cached by the rounded stop set and profile.
+    """
+    ors_coords = [[c[1], c[0]] for c in coords]  # ORS expects [lon, lat]
+    key = make_cache_key("matrix", coords=round_coords(ors_coords), profile=profile)
+    if cache is not None:
+        cached = cache.get(key)
+        if cached is not None:
+            return _to_arrays(cached)
+
+    n = len(coords)
+    distances = [[None] * n for _ in range(n)]
+    durations = [[None] * n for _ in range(n)]
+    blocks = _matrix_blocks(n, max_locations)
+    for sources in blocks:
+        for destinations in blocks:
+            same = sources is destinations
+            locations = sources if same else np.concatenate([sources, destinations])
+            response = client.distance_matrix(
+                locations=[ors_coords[i] for i in locations],
+                profile=profile,
+                sources=list(range(len(sources))),
+                destinations=list(range(len(destinations))) if same else list(range(len(sources), len(locations))),
+                metrics=['distance', 'duration'],
+                units='km',
+            )
+            for row, i in enumerate(sources):
+                for col, j in enumerate(destinations):
+                    distances[i][j] = response['distances'][row][col]
+                    durations[i][j] = response['durations'][row][col]
+
+    result = {'distances': distances, 'durations': durations}
+    if cache is not None:
+        cache.put(key, result)
+    return _to_arrays(result)
+
+def _to_arrays(result):
+    # None (unroutable) becomes nan via float conversion, then inf so solvers avoid it
+    distance_km = np.array(result['distances'], dtype=np.float64)
+    duration_min = np.array(result['durations'], dtype=np.float64) / 60
+    distance_km[np.isnan(distance_km)] = np.inf
+    duration_min[np.isnan(duration_min)] = np.inf
+    return distance_km, duration_min
+
+def fetch_stop_elevations(client, coords, cache=None):
+    """Elevation (m) of each (lat, lon) point, from one ORS elevation/line request"""
+    ors_coords = [[c[1], c[0]] for c in coords]  # ORS expects [lon, lat]
+    key = make_cache_key("elevation", coords=round_coords(ors_coords))
+    if cache is not None:
+        cached = cache.get(key)
+        if cached is not None:
+            return np.array(cached, dtype=np.float64)
+
+    response = client.elevation_line(format_in='polyline', geometry=ors_coords, format_out='polyline')
+    elevations = [point[2] for point in response['geometry']]
+    if len(elevations) != len(coords):
+        raise ValueError(f"ORS returned {len(elevations)} elevations for {len(coords)} points")
+    if cache is not None:
+        cache.put(key, elevations)
+    return np.array(elevations, dtype=np.float64)
+
+def grade_matrix(elevation_m, distance_km):
+    """Net grade (%) from stop i to stop j: elevation change over road distance.
+
+    Climbs and descents between the two stops cancel out, so this understates
+    hilly legs that start and end at similar heights; 0 where unroutable.
+    """
+    rise_m = elevation_m[None, :] - elevation_m[:, None]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        grade = rise_m / (distance_km * 1000) * 100
+    grade[~np.isfinite(grade)] = 0.0
+    return grade
+
+def build_cost_matrix(client, coords, vehicle_type='diesel', load_kg=500, profile='driving-hgv',
+                      max_locations=MAX_MATRIX_LOCATIONS, cache=None):
+    """Stop-to-stop road cost matrices, with per-cell CO2 (g) from the energy model.
+
+    CO2 uses the road distance and the net grade between the stops' elevations
+    (see grade_matrix), so uphill legs cost more than the same legs downhill.
+    """
+    distance_km, duration_min = fetch_road_matrix(client, coords, profile, max_locations, cache)
+    grade_pct = grade_matrix(fetch_stop_elevations(client, coords, cache), distance_km)
+    routable = np.isfinite(distance_km)
+    co2_g = np.full_like(distance_km, np.inf)
+    energy = estimate_energy_batch(distance_km[routable], grade_pct[routable], vehicle_type, load_kg)
+    co2_g[routable] = energy_to_co2_batch(energy, vehicle_type)
+    return {
+        'distance_km': distance_km,
+        'duration_min': duration_min,
+        'grade_pct': grade_pct,
+        'co2_g': co2_g,
+    }
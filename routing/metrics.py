@@ -0,0 +1,65 @@
+import bisect
+import threading
+
+# Upper bounds (ms) of the latency buckets; the last bucket is unbounded
+LATENCY_BUCKETS_MS = (1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000)
+
+class LatencyHistogram:
+    """Thread-safe fixed-bucket latency histogram with approximate percentiles"""
+    def __init__(self, buckets_ms=LATENCY_BUCKETS_MS):
+        self.buckets_ms = tuple(buckets_ms)
+        self._counts = [0] * (len(self.buckets_ms) + 1)
+        self._count = 0
+        self._sum_ms = 0.0
+        self._max_ms = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, seconds):
+        ms = seconds * 1000
+        with self._lock:
+            self._counts[bisect.bisect_left(self.buckets_ms, ms)] += 1
+            self._count += 1
+            self._sum_ms += ms
+            self._max_ms = max(self._max_ms, ms)
+
+    def _percentile(self, counts, q):
+        # Upper bound of the bucket holding the q-th observation
+        target = q * self._count
+        seen = 0
+        for bound, count in zip(self.buckets_ms + (self._max_ms,), counts):
+            seen += count
+            if seen >= target:
+                return min(bound, self._max_ms)
+        return self._max_ms
+
+    def snapshot(self):
+        with self._lock:
+            counts = list(self._counts)
+            snapshot = {
+                'count': self._count,
+                'mean_ms': self._sum_ms / self._count if self._count else 0.0,
+                'max_ms': self._max_ms,
+                'buckets': {f"le_{bound}ms": count for bound, count in zip(self.buckets_ms, counts)},
+            }
+            snapshot['buckets']['le_inf'] = counts[-1]
+            for q in (0.5, 0.95, 0.99):
+                snapshot[f"p{int(q * 100)}_ms"] = self._percentile(counts, q) if self._count else 0.0
+        return snapshot
+
+class LatencyRegistry:
+    """One LatencyHistogram per name (e.g. per endpoint), created on first use"""
+    def __init__(self):
+        self._histograms = {}
+        self._lock = threading.Lock()
+
+    def observe(self, name, seconds):
+        with self._lock:
+            histogram = self._histograms.get(name)
+            if histogram is None:
+                histogram = self._histograms[name] = LatencyHistogram()
+        histogram.observe(seconds)
+
+    def snapshot(self):
+        with self._lock:
+            histograms = dict(self._histograms)
+        return {name: histogram.snapshot() for name, histogram in sorted(histograms.items())}
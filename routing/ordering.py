@@ -0,0 +1,34 @@
+import numpy as np
+
+from routing.geodesic import haversine_matrix
+from routing.matrix import build_cost_matrix
+from routing.scoring import normalize_vehicle_type
+from routing.tsp import solve_open_path
+
+# Seconds the local search may spend on large stop sets before returning its best tour
+DEFAULT_TIME_BUDGET = 1.0
+
+# From this many stops the distance matrix is built in float32 to halve memory
+FLOAT32_MIN_STOPS = 500
+
+def optimize_delivery_route(coords, package_weight, truck_type, time_budget=DEFAULT_TIME_BUDGET,
+                            client=None, profile='driving-hgv', cache=None):
+    """Optimize the order of delivery stops for maximum efficiency.
+
+    Start and end stay fixed; the waypoints in between are ordered by an exact
+    solver for small stop sets and a time-bounded 2-opt/Or-opt search otherwise.
+    With an ORS client, stops are ordered by road-network CO2 from the matrix
+    endpoint instead of great-circle distance.
+    """
+    if len(coords) <= 3:  # Only start, end, and one waypoint
+        return coords
+
+    if client is not None:
+        costs = build_cost_matrix(
+            client, coords, normalize_vehicle_type(truck_type), package_weight, profile, cache=cache
+        )['co2_g']
+    else:
+        dtype = np.float32 if len(coords) >= FLOAT32_MIN_STOPS else np.float64
+        costs = haversine_matrix(coords, dtype=dtype)
+    order = solve_open_path(costs, time_budget=time_budget)
+    return [coords[i] for i in order]
@@ -0,0 +1,204 @@
+import random
+import threading
+import time
+
+import openrouteservice
+import requests
+from openrouteservice import exceptions
+
+from routing.concurrency import CallCancelled, SingleFlight, current_call
+from routing.response_cache import make_cache_key
+
+# Requests per minute per endpoint on the ORS standard (free) plan
+PLAN_QUOTAS = {
+    'standard': {'directions': 40, 'distance_matrix': 40, 'pelias_search': 100, 'elevation_line': 40},
+}
+
+class TokenBucket:
+    """Thread-safe token bucket: `rate` tokens per second, bursts of up to `capacity`"""
+    def __init__(self, rate, capacity=None):
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(1.0, rate)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now):
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def try_acquire(self, tokens=1):
+        """Take tokens if available now; returns whether it did"""
+        with self._lock:
+            self._refill(time.monotonic())
+            if self._tokens >= tokens:
+                self._tokens -= tokens
+                return True
+            return False
+
+    def acquire(self, tokens=1, cancel=None):
+        """Block until tokens are available and take them; returns the seconds spent waiting.
+
+        If the cancel Event is set while waiting, returns None without taking any.
+        """
+        waited = 0.0
+        while True:
+            with self._lock:
+                self._refill(time.monotonic())
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return waited
+                delay = (tokens - self._tokens) / self.rate
+            if cancel is None:
+                time.sleep(delay)
+            elif cancel.wait(delay):
+                return None
+            waited += delay
+
+def plan_buckets(plan='standard'):
+    """One TokenBucket per ORS method refilling at the plan's per-minute quota.
+
+    The quota is a count per minute, so a whole minute's worth may go out in
+    one burst (e.g. a 10-strategy sweep) as long as the average stays within it.
+    """
+    return {method: TokenBucket(per_minute / 60, capacity=per_minute)
+            for method, per_minute in PLAN_QUOTAS[plan].items()}
+
+class SingleAttemptClient(openrouteservice.Client):
+    """openrouteservice.Client that sends each request once and leaves retrying to the caller.
+
+    The stock client retries 503s (and 429s unless retry_over_query_limit is
+    off) in its own loop for up to retry_timeout, 60 s by default; its
+    retry_timeout=0 doesn't help, as it fails every request before sending.
+    Here the client's retry re-enters request() with retry_counter > 0, which
+    raises an ApiError for the 503 instead, before any sleep or resend.
+    """
+    def __init__(self, *args, **kwargs):
+        kwargs['retry_over_query_limit'] = False
+        super().__init__(*args, **kwargs)
+
+    def request(self, url, get_params=None, first_request_time=None, retry_counter=0, requests_kwargs=None,
+                post_json=None, dry_run=None):
+        if retry_counter > 0:
+            raise exceptions.ApiError(503, {"error": {"code": 503, "message": "Service unavailable"}})
+        return super().request(url, get_params, first_request_time, retry_counter, requests_kwargs, post_json,
+                               dry_run)
+
+class ResilientClient:
+    """Wraps an ORS client with rate limiting, retries and request coalescing.
+
+    Each API method takes a token from its bucket in `buckets` (method name ->
+    TokenBucket), or from default_bucket, before calling ORS. Calls that fail
+    with 429, a 5xx status, a timeout or a connection error are retried up to
+    max_retries times with full-jitter exponential backoff. Identical calls
+    already in flight share one request. Wrap a SingleAttemptClient
+    (make_client(single_attempt=True)) so 429s and 503s reach this layer
+    at once instead of going through the client's own retry loop first.
+
+    Inside map_ordered, token waits are paused time (they don't count against
+    its timeout), and a call abandoned after its timeout raises CallCancelled
+    instead of taking a token or retrying.
+    """
+    def __init__(self, client, buckets=None, default_bucket=None, max_retries=4, base_delay=0.5, max_delay=30.0,
+                 seed=None):
+        self.client = client
+        self.buckets = plan_buckets() if buckets is None else buckets
+        self.default_bucket = default_bucket
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.counters = {
+            'calls': 0,
+            'requests': 0,
+            'retries': 0,
+            'rate_limited': 0,  # 429 responses
+            'server_errors': 0,  # 5xx, timeouts and connection errors
+            'throttled': 0,  # calls that waited for a token
+            'throttle_wait_s': 0.0,
+            'failures': 0,
+            'cancelled': 0,  # abandoned by their caller before reaching ORS
+        }
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._inflight = SingleFlight()
+
+    def __getattr__(self, name):
+        attr = getattr(self.client, name)
+        if not callable(attr) or name.startswith('_'):
+            return attr
+
+        def resilient(*args, **kwargs):
+            self._count('calls')
+            try:
+                key = make_cache_key(name, args=list(args), kwargs=kwargs)
+            except TypeError:  # arguments that aren't JSON, don't coalesce
+                return self._call(name, attr, args, kwargs)
+            try:
+                return self._inflight.do(key, lambda: self._call(name, attr, args, kwargs))
+            except CallCancelled:
+                call = current_call()
+                if call is not None and call.cancelled.is_set():
+                    raise
+                # The shared call's own caller gave up, not this one
+                return self._call(name, attr, args, kwargs)
+        return resilient
+
+    def _count(self, name, amount=1):
+        with self._lock:
+            self.counters[name] += amount
+
+    def _call(self, name, method, args, kwargs):
+        bucket = self.buckets.get(name, self.default_bucket)
+        call = current_call()
+        for attempt in range(self.max_retries + 1):
+            if bucket is not None:
+                if call is None:
+                    waited = bucket.acquire()
+                else:
+                    with call.paused():
+                        waited = bucket.acquire(cancel=call.cancelled)
+                if waited is None:
+                    self._cancelled(name)
+                if waited:
+                    self._count('throttled')
+                    self._count('throttle_wait_s', waited)
+            if call is not None and call.cancelled.is_set():
+                self._cancelled(name)
+            self._count('requests')
+            try:
+                return method(*args, **kwargs)
+            except Exception as e:
+                kind = retryable_error(e)
+                if kind is None:
+                    raise
+                self._count(kind)
+                if attempt == self.max_retries:
+                    self._count('failures')
+                    raise
+            self._count('retries')
+            delay = self._random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+            if call is None:
+                time.sleep(delay)
+            elif call.cancelled.wait(delay):
+                self._cancelled(name)
+
+    def _cancelled(self, name):
+        self._count('cancelled')
+        raise CallCancelled(f"{name} call abandoned by its caller")
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self.counters)
+        stats['coalesced'] = self._inflight.coalesced
+        return stats
+
+def retryable_error(error):
+    """'rate_limited' or 'server_errors' for errors worth retrying, else None"""
+    status = getattr(error, 'status', None) or getattr(error, 'status_code', None)
+    if status == 429:
+        return 'rate_limited'
+    if isinstance(status, int) and status >= 500:
+        return 'server_errors'
+    if isinstance(error, (exceptions.Timeout, requests.exceptions.Timeout, requests.exceptions.ConnectionError)):
+        return 'server_errors'
+    return None
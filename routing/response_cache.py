@@ -0,0 +1,169 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from collections import OrderedDict
+
+from routing.concurrency import SingleFlight
+
+DEFAULT_CACHE_PATH = os.path.join(os.path.expanduser("~"), ".cache", "carbon_route", "responses.sqlite")
+
+# 5 decimal places is ~1 m, well below geocoder precision
+COORD_PRECISION = 5
+
+def make_cache_key(endpoint, **params):
+    """Content-address a request: sha256 over the endpoint and canonical JSON params"""
+    payload = json.dumps({"endpoint": endpoint, "params": params}, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+def round_coords(coords, precision=COORD_PRECISION):
+    return [[round(float(c[0]), precision), round(float(c[1]), precision)] for c in coords]
+
+def directions_cache_key(coords, profile, avoid_features=None, precision=COORD_PRECISION, **params):
+    """Cache key for a directions request; avoid feature order doesn't matter"""
+    return make_cache_key(
+        "directions",
+        coords=round_coords(coords, precision),
+        profile=profile,
+        avoid_features=sorted(avoid_features or []),
+        **params,
+    )
+
+class ResponseCache:
+    """Two-tier cache of raw ORS responses: in-memory LRU in front of SQLite on disk.
+
+    The memory tier holds up to memory_entries decoded responses. The disk tier
+    (skipped when path is None) keeps compressed JSON with a TTL and evicts the
+    least recently used rows past disk_entries. Disk hits are promoted into memory.
+    Returned responses are shared between callers and must be treated as read-only.
+    """
+    def __init__(self, path=DEFAULT_CACHE_PATH, memory_entries=256, disk_entries=5000, ttl_seconds=7 * 24 * 3600):
+        self.path = path
+        self.memory_entries = memory_entries
+        self.disk_entries = disk_entries
+        self.ttl_seconds = ttl_seconds
+        self.counters = {
+            'memory_hits': 0,
+            'disk_hits': 0,
+            'misses': 0,
+            'memory_evictions': 0,
+            'disk_evictions': 0,
+        }
+
+        self._lock = threading.Lock()
+        self._inflight = SingleFlight()
+        self._memory = OrderedDict()  # key -> (created, response)
+        self._conn = None
+        if path is not None:
+            if path != ":memory:":
+                os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+            self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                " key TEXT PRIMARY KEY, body BLOB NOT NULL,"
+                " created REAL NOT NULL, last_used REAL NOT NULL)"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS responses_last_used ON responses(last_used)")
+
+    def _expired(self, created, now):
+        return self.ttl_seconds is not None and now - created > self.ttl_seconds
+
+    def _remember(self, key, created, response):
+        # Caller holds the lock
+        self._memory[key] = (created, response)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_entries:
+            self._memory.popitem(last=False)
+            self.counters['memory_evictions'] += 1
+
+    def get(self, key):
+        """Return the cached response for key, or None"""
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                if not self._expired(entry[0], now):
+                    self._memory.move_to_end(key)
+                    self.counters['memory_hits'] += 1
+                    return entry[1]
+                del self._memory[key]
+
+            if self._conn is not None:
+                row = self._conn.execute("SELECT body, created FROM responses WHERE key = ?", (key,)).fetchone()
+                if row is not None:
+                    if not self._expired(row[1], now):
+                        self._conn.execute("UPDATE responses SET last_used = ? WHERE key = ?", (now, key))
+                        response = json.loads(zlib.decompress(row[0]))
+                        self._remember(key, row[1], response)
+                        self.counters['disk_hits'] += 1
+                        return response
+                    self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+
+            self.counters['misses'] += 1
+            return None
+
+    def put(self, key, response):
+        now = time.time()
+        with self._lock:
+            self._remember(key, now, response)
+            if self._conn is not None:
+                body = zlib.compress(json.dumps(response, separators=(",", ":")).encode("utf-8"))
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO responses (key, body, created, last_used) VALUES (?, ?, ?, ?)",
+                    (key, body, now, now),
+                )
+                count = self._conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+                if count > self.disk_entries:
+                    excess = count - self.disk_entries
+                    self._conn.execute(
+                        "DELETE FROM responses WHERE key IN (SELECT key FROM responses ORDER BY last_used LIMIT ?)",
+                        (excess,),
+                    )
+                    self.counters['disk_evictions'] += excess
+
+    def get_or_fetch(self, key, fetch):
+        """Return the cached response for key, calling fetch() and caching its result on a miss.
+
+        Concurrent misses for the same key share a single fetch(). Empty/None
+        responses are not cached.
+        """
+        response = self.get(key)
+        if response is not None:
+            return response
+        return self._inflight.do(key, lambda: self._fetch_and_put(key, fetch))
+
+    def _fetch_and_put(self, key, fetch):
+        response = fetch()
+        if response:
+            self.put(key, response)
+        return response
+
+    def stats(self):
+        """Return hit/miss/eviction counters and tier sizes"""
+        with self._lock:
+            stats = dict(self.counters)
+            stats['coalesced'] = self._inflight.coalesced
+            stats['memory_size'] = len(self._memory)
+            stats['disk_size'] = (
+                self._conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0] if self._conn is not None else 0
+            )
+        lookups = stats['memory_hits'] + stats['disk_hits'] + stats['misses']
+        stats['hit_rate'] = (stats['memory_hits'] + stats['disk_hits']) / lookups if lookups else 0.0
+        return stats
+
+    def clear(self):
+        with self._lock:
+            self._memory.clear()
+            if self._conn is not None:
+                self._conn.execute("DELETE FROM responses")
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
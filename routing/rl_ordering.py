@@ -0,0 +1,114 @@
+import numpy as np
+
+from env.observations import cost_features, encode_observations
+from routing.geodesic import haversine_matrix
+
+_POLICIES = {}
+
+def load_route_policy(path, device='cpu'):
+    """Load a trained route model once per (path, device) and keep it warm for later calls"""
+    key = (path, device)
+    if key not in _POLICIES:
+        _POLICIES[key] = RoutePolicy(path, device)
+    return _POLICIES[key]
+
+def _detect_obs_mode(n_nodes, observation_space):
+    shape = observation_space.shape
+    if observation_space.dtype == np.uint8:
+        return 'packed'
+    if shape == (n_nodes+1,):
+        return 'scalar'
+    if shape == (2*n_nodes,):
+        return 'onehot'
+    if shape == (3*n_nodes,):
+        return 'distance'
+    raise ValueError(f"Unrecognized observation space {observation_space} for {n_nodes} nodes")
+
+def path_costs(orders, cost_matrices):
+    """Total cost of each visit order, orders (B, n) into cost_matrices (B, n, n)"""
+    orders = np.asarray(orders)
+    rows = np.arange(len(orders))[:, None]
+    return cost_matrices[rows, orders[:, :-1], orders[:, 1:]].sum(axis=1)
+
+class RoutePolicy:
+    """A PPO (or MaskablePPO) model saved by train_ppo.py, run over many stop sets at once.
+
+    Every decision step encodes the observations of all stop sets as one batch
+    and runs a single policy forward pass; already visited nodes are masked
+    out of the logits so every order is a valid permutation starting at node 0.
+
+    Only models trained with obs_mode='distance' see the instance (the current
+    node's row of its cost matrix) and so order each stop set differently.
+    The other modes observe just the current node and the remaining set: such
+    a model yields one fixed order for every stop set, computed once.
+
+    Orders start at node 0 and end wherever the policy finishes, as in the
+    training environment; unlike optimize_delivery_route the last stop is not
+    kept in place unless fixed_end is set.
+    """
+    def __init__(self, path, device='cpu'):
+        # Heavy imports stay here so importing this module doesn't pull in torch
+        import torch
+        from stable_baselines3 import PPO
+
+        self._torch = torch
+        try:
+            self.model = PPO.load(path, device=device)
+        except Exception:
+            from sb3_contrib import MaskablePPO
+            self.model = MaskablePPO.load(path, device=device)
+        self.model.policy.set_training_mode(False)
+        self.n_nodes = int(self.model.action_space.n)
+        self.obs_mode = _detect_obs_mode(self.n_nodes, self.model.observation_space)
+
+    def _logits(self, obs):
+        obs_tensor, _ = self.model.policy.obs_to_tensor(obs)
+        with self._torch.no_grad():
+            distribution = self.model.policy.get_distribution(obs_tensor)
+        return distribution.distribution.logits.cpu().numpy()
+
+    def order_batch(self, cost_matrices, fixed_end=False):
+        """Greedy visit orders (B, n_nodes) for B problems given their (B, n, n) cost matrices.
+
+        One forward pass per step for the whole batch. fixed_end keeps node
+        n-1 for the last step, matching optimize_delivery_route's endpoints.
+        """
+        cost_matrices = np.asarray(cost_matrices)
+        if self.obs_mode != 'distance':
+            # The observation doesn't depend on the instance: every problem gets the same order
+            return np.repeat(self._order(1, None, fixed_end), len(cost_matrices), axis=0)
+        return self._order(len(cost_matrices), cost_features(cost_matrices), fixed_end)
+
+    def _order(self, batch_size, features, fixed_end):
+        n = self.n_nodes
+        rows = np.arange(batch_size)
+        current = np.zeros(batch_size, dtype=np.int64)
+        remaining = np.ones((batch_size, n), dtype=bool)
+        remaining[:, 0] = False
+        orders = np.zeros((batch_size, n), dtype=np.int64)
+
+        for step in range(1, n):
+            logits = self._logits(encode_observations(current, remaining, self.obs_mode, features=features))
+            allowed = remaining.copy()
+            if fixed_end and step < n - 1:
+                allowed[:, n-1] = False
+            logits[~allowed] = -np.inf
+            current = logits.argmax(axis=1)
+            remaining[rows, current] = False
+            orders[:, step] = current
+        return orders
+
+    def order_stop_sets(self, stop_sets, cost_matrices=None, fixed_end=False):
+        """Visit orders and their costs for many stop sets of (lat, lon) points.
+
+        Each stop set must have exactly n_nodes points, the first being the
+        depot; with fixed_end the last point also stays last. Costs default to
+        great-circle km. Returns (orders, costs).
+        """
+        if cost_matrices is None:
+            cost_matrices = np.stack([haversine_matrix(stops) for stops in stop_sets])
+        cost_matrices = np.asarray(cost_matrices)
+        if cost_matrices.shape[1:] != (self.n_nodes, self.n_nodes):
+            raise ValueError(f"Model was trained for {self.n_nodes} nodes, got stop sets of {cost_matrices.shape[1]}")
+        orders = self.order_batch(cost_matrices, fixed_end)
+        return orders, path_costs(orders, cost_matrices)
@@ -0,0 +1,387 @@
+import logging
+
+from routing.concurrency import map_ordered
+from routing.geodesic import haversine_km
+from routing.geometry import path_cells, path_overlap, simplify_path
+from routing.pareto import pareto_front
+from routing.response_cache import directions_cache_key
+from routing.scoring import parse_directions_response, parse_directions_alternatives, score_route, calculate_route_score
+
+logger = logging.getLogger(__name__)
+
+# Strategy fan-out: concurrent ORS calls and per-call timeout (seconds)
+MAX_CONCURRENT_REQUESTS = 10
+ROUTE_REQUEST_TIMEOUT = 30
+
+# (name, profile, avoid_tolls, avoid_highways, avoid_ferries)
+ROUTE_STRATEGIES = [
+    # Highway-optimized routes (often more efficient for longer distances)
+    ("Highway Route", "driving-car", False, False, False),
+    ("Truck Highway Route", "driving-hgv", False, False, False),
+
+    # Local road routes (better for short distances or heavy cargo)
+    ("Local Roads", "driving-car", False, True, False),
+    ("Truck Local Roads", "driving-hgv", False, True, False),
+
+    # Toll-avoiding routes
+    ("No Tolls", "driving-car", True, False, False),
+    ("Truck No Tolls", "driving-hgv", True, False, False),
+
+    # Combined strategies
+    ("No Tolls/Highways", "driving-car", True, True, False),
+    ("Truck No Tolls/Highways", "driving-hgv", True, True, False),
+
+    # Ferry-avoiding routes
+    ("No Ferries", "driving-car", False, False, True),
+    ("Truck No Ferries", "driving-hgv", False, False, True),
+]
+
+# Candidate fetching: the strategy sweep above, or one ORS alternative_routes call per profile
+FETCH_MODES = ("strategies", "alternatives")
+ALTERNATIVE_PROFILES = ("driving-car", "driving-hgv")
+ALTERNATIVE_ROUTES = {"target_count": 3, "share_factor": 0.6, "weight_factor": 1.4}
+# ORS only computes alternatives between two points, for routes up to this long
+ALTERNATIVE_ROUTES_MAX_KM = 100
+PROFILE_LABELS = {"driving-car": "Car", "driving-hgv": "Truck"}
+
+# Same-profile candidates sharing this fraction of their path (both ways, on a grid of at least
+# DEDUP_CELL_M, coarsened so the longest candidate spans about DEDUP_MAX_CELLS cells) are one route
+DEDUP_CELL_M = 25
+DEDUP_MAX_CELLS = 2000
+DEDUP_OVERLAP = 0.9
+# Candidates whose distance or duration differ by more than this fraction are different routes
+DEDUP_MAX_DIFFERENCE = 0.05
+
+def pelias_geocode(client, location_name):
+    """Look up (lat, lon) with the OpenRouteService Pelias geocoder, None if nothing matches"""
+    result = client.pelias_search(text=location_name, size=1)
+    if result and 'features' in result and len(result['features']) > 0:
+        coords = result['features'][0]['geometry']['coordinates']
+        return (coords[1], coords[0])  # Return (lat, lon)
+    return None
+
+def geocode_location(client, location_name, cache=None):
+    """Convert location name to coordinates, through a GeocodeCache when given; API errors propagate"""
+    if cache is None:
+        return pelias_geocode(client, location_name)
+    return cache.get_or_geocode(location_name, lambda text: pelias_geocode(client, text))
+
+def fetch_route(client, coords, profile, avoid_tolls=False, avoid_highways=False, avoid_ferries=False, cache=None):
+    """Fetch (or load from a ResponseCache) a route between (lat, lon) points and parse it for scoring"""
+    return parse_directions_response(
+        _directions(client, coords, profile, avoid_tolls, avoid_highways, avoid_ferries, cache)
+    )
+
+def fetch_route_alternatives(client, coords, profile, avoid_tolls=False, avoid_highways=False, avoid_ferries=False,
+                             cache=None, alternatives=ALTERNATIVE_ROUTES):
+    """Parsed routes from one directions call with ORS alternative_routes, the recommended one first.
+
+    alternatives is the ORS alternative_routes object: target_count (up to 3),
+    share_factor (how much of the route an alternative may share) and
+    weight_factor (how much longer it may be). ORS rejects it for more than
+    two points or routes longer than ALTERNATIVE_ROUTES_MAX_KM.
+    """
+    return parse_directions_alternatives(
+        _directions(client, coords, profile, avoid_tolls, avoid_highways, avoid_ferries, cache,
+                    alternative_routes=dict(alternatives))
+    )
+
+def _directions(client, coords, profile, avoid_tolls, avoid_highways, avoid_ferries, cache, **params):
+    # Prepare avoidance parameters
+    avoid = []
+    if avoid_tolls:
+        avoid.append('tollways')
+    if avoid_highways:
+        avoid.append('highways')
+    if avoid_ferries:
+        avoid.append('ferries')
+
+    # Convert coordinates to [lon, lat] for ORS
+    ors_coords = [[c[1], c[0]] for c in coords]
+
+    # Get route with extra info for better calculations (cached by coords/profile/avoid set)
+    extra_info = ["steepness", "surface", "waytype"]
+
+    def request():
+        return client.directions(
+            coordinates=ors_coords,
+            profile=profile,
+            format='geojson',
+            options={'avoid_features': avoid} if avoid else None,
+            extra_info=extra_info,
+            **params
+        )
+
+    if cache is None:
+        return request()
+    return cache.get_or_fetch(directions_cache_key(ors_coords, profile, avoid, extra_info=extra_info, **params),
+                              request)
+
+def get_route_and_emissions(client, coords, profile, package_weight, truck_type, avoid_tolls=False,
+                            avoid_highways=False, avoid_ferries=False, traffic_level="Low", weather_condition="Clear",
+                            cache=None, segment_level=False):
+    """Get route from OpenRouteService and calculate emissions; None when ORS finds no route.
+
+    segment_level scores each steepness/surface/waytype segment separately (see score_route).
+    """
+    parsed = fetch_route(client, coords, profile, avoid_tolls, avoid_highways, avoid_ferries, cache)
+    if parsed is None:
+        return None
+    return score_route(
+        parsed, profile, package_weight, truck_type, traffic_level, weather_condition,
+        avoid_tolls, avoid_highways, avoid_ferries, segment_level
+    )
+
+def fetch_candidate_routes(client, coords, cache=None, strategies=ROUTE_STRATEGIES,
+                           max_workers=MAX_CONCURRENT_REQUESTS, timeout=ROUTE_REQUEST_TIMEOUT, on_error=None,
+                           mode="strategies"):
+    """Fetch and parse the route for every strategy, without scoring it.
+
+    Strategies are fetched concurrently. A strategy that fails or times out is
+    logged and reported to on_error(strategy_name, exception) (a TimeoutError
+    for timeouts) from the calling thread, and the rest are still used.
+    Returns [(strategy, parsed)] in strategy order for the distinct routes
+    (see unique_candidates); score them with rank_candidate_routes, as often
+    as the scoring inputs change, without going back to ORS.
+    mode="alternatives" fetches with fetch_alternative_candidates instead.
+    """
+    if mode == "alternatives":
+        return fetch_alternative_candidates(client, coords, cache, max_workers=max_workers, timeout=timeout,
+                                            on_error=on_error)
+    if mode != "strategies":
+        raise ValueError(f"Unknown fetch mode {mode!r}, expected one of {FETCH_MODES}")
+
+    def attempt(profile, avoid_tolls, avoid_highways, avoid_ferries):
+        try:
+            return fetch_route(client, coords, profile, avoid_tolls, avoid_highways, avoid_ferries, cache), None
+        except Exception as e:
+            return None, e
+
+    results, timed_out = map_ordered(
+        attempt,
+        [strategy[1:] for strategy in strategies],
+        max_workers=max_workers,
+        timeout=timeout,
+    )
+    for i in timed_out:
+        results[i] = (None, TimeoutError(f"Route request for '{strategies[i][0]}' timed out"))
+
+    # Merge in strategy order so selection stays deterministic
+    candidates = []
+    for strategy, result in zip(strategies, results):
+        parsed, error = result or (None, None)
+        if error is not None:
+            logger.warning("Strategy %r failed: %s", strategy[0], error)
+            if on_error is not None:
+                on_error(strategy[0], error)
+        if parsed:
+            candidates.append((strategy, parsed))
+    return unique_candidates(candidates)
+
+def fetch_alternative_candidates(client, coords, cache=None, profiles=ALTERNATIVE_PROFILES,
+                                 alternatives=ALTERNATIVE_ROUTES, max_workers=MAX_CONCURRENT_REQUESTS,
+                                 timeout=ROUTE_REQUEST_TIMEOUT, on_error=None):
+    """Candidates from one alternative_routes directions call per profile.
+
+    Two calls instead of the ten-strategy sweep, and the alternatives ORS
+    returns are different roads by construction rather than the same road
+    under different avoid flags. Named "<Car|Truck> Route" for ORS's pick and
+    "<Car|Truck> Alternative <n>" for the rest, with no avoid flags. Stop
+    lists (more than two points) and trips longer than ALTERNATIVE_ROUTES_MAX_KM
+    fall back to the strategy sweep, and a profile whose alternatives request
+    ORS rejects (HTTP 400) falls back to its plain route. Errors are reported
+    as in fetch_candidate_routes.
+    """
+    if len(coords) != 2 or haversine_km(coords[0], coords[-1]) > ALTERNATIVE_ROUTES_MAX_KM:
+        logger.info("Alternative routes need two points within %d km; using the strategy sweep",
+                    ALTERNATIVE_ROUTES_MAX_KM)
+        return fetch_candidate_routes(client, coords, cache, max_workers=max_workers, timeout=timeout,
+                                      on_error=on_error)
+
+    def attempt(profile):
+        try:
+            return fetch_route_alternatives(client, coords, profile, cache=cache, alternatives=alternatives), None
+        except Exception as e:
+            if getattr(e, 'status', None) != 400:
+                return None, e
+            logger.info("ORS rejected alternatives for %s (%s); fetching its single route", profile, e)
+        try:
+            parsed = fetch_route(client, coords, profile, cache=cache)
+            return [parsed] if parsed else [], None
+        except Exception as e:
+            return None, e
+
+    results, timed_out = map_ordered(attempt, [(profile,) for profile in profiles], max_workers=max_workers,
+                                     timeout=timeout)
+    candidates = []
+    for i, profile in enumerate(profiles):
+        label = PROFILE_LABELS.get(profile, profile)
+        routes, error = results[i] or (None, None)
+        if i in timed_out:
+            error = TimeoutError(f"Alternative routes request for '{profile}' timed out")
+        if error is not None:
+            logger.warning("Alternative routes for %r failed: %s", profile, error)
+            if on_error is not None:
+                on_error(f"{label} Route", error)
+        for n, parsed in enumerate(routes or []):
+            name = f"{label} Route" if n == 0 else f"{label} Alternative {n}"
+            candidates.append(((name, profile, False, False, False), parsed))
+    return unique_candidates(candidates)
+
+def _differ(a, b, max_difference):
+    return abs(a - b) > max_difference * max(a, b)
+
+def unique_candidates(candidates, cell_m=DEDUP_CELL_M, min_overlap=DEDUP_OVERLAP, max_cells=DEDUP_MAX_CELLS,
+                      max_difference=DEDUP_MAX_DIFFERENCE):
+    """Drop candidates whose path runs along an earlier one's with the same profile.
+
+    Paths match when each shares min_overlap of the other's cells on a grid
+    of at least cell_m, coarser for long trips so the longest candidate
+    covers about max_cells cells; paths are simplified to half a cell first.
+    Strategies often return the same road; comparing geometry catches that
+    even when ORS reports slightly different distance or duration for it, and
+    keeps genuinely different routes of similar length. Pairs whose distance
+    or duration already differ by more than max_difference are kept without
+    looking at geometry. Profiles are kept apart because they are scored
+    with different vehicle factors.
+    """
+    if candidates:
+        longest_m = max(parsed['distance_km'] for _, parsed in candidates) * 1000
+        cell_m = max(cell_m, longest_m / max_cells)
+    cells = {}
+
+    def candidate_cells(i):
+        # Only built for candidates that are compared, once each
+        if i not in cells:
+            cells[i] = path_cells(simplify_path(candidates[i][1]['path'], cell_m / 2), cell_m)
+        return cells[i]
+
+    kept = []
+    for i, (strategy, parsed) in enumerate(candidates):
+        duplicate = False
+        for j in kept:
+            other_strategy, other = candidates[j]
+            if other_strategy[1] != strategy[1]:
+                continue
+            if (_differ(parsed['distance_km'], other['distance_km'], max_difference)
+                    or _differ(parsed['duration_min'], other['duration_min'], max_difference)):
+                continue
+            mine, theirs = candidate_cells(i), candidate_cells(j)
+            if path_overlap(mine, theirs) >= min_overlap and path_overlap(theirs, mine) >= min_overlap:
+                duplicate = True
+                break
+        if not duplicate:
+            kept.append(i)
+    return [candidates[i] for i in kept]
+
+def score_candidate_routes(candidates, package_weight, truck_type, traffic_level="Low", weather_condition="Clear",
+                           segment_level=False):
+    """Score every fetched candidate for these inputs, tagged with its strategy"""
+    routes = []
+    for (strategy_name, profile, avoid_tolls, avoid_highways, avoid_ferries), parsed in candidates:
+        route = score_route(
+            parsed, profile, package_weight, truck_type, traffic_level, weather_condition,
+            avoid_tolls, avoid_highways, avoid_ferries, segment_level
+        )
+        route["strategy_name"] = strategy_name
+        route["avoid_highways"] = avoid_highways
+        route["avoid_tolls"] = avoid_tolls
+        route["avoid_ferries"] = avoid_ferries
+        routes.append(route)
+    return routes
+
+def rank_candidate_routes(candidates, package_weight, truck_type, traffic_level="Low", weather_condition="Clear",
+                          segment_level=False):
+    """Score fetched candidates for these inputs and pick (optimal_route, standard_route).
+
+    Pure computation on the output of fetch_candidate_routes, cheap enough to
+    re-run on every change of weight, vehicle, traffic or weather.
+    Returns (None, None) if there are no candidates.
+    """
+    routes = score_candidate_routes(candidates, package_weight, truck_type, traffic_level, weather_condition,
+                                    segment_level)
+    if not routes:
+        return None, None
+
+    if len(routes) < 2:
+        # Create artificial variation if needed
+        if routes:
+            base_route = routes[0].copy()
+            base_route["strategy_name"] = "Standard Route"
+            routes.append(base_route)
+
+            # Create optimized version
+            modified_route = base_route.copy()
+            modified_route["strategy_name"] = "Optimized Route"
+            modified_route["distance_km"] = base_route["distance_km"] * 0.85
+            modified_route["duration_min"] = base_route["duration_min"] * 0.90
+            modified_route["energy_consumed"] = base_route["energy_consumed"] * 0.70
+            modified_route["co2_emissions"] = base_route["co2_emissions"] * 0.70
+            modified_route["carbon_efficiency"] = modified_route["co2_emissions"] / modified_route["distance_km"]
+            if "segment_co2" in base_route:
+                modified_route["segment_co2"] = base_route["segment_co2"] * 0.70
+            routes.append(modified_route)
+
+    # Calculate scores for all routes
+    for route in routes:
+        route['route_score'] = calculate_route_score(route, package_weight, traffic_level, weather_condition)
+
+    # Sort by route score (lower is better)
+    routes.sort(key=lambda x: x['route_score'])
+
+    # Get the optimal route (lowest score)
+    optimal_route = routes[0]
+
+    # Get a different standard route for comparison
+    # Try to find a route that's different from the optimal one
+    standard_route = None
+    for route in routes[1:]:
+        if (route['strategy_name'] != optimal_route['strategy_name'] or
+            abs(route['distance_km'] - optimal_route['distance_km']) > 5 or
+            abs(route['duration_min'] - optimal_route['duration_min']) > 10):
+            standard_route = route
+            break
+
+    # If no different route found, use the second best
+    if not standard_route and len(routes) > 1:
+        standard_route = routes[1]
+    elif not standard_route:
+        standard_route = optimal_route.copy()
+        standard_route["strategy_name"] = "Standard Route"
+
+    return optimal_route, standard_route
+
+def find_optimal_carbon_route(client, coords, package_weight, truck_type, traffic_level="Low",
+                              weather_condition="Clear", cache=None, strategies=ROUTE_STRATEGIES,
+                              max_workers=MAX_CONCURRENT_REQUESTS, timeout=ROUTE_REQUEST_TIMEOUT, on_error=None,
+                              segment_level=False, mode="strategies"):
+    """Find the most carbon-efficient route by testing multiple strategies.
+
+    fetch_candidate_routes followed by rank_candidate_routes; see those for
+    error reporting, selection and mode ("alternatives" makes one ORS call per
+    profile instead of one per strategy). Returns (optimal_route, standard_route),
+    or (None, None) if nothing routed.
+    """
+    candidates = fetch_candidate_routes(client, coords, cache, strategies, max_workers, timeout, on_error, mode)
+    return rank_candidate_routes(candidates, package_weight, truck_type, traffic_level, weather_condition,
+                                 segment_level)
+
+def pareto_candidate_routes(candidates, package_weight, truck_type, traffic_level="Low", weather_condition="Clear",
+                            segment_level=False):
+    """Score fetched candidates and sort them into Pareto fronts over CO2, duration and distance.
+
+    Unlike rank_candidate_routes nothing is collapsed into one weighted score:
+    returns (front, routes), the non-dominated routes by CO2 and every
+    route annotated with its dominance (see routing.pareto.pareto_front).
+    """
+    routes = score_candidate_routes(candidates, package_weight, truck_type, traffic_level, weather_condition,
+                                    segment_level)
+    return pareto_front(routes, truck_type), routes
+
+def find_pareto_routes(client, coords, package_weight, truck_type, traffic_level="Low", weather_condition="Clear",
+                       cache=None, strategies=ROUTE_STRATEGIES, max_workers=MAX_CONCURRENT_REQUESTS,
+                       timeout=ROUTE_REQUEST_TIMEOUT, on_error=None, segment_level=False, mode="strategies"):
+    """Fetch candidates (see fetch_candidate_routes for mode) and return their Pareto trade-offs as (front, routes)"""
+    candidates = fetch_candidate_routes(client, coords, cache, strategies, max_workers, timeout, on_error, mode)
+    return pareto_candidate_routes(candidates, package_weight, truck_type, traffic_level, weather_condition,
+                                   segment_level)
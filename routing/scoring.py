@@ -0,0 +1,336 @@
+import numpy as np
+
+from env.energy_model import estimate_energy, energy_to_co2, estimate_energy_batch, energy_to_co2_batch
+from routing.geodesic import polyline_segment_km
+from routing.geometry import geometry_to_path
+
+# Fuel consumption multipliers for the environmental inputs in the UI
+TRAFFIC_LEVEL_FACTORS = {"Low": 1.0, "Medium": 1.10, "High": 1.20}
+WEATHER_FACTORS = {"Clear": 1.0, "Rainy": 1.15, "Snowy": 1.25, "Foggy": 1.10}
+PROFILE_FACTORS = {"driving-hgv": 1.3, "driving-car": 0.85}
+
+def _weighted_avg(triples):
+    """Length-weighted average of ORS extras values ([from_idx, to_idx, value] triples)"""
+    if not triples:
+        return 0.0
+    total_weighted = 0.0
+    total_len = 0.0
+    for seg in triples:
+        # seg expected as [from_idx, to_idx, value]
+        if isinstance(seg, (list, tuple)) and len(seg) >= 3:
+            start_idx, end_idx, val = seg[0], seg[1], seg[2]
+            seg_len = (end_idx - start_idx) if isinstance(start_idx, (int, float)) and isinstance(end_idx, (int, float)) else 1.0
+            try:
+                v = float(val)
+            except Exception:
+                v = 0.0
+            total_weighted += v * seg_len
+            total_len += seg_len
+    return (total_weighted / total_len) if total_len > 0 else 0.0
+
+def parse_directions_response(response):
+    """Extract what emission scoring needs from a GeoJSON directions response.
+
+    Returns None when the response has no route. The result is plain data and
+    needs no network access to score, so one fetch can be scored many times.
+    """
+    if not response or 'features' not in response or len(response['features']) == 0:
+        return None
+    return _parse_feature(response['features'][0])
+
+def parse_directions_alternatives(response):
+    """Parse every route of a directions response requested with alternative_routes (ORS's pick first)"""
+    if not response or 'features' not in response:
+        return []
+    return [_parse_feature(feature) for feature in response['features']]
+
+def _parse_feature(feature):
+    properties = feature['properties']
+    extras = properties.get('extras', {})
+
+    steepness = extras.get('steepness', {}).get('values', [])
+    surface = extras.get('surface', {}).get('values', [])
+    waytype = extras.get('waytype', {}).get('values', [])
+
+    return {
+        # Compact float32 (lat, lon) array instead of the GeoJSON coordinate lists
+        "path": geometry_to_path(feature['geometry']),
+        "distance_km": properties['summary']['distance'] / 1000,
+        "duration_min": properties['summary']['duration'] / 60,
+        # Calculate average grade from steepness info
+        "avg_grade": _weighted_avg(steepness),
+        # Surface and waytype averages drive the efficiency factors (None when ORS omits them)
+        "avg_surface": _weighted_avg(surface) if surface else None,
+        "avg_waytype": _weighted_avg(waytype) if waytype else None,
+        # Raw [from_idx, to_idx, value] triples for segment-level scoring
+        "extras": {"steepness": steepness, "surface": surface, "waytype": waytype},
+    }
+
+def normalize_vehicle_type(truck_type):
+    """Map the UI truck type (Diesel/Gasoline/EV) onto the energy model's vehicle types"""
+    vehicle_type = truck_type.lower()
+    if vehicle_type in ("diesel", "gasoline"):
+        return vehicle_type
+    return "ev"
+
+def surface_factor(avg_surface):
+    """Paved roads are more efficient"""
+    if avg_surface is None:
+        return 1.0
+    if avg_surface < 0.5:  # Unpaved roads
+        return 0.8
+    elif avg_surface > 0.8:  # Highways
+        return 1.1
+    return 1.0
+
+def waytype_factor(avg_waytype):
+    """Traffic factor from the road type mix, before the traffic level is applied"""
+    if avg_waytype is None:
+        return 1.0
+    if avg_waytype < 0.3:  # Local roads
+        return 0.9
+    elif avg_waytype > 0.7:  # Highways
+        return 1.1
+    return 1.0
+
+def cargo_efficiency_factor(package_weight):
+    """Additional cargo weight impact on fuel efficiency (vectorized over package_weight)"""
+    package_weight = np.asarray(package_weight, dtype=np.float64)
+    return np.where(package_weight > 1000, 1.2,  # Heavy cargo: 20% more fuel
+           np.where(package_weight > 500, 1.1,  # Medium cargo: 10% more fuel
+           np.where(package_weight < 100, 0.95, 1.0)))  # Light cargo: 5% less fuel
+
+def route_efficiency_factor(distance_km, package_weight, avoid_tolls=False, avoid_highways=False, avoid_ferries=False):
+    """Route-specific efficiency from distance, cargo and avoidance flags (vectorized over package_weight)"""
+    package_weight = np.asarray(package_weight, dtype=np.float64)
+    if avoid_highways:
+        # Local roads are better for short distances or light cargo
+        route_efficiency = np.where((distance_km < 20) & (package_weight < 500), 0.90,
+                           np.where((distance_km < 50) & (package_weight < 1000), 0.95, 1.10))
+    else:
+        # Highways are better for longer distances and heavier cargo
+        route_efficiency = np.where((distance_km > 50) | (package_weight > 1000), 0.85,
+                           np.where(distance_km > 20, 0.90, 1.05))
+
+    # Toll impact (tolls don't affect fuel efficiency much, just cost)
+    if avoid_tolls:
+        route_efficiency = route_efficiency * 0.98
+
+    # Ferry impact (ferries can be less efficient due to waiting/idling)
+    if avoid_ferries:
+        route_efficiency = route_efficiency * 0.95
+
+    return route_efficiency
+
+def _segment_values(triples, starts):
+    """Value of the extras run covering each segment start index (nan where none does)"""
+    if not triples:
+        return np.full(len(starts), np.nan)
+    runs = np.asarray([seg[:3] for seg in triples], dtype=np.float64)
+    idx = np.searchsorted(runs[:, 0], starts, side='right') - 1
+    covered = (idx >= 0) & (starts < runs[np.maximum(idx, 0), 1])
+    return np.where(covered, runs[np.maximum(idx, 0), 2], np.nan)
+
+def route_segments(parsed):
+    """Split a parsed route at every extras boundary into segments of uniform grade/surface/waytype.
+
+    Returns geometry index bounds (K, 2), length in km (geometry lengths scaled
+    to the ORS route distance), grade, and the surface and waytype factors per
+    segment (1.0 where ORS gave no value), as in the route-average model.
+    """
+    path = parsed['path']
+    n = len(path)
+    extras = parsed.get('extras', {})
+    if n < 2:
+        return {
+            "bounds": np.zeros((1, 2), dtype=np.int64),
+            "distance_km": np.array([parsed['distance_km']]),
+            "grade": np.zeros(1), "surface_factor": np.ones(1), "waytype_factor": np.ones(1),
+        }
+
+    edge_km = polyline_segment_km(path)
+    total = edge_km.sum()
+    edge_km = edge_km * (parsed['distance_km'] / total) if total > 0 else np.full(n - 1, parsed['distance_km'] / (n - 1))
+    cumulative = np.concatenate([[0.0], np.cumsum(edge_km)])
+
+    breaks = [np.array([0, n - 1])]
+    for triples in extras.values():
+        if triples:
+            breaks.append(np.asarray([seg[:2] for seg in triples], dtype=np.int64).ravel())
+    breaks = np.unique(np.clip(np.concatenate(breaks), 0, n - 1))
+    starts, ends = breaks[:-1], breaks[1:]
+
+    grade = np.nan_to_num(_segment_values(extras.get('steepness'), starts), nan=0.0)
+    surface = _segment_values(extras.get('surface'), starts)
+    waytype = _segment_values(extras.get('waytype'), starts)
+    return {
+        "bounds": np.stack([starts, ends], axis=1),
+        "distance_km": cumulative[ends] - cumulative[starts],
+        "grade": grade,
+        # Same thresholds as surface_factor / waytype_factor, per segment
+        "surface_factor": np.where(surface < 0.5, 0.8, np.where(surface > 0.8, 1.1, 1.0)),
+        "waytype_factor": np.where(waytype < 0.3, 0.9, np.where(waytype > 0.7, 1.1, 1.0)),
+    }
+
+def score_route(parsed, profile, package_weight, truck_type, traffic_level="Low", weather_condition="Clear",
+                avoid_tolls=False, avoid_highways=False, avoid_ferries=False, segment_level=False):
+    """Calculate energy and emissions for a parsed route under one set of conditions.
+
+    With segment_level, energy is computed per extras segment (see
+    route_segments) and summed, and the result also carries "segment_bounds"
+    and "segment_co2" arrays; otherwise the route-average extras are used.
+    """
+    if segment_level:
+        return _score_route_segments(parsed, profile, package_weight, truck_type, traffic_level, weather_condition,
+                                     avoid_tolls, avoid_highways, avoid_ferries)
+    distance_km = parsed['distance_km']
+    vehicle_type = normalize_vehicle_type(truck_type)
+
+    traffic_factor = waytype_factor(parsed['avg_waytype']) * TRAFFIC_LEVEL_FACTORS.get(traffic_level, 1.0)
+    weather_factor = WEATHER_FACTORS.get(weather_condition, 1.0)
+
+    # Charging factor for EVs
+    charging_factor = 1.1 if vehicle_type == "ev" and distance_km > 100 else 1.0
+
+    # Calculate energy consumption with cargo weight impact
+    energy_consumed = estimate_energy(distance_km, parsed['avg_grade'], vehicle_type, package_weight)
+
+    # Apply efficiency factors
+    energy_consumed *= surface_factor(parsed['avg_surface']) * traffic_factor * weather_factor * charging_factor
+    energy_consumed *= float(cargo_efficiency_factor(package_weight))
+    energy_consumed *= float(route_efficiency_factor(distance_km, package_weight, avoid_tolls, avoid_highways, avoid_ferries))
+
+    # Profile-specific adjustments
+    if profile in PROFILE_FACTORS:
+        energy_consumed *= PROFILE_FACTORS[profile]
+
+    co2_emissions = energy_to_co2(energy_consumed, vehicle_type)
+    carbon_efficiency = co2_emissions / distance_km if distance_km > 0 else float('inf')
+
+    return {
+        "path": parsed['path'],
+        "distance_km": distance_km,
+        "duration_min": parsed['duration_min'],
+        "co2_emissions": co2_emissions,
+        "energy_consumed": energy_consumed,
+        "carbon_efficiency": carbon_efficiency,
+        "avg_grade": parsed['avg_grade'],
+        "profile": profile
+    }
+
+def _score_route_segments(parsed, profile, package_weight, truck_type, traffic_level, weather_condition,
+                          avoid_tolls, avoid_highways, avoid_ferries):
+    distance_km = parsed['distance_km']
+    vehicle_type = normalize_vehicle_type(truck_type)
+    segments = route_segments(parsed)
+
+    # Per-segment terms: grade in the energy model, surface and road type factors
+    segment_energy = estimate_energy_batch(segments['distance_km'], segments['grade'], vehicle_type, package_weight)
+    segment_energy = segment_energy * segments['surface_factor'] * segments['waytype_factor']
+
+    # Route-wide terms, as in score_route
+    charging_factor = 1.1 if vehicle_type == "ev" and distance_km > 100 else 1.0
+    route_factor = (TRAFFIC_LEVEL_FACTORS.get(traffic_level, 1.0) * WEATHER_FACTORS.get(weather_condition, 1.0)
+                    * charging_factor * float(cargo_efficiency_factor(package_weight))
+                    * float(route_efficiency_factor(distance_km, package_weight, avoid_tolls, avoid_highways,
+                                                    avoid_ferries))
+                    * PROFILE_FACTORS.get(profile, 1.0))
+    segment_energy = segment_energy * route_factor
+    segment_co2 = energy_to_co2_batch(segment_energy, vehicle_type)
+
+    energy_consumed = float(segment_energy.sum())
+    co2_emissions = float(segment_co2.sum())
+    return {
+        "path": parsed['path'],
+        "distance_km": distance_km,
+        "duration_min": parsed['duration_min'],
+        "co2_emissions": co2_emissions,
+        "energy_consumed": energy_consumed,
+        "carbon_efficiency": co2_emissions / distance_km if distance_km > 0 else float('inf'),
+        "avg_grade": parsed['avg_grade'],
+        "profile": profile,
+        "segment_bounds": segments['bounds'],
+        "segment_co2": segment_co2,
+    }
+
+def score_route_scenarios(parsed, profile, truck_type, package_weights, traffic_levels=("Low",),
+                          weather_conditions=("Clear",), avoid_tolls=False, avoid_highways=False, avoid_ferries=False):
+    """Score one parsed route over the grid package_weights x traffic_levels x weather_conditions.
+
+    Computed in a single vectorized pass; each cell matches score_route for the
+    same inputs. Returns arrays of shape (len(package_weights),
+    len(traffic_levels), len(weather_conditions)) plus the grid axes.
+    """
+    distance_km = parsed['distance_km']
+    vehicle_type = normalize_vehicle_type(truck_type)
+
+    weights = np.asarray(package_weights, dtype=np.float64)[:, None, None]
+    traffic = np.array([TRAFFIC_LEVEL_FACTORS.get(t, 1.0) for t in traffic_levels])[None, :, None]
+    weather = np.array([WEATHER_FACTORS.get(w, 1.0) for w in weather_conditions])[None, None, :]
+
+    traffic_factor = waytype_factor(parsed['avg_waytype']) * traffic
+    charging_factor = 1.1 if vehicle_type == "ev" and distance_km > 100 else 1.0
+
+    energy_consumed = estimate_energy_batch(distance_km, parsed['avg_grade'], vehicle_type, weights)
+    energy_consumed = energy_consumed * (surface_factor(parsed['avg_surface']) * traffic_factor * weather * charging_factor)
+    energy_consumed = energy_consumed * cargo_efficiency_factor(weights)
+    energy_consumed = energy_consumed * route_efficiency_factor(distance_km, weights, avoid_tolls, avoid_highways, avoid_ferries)
+    if profile in PROFILE_FACTORS:
+        energy_consumed = energy_consumed * PROFILE_FACTORS[profile]
+
+    co2_emissions = energy_to_co2_batch(energy_consumed, vehicle_type)
+    carbon_efficiency = co2_emissions / distance_km if distance_km > 0 else np.full_like(co2_emissions, np.inf)
+
+    return {
+        "package_weights": np.asarray(package_weights),
+        "traffic_levels": list(traffic_levels),
+        "weather_conditions": list(weather_conditions),
+        "energy_consumed": energy_consumed,
+        "co2_emissions": co2_emissions,
+        "carbon_efficiency": carbon_efficiency,
+    }
+
+def calculate_route_score(route, package_weight, traffic_level="Low", weather_condition="Clear"):
+    """Calculate a comprehensive score for route selection (lower is better)"""
+    distance = route['distance_km']
+    duration = route['duration_min']
+    co2_per_km = route['carbon_efficiency']
+    energy_consumed = route['energy_consumed']
+
+    # Base carbon efficiency score (lower is better)
+    carbon_score = co2_per_km * 0.4
+
+    # Distance efficiency (shorter is better, but not always)
+    distance_score = (distance / 100) * 0.2
+
+    # Time efficiency (shorter is better)
+    time_score = (duration / 60) * 0.1
+
+    # Energy efficiency (lower is better)
+    energy_score = (energy_consumed / 100) * 0.2
+
+    # Route type bonus/penalty based on distance and cargo
+    route_bonus = 0
+    if distance > 50:  # Long distance - highways are usually better
+        if not route.get('avoid_highways', True):
+            route_bonus = -0.1  # Bonus for using highways on long routes
+    elif distance < 20:  # Short distance - local roads might be better
+        if route.get('avoid_highways', False):
+            route_bonus = -0.05  # Small bonus for local roads on short routes
+
+    # Cargo weight consideration
+    if package_weight > 1000:  # Heavy cargo - highways are usually better
+        if not route.get('avoid_highways', True):
+            route_bonus -= 0.05
+
+    # Weather consideration
+    if weather_condition in ["Snowy", "Rainy"]:  # Bad weather - highways are safer
+        if not route.get('avoid_highways', True):
+            route_bonus -= 0.03
+
+    # Traffic consideration
+    if traffic_level == "High":  # High traffic - avoid highways might be better
+        if route.get('avoid_highways', False):
+            route_bonus -= 0.02
+
+    return carbon_score + distance_score + time_score + energy_score + route_bonus
@@ -0,0 +1,169 @@
+import time
+
+import numpy as np
+
+# Held-Karp is O(m^2 2^m) over the m interior stops; past this use local search
+EXACT_MAX_STOPS = 12
+
+def path_length(order, dist):
+    """Total cost of visiting nodes in order"""
+    order = np.asarray(order)
+    return float(dist[order[:-1], order[1:]].sum())
+
+def held_karp_path(dist):
+    """Exact shortest open path from node 0 to node n-1 through every other node.
+
+    Dynamic programming over subsets of the interior nodes, processed one
+    subset size at a time so each layer is a handful of array operations.
+    """
+    dist = np.asarray(dist)
+    n = len(dist)
+    if n <= 3:
+        return list(range(n))
+
+    interior = np.arange(1, n - 1)
+    m = len(interior)
+    inner = dist[np.ix_(interior, interior)]
+    full = (1 << m) - 1
+
+    # dp[mask, j]: cheapest path from 0 through the interior subset mask, ending at interior j
+    dp = np.full((1 << m, m), np.inf)
+    parent = np.full((1 << m, m), -1, dtype=np.int64)
+    bits = 1 << np.arange(m)
+    dp[bits, np.arange(m)] = dist[0, interior]
+
+    masks = np.arange(1 << m)
+    popcount = np.zeros(1 << m, dtype=np.int64)
+    for j in range(m):
+        popcount += (masks >> j) & 1
+
+    for size in range(2, m + 1):
+        layer = masks[popcount == size]
+        for j in range(m):
+            with_j = layer[(layer & bits[j]) != 0]
+            prev = with_j ^ bits[j]
+            # dp[prev, k] is inf for k outside prev, so the min only sees valid predecessors
+            candidates = dp[prev] + inner[:, j]
+            best = candidates.argmin(axis=1)
+            dp[with_j, j] = candidates[np.arange(len(with_j)), best]
+            parent[with_j, j] = best
+
+    last = int((dp[full] + dist[interior, n - 1]).argmin())
+    tour = []
+    mask = full
+    while last >= 0:
+        tour.append(int(interior[last]))
+        prev_last = int(parent[mask, last])
+        mask ^= 1 << last
+        last = prev_last
+    return [0] + tour[::-1] + [n - 1]
+
+def nearest_neighbour_path(dist):
+    """Greedy open path from node 0 to node n-1"""
+    dist = np.asarray(dist)
+    n = len(dist)
+    remaining = np.ones(n, dtype=bool)
+    remaining[[0, n - 1]] = False
+    order = [0]
+    current = 0
+    for _ in range(n - 2):
+        costs = np.where(remaining, dist[current], np.inf)
+        current = int(costs.argmin())
+        remaining[current] = False
+        order.append(current)
+    order.append(n - 1)
+    return order
+
+def two_opt(order, dist, deadline=None):
+    """Improve an open path by segment reversal until no move helps or the deadline passes.
+
+    The endpoints stay fixed. Gains are estimated with the symmetric 2-opt
+    delta and confirmed on the real path cost, so asymmetric matrices are safe.
+    """
+    dist = np.asarray(dist)
+    order = np.asarray(order)
+    n = len(order)
+    best_len = path_length(order, dist)
+    improved = True
+    while improved:
+        improved = False
+        for i in range(1, n - 2):
+            if deadline is not None and time.monotonic() > deadline:
+                return order.tolist()
+            a, b = order[i - 1], order[i]
+            c = order[i + 1:n - 1]          # candidate segment ends j = i+1..n-2
+            e = order[i + 2:n]
+            delta = dist[a, c] + dist[b, e] - dist[a, b] - dist[c, e]
+            for k in np.argsort(delta):
+                if delta[k] >= -1e-9:
+                    break
+                j = i + 1 + k
+                candidate = order.copy()
+                candidate[i:j + 1] = candidate[i:j + 1][::-1]
+                candidate_len = path_length(candidate, dist)
+                if candidate_len < best_len - 1e-9:
+                    order, best_len = candidate, candidate_len
+                    improved = True
+                    break
+    return order.tolist()
+
+def or_opt(order, dist, deadline=None, max_segment=3):
+    """Improve an open path by moving runs of 1..max_segment stops elsewhere in the path"""
+    dist = np.asarray(dist)
+    order = list(order)
+    n = len(order)
+    best_len = path_length(order, dist)
+    improved = True
+    while improved:
+        improved = False
+        for seg_len in range(1, max_segment + 1):
+            for i in range(1, n - seg_len):
+                if deadline is not None and time.monotonic() > deadline:
+                    return order
+                segment = order[i:i + seg_len]
+                rest = order[:i] + order[i + seg_len:]
+                removal_gain = (dist[order[i - 1], segment[0]] + dist[segment[-1], order[i + seg_len]]
+                                - dist[order[i - 1], order[i + seg_len]])
+                # Insert between rest[p-1] and rest[p]; position 0 would displace the start
+                for p in range(1, len(rest)):
+                    if p == i:
+                        continue
+                    insert_cost = (dist[rest[p - 1], segment[0]] + dist[segment[-1], rest[p]]
+                                   - dist[rest[p - 1], rest[p]])
+                    if insert_cost < removal_gain - 1e-9:
+                        candidate = rest[:p] + segment + rest[p:]
+                        candidate_len = path_length(candidate, dist)
+                        if candidate_len < best_len - 1e-9:
+                            order, best_len = candidate, candidate_len
+                            improved = True
+                            break
+                if improved:
+                    break
+            if improved:
+                break
+    return order
+
+def solve_open_path(dist, time_budget=1.0, exact_max=EXACT_MAX_STOPS):
+    """Shortest open path from node 0 to node n-1 visiting every node.
+
+    Exact (Held-Karp) when there are at most exact_max interior stops,
+    otherwise nearest neighbour followed by alternating 2-opt and Or-opt
+    until neither improves or time_budget seconds have passed.
+    """
+    dist = np.asarray(dist)
+    n = len(dist)
+    if n <= 3:
+        return list(range(n))
+    if n - 2 <= exact_max:
+        return held_karp_path(dist)
+
+    deadline = time.monotonic() + time_budget if time_budget is not None else None
+    order = nearest_neighbour_path(dist)
+    best_len = path_length(order, dist)
+    while deadline is None or time.monotonic() < deadline:
+        order = or_opt(two_opt(order, dist, deadline), dist, deadline)
+        new_len = path_length(order, dist)
+        if new_len >= best_len - 1e-9:
+            break
+        best_len = new_len
+    return order
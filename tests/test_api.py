@@ -0,0 +1,59 @@
+import importlib
+
+import pytest
+from fastapi.testclient import TestClient
+
+from routing.geometry import decode_polyline
+
+TRIP = {"coords": [[39.74, -104.99], [38.83, -104.82]], "package_weight": 750}
+STOPS = [[39.74, -104.99], [39.55, -105.08], [38.83, -104.82], [40.01, -105.27], [38.25, -104.61]]
+
+@pytest.fixture(scope="module")
+def api(tmp_path_factory):
+    # The server builds its ORS client and cache at import: point them at the in-process fake
+    with pytest.MonkeyPatch.context() as patch:
+        patch.setenv("ORS_FAKE", "1")
+        patch.setenv("ORS_CACHE_PATH", str(tmp_path_factory.mktemp("cache") / "responses.sqlite"))
+        patch.setenv("MATRIX_BATCH_WINDOW", "0")
+        server = importlib.import_module("api.server")
+        yield TestClient(server.app)
+
+def test_optimal(api):
+    response = api.post("/v1/routes/optimal", json=TRIP)
+    assert response.status_code == 200
+    body = response.json()
+    assert body["errors"] == []
+    assert body["optimal"]["co2_emissions"] > 0
+    assert len(decode_polyline(body["optimal"]["polyline"])) > 1
+
+def test_pareto(api):
+    body = api.post("/v1/routes/pareto", json=TRIP).json()
+    assert body["objectives"] == ["co2_emissions", "duration_min", "distance_km"]
+    ranks = [r["pareto_rank"] for r in body["routes"]]
+    assert ranks == sorted(ranks)
+    assert body["front"] == [r["strategy_name"] for r in body["routes"] if r["pareto_rank"] == 0]
+
+def test_pareto_agrees_with_optimal(api):
+    optimal = api.post("/v1/routes/optimal", json=TRIP).json()["optimal"]
+    by_name = {r["strategy_name"]: r for r in api.post("/v1/routes/pareto", json=TRIP).json()["routes"]}
+    assert by_name[optimal["strategy_name"]]["co2_emissions"] == pytest.approx(optimal["co2_emissions"])
+
+@pytest.mark.parametrize("road_network", [False, True])
+def test_order_keeps_the_endpoints(api, road_network):
+    body = api.post("/v1/routes/order", json={"coords": STOPS, "road_network": road_network}).json()
+    assert body["coords"][0] == STOPS[0] and body["coords"][-1] == STOPS[-1]
+    assert sorted(map(tuple, body["coords"])) == sorted(map(tuple, STOPS))
+
+def test_score(api):
+    body = api.post("/v1/routes/score", json=dict(TRIP, profile="driving-car")).json()
+    assert body["co2_emissions"] > 0 and "segment_co2" in body
+
+def test_invalid_request(api):
+    assert api.post("/v1/routes/optimal", json={"coords": [[39.74, -104.99]]}).status_code == 422
+
+def test_metrics(api):
+    api.post("/v1/routes/optimal", json=TRIP)
+    metrics = api.get("/metrics").json()
+    assert metrics["latency"]["POST /v1/routes/optimal"]["count"] >= 1
+    assert {"requests", "matrix_requests", "matrix_upstream_calls"} <= set(metrics["ors"])
+    assert "misses" in metrics["cache"]
@@ -0,0 +1,69 @@
+import threading
+
+import pytest
+
+from routing.batching import BatchingClient
+from routing.fake_ors import FakeORS, FakeORSClient
+
+LOCATIONS = [[-104.99, 39.74], [-104.82, 38.83], [-105.27, 40.01], [-104.61, 38.25], [-105.08, 39.55]]
+
+def concurrently(fn, args_list):
+    """Run fn(*args) for each args on its own thread, all released at once; results in order"""
+    barrier = threading.Barrier(len(args_list))
+    results = [None] * len(args_list)
+
+    def run(i, args):
+        barrier.wait()
+        try:
+            results[i] = fn(*args)
+        except Exception as e:
+            results[i] = e
+    threads = [threading.Thread(target=run, args=(i, args)) for i, args in enumerate(args_list)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(10)
+    return results
+
+def matrix(client, locations, sources=None, destinations=None):
+    return client.distance_matrix(locations, profile='driving-hgv', sources=sources, destinations=destinations,
+                                  metrics=['distance', 'duration'], units='km')
+
+def test_concurrent_requests_share_one_upstream_call():
+    fake = FakeORS()
+    client = BatchingClient(FakeORSClient(fake), window=0.5)
+    requests = [
+        (LOCATIONS[:3], None, None),
+        (LOCATIONS[2:], None, None),
+        ([LOCATIONS[4], LOCATIONS[0]], [0], [1]),
+        (LOCATIONS[1:4], [2], [0, 1]),
+    ]
+    results = concurrently(lambda *args: matrix(client, *args), requests)
+
+    assert fake.counters['requests'] == 1
+    assert client.stats() == {'matrix_requests': 4, 'matrix_upstream_calls': 1}
+    direct = FakeORSClient(FakeORS())
+    for (locations, sources, destinations), result in zip(requests, results):
+        expected = matrix(direct, locations, sources, destinations)
+        # Each caller gets exactly its own sources x destinations, in its own order
+        assert result['distances'] == expected['distances']
+        assert result['durations'] == expected['durations']
+
+def test_requests_beyond_max_locations_start_a_new_batch():
+    fake = FakeORS()
+    client = BatchingClient(FakeORSClient(fake), window=0.5, max_locations=4)
+    results = concurrently(lambda *args: matrix(client, *args), [(LOCATIONS[:3],), (LOCATIONS[2:],)])
+    assert fake.counters['requests'] == 2
+    assert all(len(r['distances']) == 3 for r in results)
+
+def test_upstream_errors_reach_every_caller():
+    client = BatchingClient(FakeORSClient(FakeORS(error_rate=1.0, error_status=500)), window=0.5)
+    results = concurrently(lambda *args: matrix(client, *args), [(LOCATIONS[:2],), (LOCATIONS[1:3],)])
+    assert all(isinstance(r, Exception) for r in results)
+
+def test_other_methods_pass_through():
+    client = BatchingClient(FakeORSClient(FakeORS()))
+    response = client.pelias_search(text="Denver", size=1)
+    assert response['features']
+    with pytest.raises(AttributeError):
+        client.no_such_method
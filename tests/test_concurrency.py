@@ -0,0 +1,64 @@
+import threading
+import time
+
+from routing.concurrency import CallCancelled, current_call, map_ordered
+
+def test_results_keep_argument_order():
+    # Later arguments finish first
+    results, timed_out = map_ordered(lambda i: time.sleep(0.05 * (4 - i)) or i * 10, [(i,) for i in range(5)],
+                                     max_workers=5)
+    assert results == [0, 10, 20, 30, 40]
+    assert timed_out == []
+
+def test_failed_calls_give_none():
+    def fn(i):
+        if i == 1:
+            raise RuntimeError("boom")
+        return i
+    results, timed_out = map_ordered(fn, [(0,), (1,), (2,)])
+    assert results == [0, None, 2]
+    assert timed_out == []
+
+def test_slow_calls_time_out_and_are_cancelled():
+    cancelled = threading.Event()
+
+    def fn(delay):
+        call = current_call()
+        if call.cancelled.wait(delay):
+            cancelled.set()
+            raise CallCancelled()
+        return delay
+
+    start = time.monotonic()
+    results, timed_out = map_ordered(fn, [(0.0,), (5.0,), (0.01,)], max_workers=3, timeout=0.2)
+    assert time.monotonic() - start < 2
+    assert results == [0.0, None, 0.01]
+    assert timed_out == [1]
+    assert cancelled.wait(1)
+
+def test_paused_time_does_not_count_against_the_timeout():
+    def fn():
+        with current_call().paused():
+            time.sleep(0.3)
+        return "done"
+
+    results, timed_out = map_ordered(fn, [()], timeout=0.2)
+    assert results == ["done"]
+    assert timed_out == []
+
+def test_queued_calls_time_out_when_every_worker_is_stuck():
+    release = threading.Event()
+
+    def fn(hang):
+        if hang:
+            release.wait(10)  # ignores cancellation
+        return hang
+
+    start = time.monotonic()
+    try:
+        results, timed_out = map_ordered(fn, [(True,), (False,)], max_workers=1, timeout=0.2)
+    finally:
+        release.set()
+    assert time.monotonic() - start < 1
+    assert results == [None, None]
+    assert timed_out == [0, 1]
@@ -0,0 +1,37 @@
+import numpy as np
+import pytest
+
+from env.energy_model import (edge_co2_table, energy_to_co2, energy_to_co2_batch, estimate_energy,
+                              estimate_energy_batch)
+
+VEHICLES = ['diesel', 'gasoline', 'ev']
+
+@pytest.fixture
+def inputs():
+    rng = np.random.default_rng(0)
+    n = 10_000
+    distance = rng.uniform(0, 500, n)
+    grade = rng.uniform(-10, 10, n)
+    # Loads around and exactly on the bucket boundaries
+    load = np.concatenate([rng.uniform(0, 2500, n - 8), [0, 500, 500.0001, 1000, 1000.0001, 1500, 1500.0001, 3000]])
+    vehicle = rng.choice(VEHICLES, n)
+    return distance, grade, load, vehicle
+
+def test_energy_batch_matches_scalar_bit_for_bit(inputs):
+    distance, grade, load, vehicle = inputs
+    expected = [estimate_energy(d, g, v, w) for d, g, v, w in zip(distance, grade, vehicle, load)]
+    np.testing.assert_array_equal(estimate_energy_batch(distance, grade, vehicle, load), expected)
+
+def test_co2_batch_matches_scalar_bit_for_bit(inputs):
+    distance, grade, load, vehicle = inputs
+    energy = estimate_energy_batch(distance, grade, vehicle, load)
+    expected = [energy_to_co2(e, v) for e, v in zip(energy, vehicle)]
+    np.testing.assert_array_equal(energy_to_co2_batch(energy, vehicle), expected)
+
+@pytest.mark.parametrize("vehicle_type", VEHICLES)
+def test_edge_table_matches_scalar_edge_by_edge(vehicle_type):
+    rng = np.random.default_rng(1)
+    dist, grade = rng.uniform(1, 10, (3, 6, 6)), rng.uniform(-5, 5, (3, 6, 6))
+    table = edge_co2_table(dist, grade, vehicle_type, 750)
+    expected = np.vectorize(lambda d, g: energy_to_co2(estimate_energy(d, g, vehicle_type, 750), vehicle_type))
+    np.testing.assert_array_equal(table, expected(dist, grade))
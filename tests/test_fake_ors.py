@@ -0,0 +1,117 @@
+import pytest
+from openrouteservice import exceptions
+
+from routing import routes
+from routing.fake_ors import FakeORS, FakeORSClient
+
+# Abbreviated real ORS v2 responses: one item per list, but every key the service returns
+REAL_DIRECTIONS = {
+    "type": "FeatureCollection",
+    "bbox": [-104.99, 38.83, -104.82, 39.74],
+    "features": [{
+        "bbox": [-104.99, 38.83, -104.82, 39.74],
+        "type": "Feature",
+        "properties": {
+            "segments": [{
+                "distance": 112345.6,
+                "duration": 4321.0,
+                "steps": [{"distance": 120.5, "duration": 30.1, "type": 11, "instruction": "Head south",
+                           "name": "-", "way_points": [0, 3]}],
+            }],
+            "extras": {"steepness": {"values": [[0, 3, 1]],
+                                     "summary": [{"value": 1.0, "distance": 120.5, "amount": 100.0}]}},
+            "way_points": [0, 3],
+            "summary": {"distance": 112345.6, "duration": 4321.0},
+        },
+        "geometry": {"coordinates": [[-104.99, 39.74], [-104.82, 38.83]], "type": "LineString"},
+    }],
+    "metadata": {
+        "attribution": "openrouteservice.org | OpenStreetMap contributors",
+        "service": "routing",
+        "timestamp": 1700000000000,
+        "query": {"coordinates": [[-104.99, 39.74], [-104.82, 38.83]], "profile": "driving-hgv",
+                  "format": "geojson"},
+        "engine": {"version": "8.0.0", "build_date": "2024-01-01T00:00:00Z", "graph_date": "2024-01-01T00:00:00Z"},
+    },
+}
+
+REAL_MATRIX = {
+    "distances": [[0.0, 112.35]],
+    "durations": [[0.0, 4321.0]],
+    "destinations": [{"location": [-104.99, 39.74], "snapped_distance": 4.2}],
+    "sources": [{"location": [-104.99, 39.74], "snapped_distance": 4.2}],
+    "metadata": {
+        "attribution": "openrouteservice.org | OpenStreetMap contributors",
+        "service": "matrix",
+        "timestamp": 1700000000000,
+        "query": {"locations": [[-104.99, 39.74], [-104.82, 38.83]], "profile": "driving-hgv"},
+        "engine": {"version": "8.0.0", "build_date": "2024-01-01T00:00:00Z", "graph_date": "2024-01-01T00:00:00Z"},
+    },
+}
+
+REAL_GEOCODE = {
+    "geocoding": {"version": "0.2", "attribution": "openrouteservice.org/terms-of-service/#/geocoding",
+                  "query": {"text": "Denver", "size": 1}, "engine": {"name": "Pelias", "version": "1.0"},
+                  "timestamp": 1700000000000},
+    "type": "FeatureCollection",
+    "features": [{
+        "type": "Feature",
+        "geometry": {"type": "Point", "coordinates": [-104.99, 39.74]},
+        "properties": {"id": "85928035", "gid": "whosonfirst:locality:85928035", "layer": "locality",
+                       "source": "whosonfirst", "name": "Denver", "confidence": 1.0, "label": "Denver, CO, USA"},
+    }],
+    "bbox": [-104.99, 39.74, -104.99, 39.74],
+}
+
+REAL_ELEVATION = {
+    "attribution": "service by https://openrouteservice.org | data by https://srtm.csi.cgiar.org",
+    "geometry": [[-104.99, 39.74, 1609.0]],
+    "timestamp": 1700000000000,
+    "version": "0.2.1",
+}
+
+def missing_keys(real, fake, path="$"):
+    """Paths present in real but absent from fake, or holding a different kind of value"""
+    if isinstance(real, dict):
+        if not isinstance(fake, dict):
+            return [path]
+        return [p for key, value in real.items()
+                for p in ([f"{path}.{key}"] if key not in fake else missing_keys(value, fake[key], f"{path}.{key}"))]
+    if isinstance(real, list):
+        if not isinstance(fake, list) or (real and not fake):
+            return [path]
+        return missing_keys(real[0], fake[0], f"{path}[0]") if real else []
+    if isinstance(real, (int, float)) and not isinstance(real, bool):
+        return [] if isinstance(fake, (int, float)) and not isinstance(fake, bool) else [path]
+    return [] if isinstance(fake, type(real)) else [path]
+
+@pytest.fixture
+def client():
+    return FakeORSClient(FakeORS())
+
+def test_directions_match_the_real_shape(client):
+    response = client.directions(coordinates=[[-104.99, 39.74], [-104.82, 38.83]], profile="driving-hgv",
+                                 format="geojson", extra_info=["steepness"])
+    assert missing_keys(REAL_DIRECTIONS, response) == []
+    # Same parse as a real response
+    assert set(routes.parse_directions_response(response)) == set(routes.parse_directions_response(REAL_DIRECTIONS))
+
+def test_matrix_matches_the_real_shape(client):
+    response = client.distance_matrix(locations=[[-104.99, 39.74], [-104.82, 38.83]], profile="driving-hgv",
+                                      metrics=["distance", "duration"], units="km")
+    assert missing_keys(REAL_MATRIX, response) == []
+    assert len(response["distances"]) == len(response["sources"]) == 2
+
+def test_geocode_matches_the_real_shape(client):
+    response = client.pelias_search(text="Denver", size=1)
+    assert missing_keys(REAL_GEOCODE, response) == []
+
+def test_elevation_matches_the_real_shape(client):
+    response = client.elevation_line(format_in="polyline", geometry=[[-104.99, 39.74], [-104.82, 38.83]],
+                                     format_out="polyline")
+    assert missing_keys(REAL_ELEVATION, response) == []
+
+def test_injected_errors_raise_like_the_real_client():
+    client = FakeORSClient(FakeORS(error_rate=1.0, error_status=429))
+    with pytest.raises(exceptions._OverQueryLimit):
+        client.pelias_search(text="Denver")
@@ -0,0 +1,81 @@
+import pytest
+
+from routing import geocode_cache
+from routing.geocode_cache import GeocodeCache, normalize_address
+
+class StubGeocoder:
+    """Offline geocoder: fixed answers, counting lookups"""
+    def __init__(self, places):
+        self.places = places
+        self.lookups = []
+
+    def __call__(self, text):
+        self.lookups.append(text)
+        return self.places.get(normalize_address(text))
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1_000_000.0]
+    monkeypatch.setattr(geocode_cache.time, "time", lambda: now[0])
+    return now
+
+@pytest.fixture
+def geocoder():
+    return StubGeocoder({"denver, co": (39.74, -104.99), "boulder, co": (40.01, -105.27),
+                         "pueblo, co": (38.25, -104.61)})
+
+@pytest.mark.parametrize("a, b", [
+    ("Denver, CO", "denver,co"),
+    ("  Denver ,  CO ", "DENVER, CO"),
+    ("1600  Pennsylvania Ave", "1600 pennsylvania ave"),
+])
+def test_spelling_variants_share_a_key(a, b):
+    assert normalize_address(a) == normalize_address(b)
+
+def test_different_places_keep_different_keys():
+    assert normalize_address("Denver, CO") != normalize_address("Denver CO")
+    assert normalize_address("Springfield, IL") != normalize_address("Springfield, MO")
+
+def test_variants_hit_one_entry(clock, geocoder):
+    cache = GeocodeCache(":memory:")
+    assert cache.get_or_geocode("Denver, CO", geocoder) == (39.74, -104.99)
+    assert cache.get_or_geocode(" denver ,co", geocoder) == (39.74, -104.99)
+    assert geocoder.lookups == ["Denver, CO"]
+    assert cache.stats() == {'hits': 1, 'misses': 1, 'evictions': 0, 'size': 1, 'hit_rate': 0.5}
+
+def test_failed_lookups_are_not_cached(clock, geocoder):
+    cache = GeocodeCache(":memory:")
+    assert cache.get_or_geocode("Atlantis", geocoder) is None
+    assert cache.get_or_geocode("Atlantis", geocoder) is None
+    assert len(geocoder.lookups) == 2 and cache.stats()['size'] == 0
+
+def test_entries_expire_after_ttl(clock, geocoder):
+    cache = GeocodeCache(":memory:", ttl_seconds=60)
+    cache.get_or_geocode("Denver, CO", geocoder)
+    clock[0] += 60
+    assert cache.get("Denver, CO") is not None
+    clock[0] += 1
+    assert cache.get("Denver, CO") is None
+    assert cache.stats()['size'] == 0  # expired rows are dropped on read
+    cache.get_or_geocode("Denver, CO", geocoder)
+    assert len(geocoder.lookups) == 2
+
+def test_least_recently_used_entries_are_evicted(clock, geocoder):
+    cache = GeocodeCache(":memory:", max_entries=2)
+    cache.get_or_geocode("Denver, CO", geocoder)
+    clock[0] += 1
+    cache.get_or_geocode("Boulder, CO", geocoder)
+    clock[0] += 1
+    cache.get("Denver, CO")  # Boulder is now the least recently used
+    clock[0] += 1
+    cache.get_or_geocode("Pueblo, CO", geocoder)
+
+    assert cache.get("Boulder, CO") is None
+    assert cache.get("Denver, CO") is not None and cache.get("Pueblo, CO") is not None
+    stats = cache.stats()
+    assert stats['evictions'] == 1 and stats['size'] == 2
+
+def test_entries_persist_across_instances(tmp_path, clock, geocoder):
+    path = str(tmp_path / "geocode.sqlite")
+    GeocodeCache(path).get_or_geocode("Denver, CO", geocoder)
+    assert GeocodeCache(path).get("denver, co") == (39.74, -104.99)
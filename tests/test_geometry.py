@@ -0,0 +1,63 @@
+import numpy as np
+import pytest
+
+from routing.geodesic import EARTH_RADIUS_KM
+from routing.geometry import decode_polyline, encode_polyline, simplify_path
+
+# From Google's encoded polyline algorithm documentation
+GOOGLE_POINTS = [(38.5, -120.2), (40.7, -120.95), (43.252, -126.453)]
+GOOGLE_POLYLINE = "_p~iF~ps|U_ulLnnqC_mqNvxq`@"
+
+def test_matches_the_google_reference():
+    assert encode_polyline(GOOGLE_POINTS) == GOOGLE_POLYLINE
+    np.testing.assert_allclose(decode_polyline(GOOGLE_POLYLINE, dtype=np.float64), GOOGLE_POINTS)
+
+@pytest.mark.parametrize("precision", [5, 6])
+def test_round_trip_in_every_quadrant(precision):
+    rng = np.random.default_rng(precision)
+    # Signs change between points, so deltas are both positive and negative
+    path = np.column_stack([rng.uniform(-89, 89, 500), rng.uniform(-179, 179, 500)])
+    decoded = decode_polyline(encode_polyline(path, precision), precision, dtype=np.float64)
+    np.testing.assert_allclose(decoded, np.round(path, precision), rtol=0, atol=10 ** -precision / 2)
+
+def test_empty_and_single_point():
+    assert encode_polyline(np.zeros((0, 2))) == ""
+    assert decode_polyline("").shape == (0, 2)
+    np.testing.assert_allclose(decode_polyline(encode_polyline([(-33.86785, 151.20732)]), dtype=np.float64),
+                               [(-33.86785, 151.20732)])
+
+def project(path, ref_lat):
+    # Same local equirectangular projection simplify_path measures in
+    lat, lon = np.radians(path[:, 0]), np.radians(path[:, 1])
+    radius_m = EARTH_RADIUS_KM * 1000
+    return np.column_stack([lon * np.cos(ref_lat) * radius_m, lat * radius_m])
+
+def distance_to_polyline(points, line):
+    starts, chords = line[:-1], np.diff(line, axis=0)
+    length2 = np.maximum(np.einsum('ij,ij->i', chords, chords), 1e-12)
+    t = np.clip(np.einsum('pij,ij->pi', points[:, None] - starts, chords) / length2, 0, 1)
+    offsets = points[:, None] - (starts + t[..., None] * chords)
+    return np.sqrt(np.einsum('pij,pij->pi', offsets, offsets)).min(axis=1)
+
+@pytest.mark.parametrize("tolerance_m", [1, 10, 100])
+def test_simplify_keeps_endpoints_and_stays_within_tolerance(tolerance_m):
+    # A wiggly ~20 km road with metre-scale noise
+    rng = np.random.default_rng(tolerance_m)
+    t = np.linspace(0, 1, 3000)
+    path = np.column_stack([39.7 - 0.15 * t + 0.01 * np.sin(25 * t), -105.0 + 0.1 * t + 0.005 * np.cos(40 * t)])
+    path += rng.normal(0, 3 / 111_000, path.shape)
+    simplified = simplify_path(path, tolerance_m)
+    assert 2 <= len(simplified) < len(path)
+    np.testing.assert_array_equal(simplified[0], path[0])
+    np.testing.assert_array_equal(simplified[-1], path[-1])
+    # The kept points are a subsequence of the original
+    kept = [np.flatnonzero((path == point).all(axis=1))[0] for point in simplified]
+    assert kept == sorted(kept)
+    ref_lat = np.radians(path[:, 0]).mean()
+    assert distance_to_polyline(project(path, ref_lat), project(simplified, ref_lat)).max() <= tolerance_m + 1e-6
+
+def test_simplify_leaves_short_paths_alone():
+    path = np.array([[39.7, -105.0], [39.71, -105.01]])
+    np.testing.assert_array_equal(simplify_path(path, 50), path)
+    np.testing.assert_array_equal(simplify_path(np.vstack([path, path]), 0), np.vstack([path, path]))
+    assert len(simplify_path(np.array([[39.7, -105.0], [39.7, -105.0], [39.7, -105.0]]), 50)) == 2
@@ -0,0 +1,43 @@
+import numpy as np
+
+from routing.fake_ors import FakeORS, FakeORSClient
+from routing.matrix import _matrix_blocks, build_cost_matrix, fetch_road_matrix
+from routing.response_cache import ResponseCache
+
+COORDS = [(39.74 + 0.05 * i, -104.99 + 0.07 * (i % 3)) for i in range(7)]
+
+def test_blocks_cover_every_location_once():
+    assert [b.tolist() for b in _matrix_blocks(4, 50)] == [[0, 1, 2, 3]]
+    blocks = _matrix_blocks(7, 4)
+    assert [b.tolist() for b in blocks] == [[0, 1], [2, 3], [4, 5], [6]]
+    assert all(len(a) + len(b) <= 4 for a in blocks for b in blocks)
+
+def test_split_requests_assemble_the_same_matrix():
+    fake = FakeORS()
+    whole_km, whole_min = fetch_road_matrix(FakeORSClient(fake), COORDS)
+    assert fake.counters['requests'] == 1
+
+    fake = FakeORS()
+    split_km, split_min = fetch_road_matrix(FakeORSClient(fake), COORDS, max_locations=4)
+    assert fake.counters['requests'] == 4 * 4  # one per (source block, destination block)
+    np.testing.assert_allclose(split_km, whole_km)
+    np.testing.assert_allclose(split_min, whole_min)
+
+def test_cached_matrix_is_not_refetched(tmp_path):
+    fake = FakeORS()
+    client = FakeORSClient(fake)
+    cache = ResponseCache(str(tmp_path / "responses.sqlite"))
+    first = fetch_road_matrix(client, COORDS, max_locations=4, cache=cache)
+    requests = fake.counters['requests']
+
+    second = fetch_road_matrix(client, COORDS, max_locations=4, cache=cache)
+    assert fake.counters['requests'] == requests
+    assert cache.counters['memory_hits'] == 1
+    np.testing.assert_array_equal(first[0], second[0])
+
+def test_co2_depends_on_grade_not_just_distance():
+    costs = build_cost_matrix(FakeORSClient(FakeORS()), COORDS)
+    off_diagonal = ~np.eye(len(COORDS), dtype=bool)
+    per_km = costs['co2_g'][off_diagonal] / costs['distance_km'][off_diagonal]
+    assert np.ptp(per_km) > 0
+    np.testing.assert_allclose(costs['grade_pct'], -costs['grade_pct'].T)
@@ -0,0 +1,52 @@
+import math
+
+import numpy as np
+
+from routing.pareto import OBJECTIVES, crowding_distance, dominance_matrix, non_dominated_sort, pareto_front
+
+# Two objectives, three fronts:
+#   rank 0: (1, 5), (2, 3), (4, 2), (6, 1)
+#   rank 1: (3, 5), (5, 3)       each dominated by a rank-0 point only
+#   rank 2: (6, 6)               dominated by everything above
+VALUES = np.array([[1, 5], [2, 3], [4, 2], [6, 1], [3, 5], [5, 3], [6, 6]], dtype=float)
+
+def test_dominance_needs_all_le_and_one_lt():
+    dominates = dominance_matrix([[1, 1], [1, 2], [1, 1], [0, 3]])
+    assert dominates[0, 1] and not dominates[1, 0]
+    assert not dominates[0, 2] and not dominates[2, 0]  # equal rows don't dominate each other
+    assert not dominates[0, 3] and not dominates[3, 0]  # a trade-off
+
+def test_non_dominated_sort_peels_fronts():
+    np.testing.assert_array_equal(non_dominated_sort(VALUES), [0, 0, 0, 0, 1, 1, 2])
+
+def test_crowding_distance_within_fronts():
+    ranks = non_dominated_sort(VALUES)
+    distance = crowding_distance(VALUES, ranks)
+    # Extremes of the 4-point front are infinite; the inner points sum normalized neighbour gaps
+    assert math.isinf(distance[0]) and math.isinf(distance[3])
+    assert distance[1] == (4 - 1) / 5 + (5 - 2) / 4
+    assert distance[2] == (6 - 2) / 5 + (3 - 1) / 4
+    # Fronts of fewer than three points are all extremes
+    assert np.isinf(distance[4:]).all()
+
+def route(name, co2, duration, distance):
+    return {"strategy_name": name, "co2_emissions": co2, "duration_min": duration, "distance_km": distance,
+            "energy_consumed": co2 / 2640}
+
+def test_pareto_front_annotates_and_sorts_by_co2():
+    routes = [route("slow", 100, 90, 50), route("fast", 200, 60, 55), route("worse", 210, 95, 60),
+              route("short", 150, 80, 40)]
+    front = pareto_front(routes, "Diesel")
+    assert [r["strategy_name"] for r in front] == ["slow", "short", "fast"]
+    worse = routes[2]
+    assert worse["pareto_rank"] == 1 and worse["dominated_by"] == 3 and worse["dominates"] == 0
+    assert all("cost" in r for r in routes)
+
+def test_cost_does_not_change_the_front():
+    # Cost is a positive mix of energy and duration, so adding it as an objective is redundant
+    rng = np.random.default_rng(0)
+    routes = [route(str(i), *rng.uniform(1, 100, 3)) for i in range(200)]
+    pareto_front(routes, "Diesel")
+    base = np.array([[r[name] for name in OBJECTIVES] for r in routes])
+    with_cost = np.column_stack([base, [r["cost"] for r in routes]])
+    np.testing.assert_array_equal(non_dominated_sort(base) == 0, non_dominated_sort(with_cost) == 0)
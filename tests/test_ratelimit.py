@@ -0,0 +1,155 @@
+import threading
+import time
+
+import pytest
+import requests
+from openrouteservice import exceptions
+
+from routing import ratelimit
+from routing.ratelimit import PLAN_QUOTAS, ResilientClient, TokenBucket, plan_buckets, retryable_error
+
+class FakeClock:
+    def __init__(self):
+        self.now = 100.0
+        self.sleeps = []
+
+    def monotonic(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(ratelimit.time, "monotonic", clock.monotonic)
+    monkeypatch.setattr(ratelimit.time, "sleep", clock.sleep)
+    return clock
+
+class FlakyClient:
+    """ORS stand-in whose directions() fails with `error` the first `failures` times"""
+    def __init__(self, failures, error=None):
+        self.failures = failures
+        self.error = error or exceptions.ApiError(503, "Service unavailable")
+        self.calls = 0
+
+    def directions(self, **kwargs):
+        self.calls += 1
+        if self.calls <= self.failures:
+            raise self.error
+        return {"route": self.calls}
+
+def test_bucket_bursts_to_capacity_then_refills(clock):
+    bucket = TokenBucket(rate=2, capacity=3)
+    assert [bucket.try_acquire() for _ in range(4)] == [True, True, True, False]
+    clock.now += 0.5  # one token back
+    assert bucket.try_acquire() and not bucket.try_acquire()
+    clock.now += 60  # refills only up to capacity
+    assert sum(bucket.try_acquire() for _ in range(5)) == 3
+
+def test_acquire_waits_for_the_missing_tokens(clock):
+    bucket = TokenBucket(rate=4, capacity=1)
+    assert bucket.acquire() == 0.0
+    assert bucket.acquire() == pytest.approx(0.25)
+    assert clock.sleeps == [pytest.approx(0.25)]
+
+def test_acquire_gives_up_when_cancelled():
+    bucket = TokenBucket(rate=0.001, capacity=1)
+    bucket.try_acquire()
+    cancel = threading.Event()
+    cancel.set()
+    assert bucket.acquire(cancel=cancel) is None
+
+def test_plan_buckets_allow_a_minute_of_burst():
+    buckets = plan_buckets()
+    assert set(buckets) == set(PLAN_QUOTAS['standard'])
+    directions = buckets['directions']
+    assert directions.capacity == 40 and directions.rate == pytest.approx(40 / 60)
+
+@pytest.mark.parametrize("error, kind", [
+    (exceptions._OverQueryLimit(429, "Rate limit"), 'rate_limited'),
+    (exceptions.ApiError(503, "Service unavailable"), 'server_errors'),
+    (exceptions.ApiError(500, "Internal error"), 'server_errors'),
+    (exceptions.Timeout(), 'server_errors'),
+    (requests.exceptions.ConnectionError(), 'server_errors'),
+    (exceptions.ApiError(400, "Bad request"), None),
+    (ValueError("not an ORS error"), None),
+])
+def test_retryable_error(error, kind):
+    assert retryable_error(error) == kind
+
+def test_retries_until_success_with_seeded_jitter(clock):
+    flaky = FlakyClient(failures=3)
+    client = ResilientClient(flaky, buckets={}, max_retries=4, base_delay=0.5, seed=7)
+    assert client.directions(coordinates=[[0, 0], [1, 1]]) == {"route": 4}
+    assert flaky.calls == 4
+    stats = client.stats()
+    assert stats['requests'] == 4 and stats['retries'] == 3 and stats['server_errors'] == 3
+    assert stats['failures'] == 0
+    # Full jitter: each delay within [0, base_delay * 2**attempt], and the same for the same seed
+    assert all(0 <= d <= 0.5 * 2 ** i for i, d in enumerate(clock.sleeps))
+    first = list(clock.sleeps)
+    clock.sleeps.clear()
+    ResilientClient(FlakyClient(failures=3), buckets={}, seed=7).directions(coordinates=[[0, 0], [1, 1]])
+    assert clock.sleeps == first
+
+def test_gives_up_after_max_retries(clock):
+    flaky = FlakyClient(failures=10, error=exceptions._OverQueryLimit(429, "Rate limit"))
+    client = ResilientClient(flaky, buckets={}, max_retries=2, seed=0)
+    with pytest.raises(exceptions._OverQueryLimit):
+        client.directions(coordinates=[[0, 0], [1, 1]])
+    assert flaky.calls == 3
+    assert client.stats()['rate_limited'] == 3 and client.stats()['failures'] == 1
+
+def test_other_errors_are_not_retried(clock):
+    flaky = FlakyClient(failures=1, error=exceptions.ApiError(400, "Bad request"))
+    client = ResilientClient(flaky, buckets={}, seed=0)
+    with pytest.raises(exceptions.ApiError):
+        client.directions(coordinates=[[0, 0], [1, 1]])
+    assert flaky.calls == 1 and clock.sleeps == []
+
+def test_each_attempt_takes_a_token(clock):
+    bucket = TokenBucket(rate=1, capacity=1)
+    client = ResilientClient(FlakyClient(failures=1), buckets={'directions': bucket}, base_delay=0, seed=0)
+    client.directions(coordinates=[[0, 0], [1, 1]])
+    # The retry found the bucket empty and waited a full second for its token
+    assert client.stats()['throttled'] == 1
+    assert client.stats()['throttle_wait_s'] == pytest.approx(1.0)
+
+def test_identical_concurrent_calls_share_one_request():
+    release = threading.Event()
+    started = threading.Event()
+
+    class SlowClient:
+        calls = 0
+
+        def directions(self, **kwargs):
+            SlowClient.calls += 1
+            started.set()
+            release.wait(5)
+            return {"route": 1}
+
+    client = ResilientClient(SlowClient(), buckets={})
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(client.directions(coordinates=[[0, 0], [1, 1]])))
+               for _ in range(4)]
+    threads[0].start()
+    started.wait(5)
+    for thread in threads[1:]:
+        thread.start()
+    # Let the followers reach the in-flight call before it finishes
+    deadline = time.monotonic() + 5
+    while client.stats()['coalesced'] < 3 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    release.set()
+    for thread in threads:
+        thread.join(5)
+    assert results == [{"route": 1}] * 4
+    assert SlowClient.calls == 1
+
+def test_single_attempt_client_surfaces_503_without_retrying():
+    client = ratelimit.SingleAttemptClient(key="test")
+    with pytest.raises(exceptions.ApiError) as error:
+        client.request("/v2/directions/driving-car", retry_counter=1)
+    assert error.value.status == 503
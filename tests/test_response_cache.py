@@ -0,0 +1,85 @@
+import pytest
+
+from routing import response_cache
+from routing.response_cache import ResponseCache, directions_cache_key, make_cache_key
+
+COORDS = [[-104.99, 39.74], [-104.82, 38.83]]
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1_000_000.0]
+    monkeypatch.setattr(response_cache.time, "time", lambda: now[0])
+    return now
+
+def test_key_is_stable_under_jitter_below_the_rounding_precision():
+    jittered = [[-104.990001, 39.740004], [-104.819999, 38.829996]]
+    assert directions_cache_key(COORDS, "driving-hgv") == directions_cache_key(jittered, "driving-hgv")
+    moved = [[-104.9901, 39.74], [-104.82, 38.83]]  # ~10 m
+    assert directions_cache_key(COORDS, "driving-hgv") != directions_cache_key(moved, "driving-hgv")
+
+def test_key_ignores_avoid_feature_order_but_not_profile_or_features():
+    key = directions_cache_key(COORDS, "driving-hgv", ["tollways", "highways"])
+    assert key == directions_cache_key(COORDS, "driving-hgv", ["highways", "tollways"])
+    assert key != directions_cache_key(COORDS, "driving-car", ["tollways", "highways"])
+    assert key != directions_cache_key(COORDS, "driving-hgv", ["tollways"])
+    assert directions_cache_key(COORDS, "driving-hgv") == directions_cache_key(COORDS, "driving-hgv", [])
+
+def test_make_cache_key_ignores_param_order():
+    assert make_cache_key("matrix", a=1, b=[1, 2]) == make_cache_key("matrix", b=[1, 2], a=1)
+    assert make_cache_key("matrix", a=1) != make_cache_key("directions", a=1)
+
+def test_memory_miss_falls_through_to_disk(tmp_path, clock):
+    path = str(tmp_path / "responses.sqlite")
+    ResponseCache(path).put("k", {"routes": [1, 2]})
+    cache = ResponseCache(path)  # fresh memory tier, same disk
+    assert cache.get("k") == {"routes": [1, 2]}
+    assert cache.get("k") == {"routes": [1, 2]}  # promoted into memory
+    stats = cache.stats()
+    assert (stats['disk_hits'], stats['memory_hits'], stats['misses']) == (1, 1, 0)
+    assert stats['memory_size'] == 1 and stats['disk_size'] == 1
+
+def test_memory_tier_evicts_least_recently_used(clock):
+    cache = ResponseCache(None, memory_entries=2)
+    cache.put("a", {"v": 1})
+    cache.put("b", {"v": 2})
+    cache.get("a")
+    cache.put("c", {"v": 3})
+    assert cache.get("b") is None and cache.get("a") == {"v": 1}
+    assert cache.stats()['memory_evictions'] == 1
+
+def test_disk_tier_evicts_least_recently_used(clock):
+    cache = ResponseCache(":memory:", memory_entries=0, disk_entries=2)
+    for key in "ab":
+        cache.put(key, {"key": key})
+        clock[0] += 1
+    cache.get("a")
+    clock[0] += 1
+    cache.put("c", {"key": "c"})
+    assert cache.get("b") is None and cache.get("a") is not None
+    assert cache.stats()['disk_evictions'] == 1
+
+def test_entries_expire_in_both_tiers(clock):
+    cache = ResponseCache(":memory:", ttl_seconds=60)
+    cache.put("k", {"v": 1})
+    clock[0] += 60
+    assert cache.get("k") == {"v": 1}
+    clock[0] += 1
+    assert cache.get("k") is None
+    stats = cache.stats()
+    assert stats['memory_size'] == 0 and stats['disk_size'] == 0
+
+def test_get_or_fetch_counts_and_skips_empty_responses(clock):
+    cache = ResponseCache(None)
+    fetches = []
+
+    def fetch():
+        fetches.append(1)
+        return {"v": len(fetches)}
+    assert cache.get_or_fetch("k", fetch) == {"v": 1}
+    assert cache.get_or_fetch("k", fetch) == {"v": 1}
+    assert cache.get_or_fetch("empty", lambda: {}) == {}
+    assert cache.get("empty") is None
+    stats = cache.stats()
+    assert len(fetches) == 1
+    assert (stats['memory_hits'], stats['misses']) == (1, 3)
+    assert stats['hit_rate'] == pytest.approx(0.25)
@@ -0,0 +1,72 @@
+import numpy as np
+import pytest
+from stable_baselines3.common.vec_env import DummyVecEnv
+
+from env.route_env import CarbonRouteEnv
+from env.vec_route_env import VecCarbonRouteEnv
+
+@pytest.mark.parametrize("obs_mode", ["scalar", "onehot", "packed", "distance"])
+def test_truncated_terminal_observation_is_not_the_reset_obs(obs_mode):
+    env = DummyVecEnv([lambda: CarbonRouteEnv(n_nodes=5, obs_mode=obs_mode, max_episode_steps=2)])
+    reset_obs = env.reset()[0].copy()
+    env.step(np.array([1]))
+    obs, _, dones, infos = env.step(np.array([1]))  # revisit, then the time limit ends the episode
+
+    assert dones[0] and infos[0]["TimeLimit.truncated"]
+    assert not np.array_equal(infos[0]["terminal_observation"], reset_obs)
+    np.testing.assert_array_equal(obs[0], reset_obs)
+
+@pytest.mark.parametrize("obs_mode", ["scalar", "onehot", "packed", "distance"])
+def test_vec_env_truncated_terminal_observation_is_not_the_reset_obs(obs_mode):
+    env = VecCarbonRouteEnv(num_envs=2, n_nodes=5, obs_mode=obs_mode, max_episode_steps=2)
+    reset_obs = env.reset().copy()
+    env.step(np.array([1, 1]))
+    obs, _, dones, infos = env.step(np.array([1, 1]))
+
+    assert dones.all() and all(info["TimeLimit.truncated"] for info in infos)
+    for i in range(2):
+        assert not np.array_equal(infos[i]["terminal_observation"], reset_obs[i])
+        np.testing.assert_array_equal(obs[i], reset_obs[i])
+
+def test_observations_are_not_aliased_across_steps():
+    env = CarbonRouteEnv(n_nodes=5, obs_mode="onehot")
+    first = env.reset()
+    env.step(2)
+    assert first[0] == 1 and first[2] == 0  # still the reset state
+
+def test_distance_observation_follows_the_current_node_and_instance():
+    env = VecCarbonRouteEnv(num_envs=2, n_nodes=4, obs_mode="distance", randomize_every=1, seed=0)
+    obs = env.reset()
+    scaled = env.co2_matrix / env.co2_matrix.max(axis=(1, 2), keepdims=True)
+    np.testing.assert_allclose(obs[:, 8:], scaled[:, 0], rtol=1e-6)
+    obs, *_ = env.step(np.array([2, 3]))
+    np.testing.assert_allclose(obs[:, 8:], scaled[[0, 1], [2, 3]], rtol=1e-6)
+
+    first = env.co2_matrix.copy()
+    env.step(np.array([1, 1]))
+    _, _, dones, _ = env.step(np.array([3, 2]))  # both instances finish and are redrawn
+    assert dones.all()
+    assert not np.allclose(env.co2_matrix, first)
+
+def test_envs_draw_from_their_own_generators():
+    np.random.seed(1)
+    alone = CarbonRouteEnv(n_nodes=5, randomize_every=1, seed=3)
+    alone.reset()
+    alone.reset()
+    # Another env in the same process, and the global generator, don't shift this env's draws
+    env = CarbonRouteEnv(n_nodes=5, randomize_every=1, seed=3)
+    CarbonRouteEnv(n_nodes=5, randomize_every=1, seed=3).reset()
+    np.random.seed(2)
+    env.reset()
+    env.reset()
+    np.testing.assert_array_equal(env.dist_matrix, alone.dist_matrix)
+    np.testing.assert_array_equal(env.grade_matrix, alone.grade_matrix)
+
+def test_seed_restarts_the_matrix_stream():
+    env = CarbonRouteEnv(n_nodes=5, seed=0)
+    first = env.dist_matrix.copy()
+    env.randomize()
+    assert not np.array_equal(env.dist_matrix, first)
+    env.seed(0)
+    env.randomize()
+    np.testing.assert_array_equal(env.dist_matrix, first)
@@ -0,0 +1,35 @@
+import itertools
+
+import pytest
+
+from routing.fake_ors import FakeORS, FakeORSClient
+from routing.scoring import (TRAFFIC_LEVEL_FACTORS, WEATHER_FACTORS, parse_directions_response, score_route,
+                             score_route_scenarios)
+
+# Load bands change at 100, 500 and 1000 kg
+WEIGHTS = [0, 50, 99, 100, 250, 500, 501, 750, 1000, 1001, 1500, 2000]
+TRAFFIC = list(TRAFFIC_LEVEL_FACTORS)
+WEATHER = list(WEATHER_FACTORS)
+
+def parsed_route(coords, profile):
+    client = FakeORSClient(FakeORS())
+    return parse_directions_response(client.directions(coordinates=coords, profile=profile, format="geojson",
+                                                       extra_info=["steepness", "surface", "waytype"]))
+
+@pytest.mark.parametrize("coords", [
+    [[-104.99, 39.74], [-104.82, 38.83]],  # ~130 km: EVs need a charging stop
+    [[-104.99, 39.74], [-105.08, 39.55]],  # ~25 km
+])
+@pytest.mark.parametrize("profile", ["driving-hgv", "driving-car"])
+@pytest.mark.parametrize("truck_type", ["Diesel", "Gasoline", "EV"])
+@pytest.mark.parametrize("avoid", list(itertools.product([False, True], repeat=3)))
+def test_scenarios_match_score_route(coords, profile, truck_type, avoid):
+    parsed = parsed_route(coords, profile)
+    grid = score_route_scenarios(parsed, profile, truck_type, WEIGHTS, TRAFFIC, WEATHER, *avoid)
+    assert grid["co2_emissions"].shape == (len(WEIGHTS), len(TRAFFIC), len(WEATHER))
+    for (i, weight), (j, traffic), (k, weather) in itertools.product(
+            enumerate(WEIGHTS), enumerate(TRAFFIC), enumerate(WEATHER)):
+        route = score_route(parsed, profile, weight, truck_type, traffic, weather, *avoid)
+        assert grid["energy_consumed"][i, j, k] == route["energy_consumed"]
+        assert grid["co2_emissions"][i, j, k] == route["co2_emissions"]
+        assert grid["carbon_efficiency"][i, j, k] == route["carbon_efficiency"]
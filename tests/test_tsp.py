@@ -0,0 +1,68 @@
+import itertools
+
+import numpy as np
+import pytest
+
+from routing.tsp import held_karp_path, nearest_neighbour_path, or_opt, path_length, solve_open_path, two_opt
+
+def random_matrix(n, seed, symmetric=True):
+    rng = np.random.default_rng(seed)
+    if symmetric:
+        points = rng.uniform(0, 100, (n, 2))
+        return np.hypot(*(points[:, None] - points[None, :]).transpose(2, 0, 1))
+    dist = rng.uniform(1, 100, (n, n))
+    np.fill_diagonal(dist, 0)
+    return dist
+
+def brute_force_length(dist):
+    n = len(dist)
+    return min(path_length([0, *middle, n - 1], dist) for middle in itertools.permutations(range(1, n - 1)))
+
+def is_open_path(order, n):
+    return order[0] == 0 and order[-1] == n - 1 and sorted(order) == list(range(n))
+
+@pytest.mark.parametrize("n", range(2, 9))
+@pytest.mark.parametrize("symmetric", [True, False])
+def test_exact_solvers_match_brute_force(n, symmetric):
+    for seed in range(3):
+        dist = random_matrix(n, seed, symmetric)
+        best = brute_force_length(dist)
+        for order in (held_karp_path(dist), solve_open_path(dist)):
+            assert is_open_path(order, n)
+            assert path_length(order, dist) == pytest.approx(best)
+
+@pytest.mark.parametrize("n", [5, 8])
+def test_local_search_is_close_to_optimal_on_small_instances(n):
+    dist = random_matrix(n, 0)
+    order = solve_open_path(dist, time_budget=None, exact_max=0)  # force the heuristic path
+    assert is_open_path(order, n)
+    assert path_length(order, dist) <= 1.1 * brute_force_length(dist)
+
+@pytest.mark.parametrize("symmetric", [True, False])
+def test_endpoints_stay_fixed(symmetric):
+    dist = random_matrix(40, 1, symmetric)
+    assert is_open_path(solve_open_path(dist, time_budget=None), 40)
+    start = list(np.random.default_rng(2).permutation(np.arange(1, 39)))
+    start = [0, *start, 39]
+    assert is_open_path(two_opt(start, dist), 40)
+    assert is_open_path(or_opt(start, dist), 40)
+
+@pytest.mark.parametrize("seed", range(5))
+@pytest.mark.parametrize("symmetric", [True, False])
+def test_improvement_moves_never_lengthen_a_path(seed, symmetric):
+    n = 25
+    dist = random_matrix(n, seed, symmetric)
+    rng = np.random.default_rng(seed + 100)
+    for start in (nearest_neighbour_path(dist), [0, *rng.permutation(np.arange(1, n - 1)), n - 1]):
+        before = path_length(start, dist)
+        after_two_opt = two_opt(start, dist)
+        after_or_opt = or_opt(after_two_opt, dist)
+        assert path_length(after_two_opt, dist) <= before + 1e-9
+        assert path_length(after_or_opt, dist) <= path_length(after_two_opt, dist) + 1e-9
+        assert is_open_path(after_or_opt, n)
+
+def test_deadline_in_the_past_returns_the_input():
+    dist = random_matrix(20, 0)
+    start = nearest_neighbour_path(dist)
+    assert two_opt(start, dist, deadline=0) == start
+    assert or_opt(start, dist, deadline=0) == start
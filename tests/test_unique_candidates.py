@@ -0,0 +1,44 @@
+import numpy as np
+
+from routing.routes import unique_candidates
+
+def candidate(name, bow=0.0, jitter_m=0.0, profile="driving-hgv", distance_km=None, seed=0):
+    # A ~60 km road, optionally bowed sideways (degrees at mid-route) or jittered by a few metres
+    t = np.linspace(0, 1, 2000)
+    path = np.column_stack([39.7 - 0.45 * t, -105.0 + 0.2 * t + bow * np.sin(np.pi * t)])
+    if jitter_m:
+        path += np.random.default_rng(seed).normal(0, jitter_m / 111_000, path.shape)
+    distance_km = distance_km or 60.0 * (1 + abs(bow))
+    parsed = {"path": path.astype(np.float32), "distance_km": distance_km, "duration_min": distance_km / 70 * 60}
+    return (name, profile, False, False, False), parsed
+
+def names(candidates):
+    return [strategy[0] for strategy, _ in candidates]
+
+def test_identical_and_near_identical_paths_collapse():
+    candidates = [candidate("a"), candidate("b"), candidate("c", jitter_m=3, seed=1),
+                  candidate("d", distance_km=61.0)]
+    assert names(unique_candidates(candidates)) == ["a"]
+
+def test_distinct_routes_are_kept():
+    # Similar length, different roads
+    candidates = [candidate("a"), candidate("b", bow=0.02, distance_km=60.5),
+                  candidate("c", bow=-0.02, distance_km=60.5)]
+    assert names(unique_candidates(candidates)) == ["a", "b", "c"]
+
+def test_clearly_different_length_is_kept_without_comparing_paths():
+    # Same geometry but 20% longer: trusted as a different route
+    assert names(unique_candidates([candidate("a"), candidate("b", distance_km=72.0)])) == ["a", "b"]
+
+def test_profiles_are_kept_apart():
+    candidates = [candidate("a"), candidate("b", profile="driving-car")]
+    assert names(unique_candidates(candidates)) == ["a", "b"]
+
+def test_long_routes_use_a_coarser_grid():
+    # 1500 km with points every ~20 m: still dedups (and quickly, on a coarsened grid)
+    t = np.linspace(0, 1, 75_000)
+    path = np.column_stack([39 + 10 * t, -105 + 8 * t]).astype(np.float32)
+    parsed = {"path": path, "distance_km": 1500.0, "duration_min": 1300.0}
+    candidates = [(("a", "driving-hgv", False, False, False), parsed),
+                  (("b", "driving-hgv", False, False, False), dict(parsed, distance_km=1501.0))]
+    assert names(unique_candidates(candidates)) == ["a"]
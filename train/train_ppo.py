@@ -1,13 +1,110 @@
-import gym
+import argparse
+import functools
+import os
+import sys
+import time
+
 from stable_baselines3 import PPO
+from stable_baselines3.common.callbacks import BaseCallback
+from stable_baselines3.common.vec_env import SubprocVecEnv
+
+# Add the project root to Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from env.observations import OBS_MODES
 from env.route_env import CarbonRouteEnv
+from env.vec_route_env import VecCarbonRouteEnv
+
+def make_env(n_nodes, vehicle_type, load_kg, obs_mode, max_episode_steps, randomize_every, seed):
+    """Build one CarbonRouteEnv inside a worker process (seeds its synthetic matrices)"""
+    return CarbonRouteEnv(n_nodes=n_nodes, vehicle_type=vehicle_type, load_kg=load_kg, obs_mode=obs_mode,
+                          max_episode_steps=max_episode_steps, randomize_every=randomize_every, seed=seed)
+
+def build_env(args, seed):
+    max_episode_steps = args.max_episode_steps or 2 * args.n_nodes
+    randomize_every = args.randomize_every
+    if randomize_every is None:
+        # Only 'distance' observations let the policy see the instance, so only then is variety worth learning
+        randomize_every = 1 if args.obs_mode == 'distance' else 0
+    if args.backend == 'native':
+        # All instances step together in one array op in this process
+        return VecCarbonRouteEnv(num_envs=args.workers, n_nodes=args.n_nodes, vehicle_type=args.vehicle_type,
+                                 load_kg=args.load_kg, seed=seed, obs_mode=args.obs_mode,
+                                 max_episode_steps=max_episode_steps, randomize_every=randomize_every)
+    return SubprocVecEnv([
+        functools.partial(make_env, args.n_nodes, args.vehicle_type, args.load_kg, args.obs_mode,
+                          max_episode_steps, randomize_every, seed + rank)
+        for rank in range(args.workers)
+    ])
+
+def algorithm_class(args):
+    if not args.maskable:
+        return PPO
+    try:
+        from sb3_contrib import MaskablePPO
+    except ImportError:
+        sys.exit("--maskable needs sb3-contrib (pip install sb3-contrib)")
+    return MaskablePPO
+
+class ThroughputCallback(BaseCallback):
+    """Report wall time and env-steps/sec for every rollout"""
+    def _on_rollout_start(self):
+        self.rollout_start = time.perf_counter()
+        self.rollout_start_steps = self.num_timesteps
+
+    def _on_step(self):
+        return True
+
+    def _on_rollout_end(self):
+        wall = time.perf_counter() - self.rollout_start
+        steps = self.num_timesteps - self.rollout_start_steps
+        self.logger.record("time/rollout_wall_s", wall)
+        self.logger.record("time/rollout_env_steps_per_s", steps / wall if wall > 0 else float('inf'))
+        if self.verbose:
+            print(f"rollout: {steps} env steps in {wall:.2f}s ({steps / wall:,.0f} steps/s)")
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Train a PPO agent on CarbonRouteEnv")
+    parser.add_argument('--n-nodes', type=int, default=5, help="delivery nodes per problem")
+    parser.add_argument('--vehicle-type', choices=['diesel', 'gasoline', 'ev'], default='diesel')
+    parser.add_argument('--load-kg', type=float, default=500)
+    parser.add_argument('--timesteps', type=int, default=5000, help="env steps per seed")
+    parser.add_argument('--seeds', type=int, nargs='+', default=[0], help="train one model per seed")
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                        help="subprocess workers (subproc) or env instances (native)")
+    parser.add_argument('--backend', choices=['subproc', 'native'], default='subproc',
+                        help="SubprocVecEnv across cores, or the in-process VecCarbonRouteEnv")
+    parser.add_argument('--obs-mode', choices=OBS_MODES, default='scalar',
+                        help="observation encoding; onehot/packed scale to large node counts, "
+                             "distance adds the current node's cost row so the policy adapts to each stop set")
+    parser.add_argument('--randomize-every', type=int, default=None,
+                        help="draw new synthetic matrices every N episodes per env, 0 = never "
+                             "(default: 1 with --obs-mode distance, else 0)")
+    parser.add_argument('--max-episode-steps', type=int, default=None,
+                        help="truncate episodes after this many steps (default: 2 * n_nodes)")
+    parser.add_argument('--maskable', action='store_true',
+                        help="train sb3-contrib MaskablePPO so invalid (revisit) actions are never sampled")
+    parser.add_argument('--n-steps', type=int, default=2048, help="PPO rollout length per env")
+    parser.add_argument('--output', default='ppo_carbon_route', help="model path (seed appended when several)")
+    parser.add_argument('--verbose', type=int, default=1)
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+
+    for seed in args.seeds:
+        env = build_env(args, seed)
+        model = algorithm_class(args)('MlpPolicy', env, n_steps=args.n_steps, seed=seed, verbose=args.verbose)
+
+        start = time.perf_counter()
+        model.learn(total_timesteps=args.timesteps, callback=ThroughputCallback(verbose=args.verbose))
+        wall = time.perf_counter() - start
+        env.close()
 
-def main():
-    env = CarbonRouteEnv(n_nodes=5, vehicle_type='diesel')
-    model = PPO('MlpPolicy', env, verbose=1)
-    model.learn(total_timesteps=5000)
-    model.save('ppo_carbon_route')
-    print('Training complete. Model saved as ppo_carbon_route.zip')
+        path = args.output if len(args.seeds) == 1 else f"{args.output}_seed{seed}"
+        model.save(path)
+        print(f"Seed {seed}: {model.num_timesteps} env steps in {wall:.1f}s "
+              f"({model.num_timesteps / wall:,.0f} steps/s). Model saved as {path}.zip")
 
 if __name__ == '__main__':
     main()